@@ -0,0 +1,169 @@
+"""
+Deteksi anomali rekap harian
+Menyimpan rata-rata & varians berjalan (EWMA) per metrik, di-update O(1)
+setiap ada rekap FINAL. Tidak pernah scan ulang history daily_summaries.
+"""
+
+import math
+import logging
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from utils import format_rupiah
+
+if TYPE_CHECKING:
+    from storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+# Label metrik untuk tampilan
+METRIC_LABELS = {
+    'selisih': 'Selisih',
+    'omzet': 'Omzet',
+    'tf_share': 'Porsi TF',
+}
+
+
+def extract_metrics(summary_data: Dict) -> Dict[str, float]:
+    """
+    Ambil nilai metrik yang dipantau dari hasil logic.calculate_daily_summary()
+
+    - selisih  : omzet manual - POS (bisa negatif)
+    - omzet    : omzet manual
+    - tf_share : porsi TF terhadap omzet manual (0..1), hanya jika omzet > 0
+    """
+    omzet = summary_data.get('omzet_manual', 0) or 0
+    metrics = {
+        'selisih': float(summary_data.get('selisih', 0) or 0),
+        'omzet': float(omzet),
+    }
+    if omzet > 0:
+        metrics['tf_share'] = float(summary_data.get('total_tf', 0) or 0) / omzet
+    return metrics
+
+
+class AnomalyDetector:
+    """
+    Detektor anomali berbasis z-score terhadap statistik berjalan.
+
+    Statistik per metrik: (n, mean, var, last_date).
+    Selama warm-up (n kecil) bobot update = 1/(n+1) sehingga sama dengan
+    rata-rata biasa; setelah itu bobot tetap alpha = 2/(window+1) (EWMA),
+    jadi statistik mengikuti pola terbaru toko.
+    """
+
+    def __init__(self, storage: 'Storage', z_threshold: float = 2.5,
+                 min_samples: int = 7, window: int = 30):
+        self.storage = storage
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.alpha = 2.0 / (window + 1)
+
+    def load_stats(self) -> Dict[str, Tuple]:
+        """Ambil statistik terkini dari storage (satu query kecil)"""
+        return self.storage.get_summary_stats()
+
+    def check(self, summary_data: Dict, stats: Optional[Dict[str, Tuple]] = None) -> List[Dict]:
+        """
+        Bandingkan summary dengan statistik berjalan TANPA meng-update statistik.
+
+        Args:
+            summary_data: Dict hasil logic.calculate_daily_summary() atau baris rekap
+            stats: Statistik yang sudah di-load (opsional, hindari query berulang)
+
+        Returns: List flag anomali, masing-masing dict
+                 {metric, value, mean, std, zscore}
+        """
+        if stats is None:
+            stats = self.load_stats()
+
+        flags = []
+        for metric, value in extract_metrics(summary_data).items():
+            if metric not in stats:
+                continue
+            n, mean, var, _ = stats[metric]
+            if n < self.min_samples or var <= 0:
+                continue
+
+            std = math.sqrt(var)
+            zscore = (value - mean) / std
+            if abs(zscore) >= self.z_threshold:
+                flags.append({
+                    'metric': metric,
+                    'value': value,
+                    'mean': mean,
+                    'std': std,
+                    'zscore': zscore,
+                })
+
+        return flags
+
+    def observe(self, date: str, summary_data: Dict) -> List[Dict]:
+        """
+        Proses satu rekap FINAL: cek anomali, simpan flag, lalu update statistik.
+
+        Idempotent: tanggal yang sudah pernah diproses (<= last_date) tidak
+        mengubah statistik lagi, sehingga FINAL ulang tidak double-count.
+
+        Returns: List flag anomali BARU untuk tanggal tersebut
+                 (kosong jika tanggal sudah pernah diproses)
+        """
+        stats = self.load_stats()
+
+        updated = {}
+        for metric, value in extract_metrics(summary_data).items():
+            n, mean, var, last_date = stats.get(metric, (0, 0.0, 0.0, None))
+            if last_date is not None and date <= last_date:
+                continue
+
+            # Update EWMA mean/variance (O(1))
+            weight = max(self.alpha, 1.0 / (n + 1))
+            diff = value - mean
+            incr = weight * diff
+            mean += incr
+            var = (1 - weight) * (var + diff * incr)
+
+            updated[metric] = (n + 1, mean, var, date)
+
+        if not updated:
+            logger.info(f"Anomaly stats already include {date}, skipping update")
+            return []
+
+        flags = self.check(summary_data, stats)
+        self.storage.save_anomalies(date, flags)
+        self.storage.save_summary_stats(updated)
+
+        logger.info(f"Anomaly stats updated for {date}: {len(flags)} flag(s)")
+        return flags
+
+    def get_flags_range(self, start_date: str, end_date: str) -> Dict[str, List[Dict]]:
+        """
+        Ambil flag anomali yang tersimpan dalam range tanggal.
+
+        Returns: Dict date -> List flag
+        """
+        result: Dict[str, List[Dict]] = {}
+        for date, metric, value, mean, std, zscore in self.storage.get_anomalies_range(start_date, end_date):
+            result.setdefault(date, []).append({
+                'metric': metric,
+                'value': value,
+                'mean': mean,
+                'std': std,
+                'zscore': zscore,
+            })
+        return result
+
+    @staticmethod
+    def format_flag(flag: Dict) -> str:
+        """Format satu flag anomali menjadi teks singkat"""
+        label = METRIC_LABELS.get(flag['metric'], flag['metric'])
+        arrow = '⬆️' if flag['zscore'] > 0 else '⬇️'
+
+        if flag['metric'] == 'tf_share':
+            value = f"{flag['value'] * 100:.1f}%"
+            normal = f"{flag['mean'] * 100:.1f}% ± {flag['std'] * 100:.1f}%"
+        else:
+            value = format_rupiah(flag['value'])
+            normal = f"{format_rupiah(flag['mean'])} ± {format_rupiah(flag['std'])}"
+
+        return f"{arrow} {label}: {value} (biasanya {normal}, z={flag['zscore']:.1f})"
@@ -3,9 +3,15 @@ Asisten Keuangan Anisa Store v2
 Bot Telegram untuk Pencatatan Keuangan Harian Toko
 """
 
+import asyncio
+import io
 import logging
-import re
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import sys
+import time
+from functools import partial
+from typing import Callable
+from telegram import Update
+from telegram.error import TelegramError
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -17,10 +23,36 @@ from telegram.ext import (
 from config import Config
 from storage import Storage
 from logic import FinancialLogic
-from utils import parse_amount, format_rupiah
+from formatting import format_tanggal_singkat, format_bulan
+from utils import (
+    parse_amount, parse_amount_detail, split_amount_text, format_amount_terms,
+    format_rupiah, parse_date, parse_date_range, is_batch_text, parse_batch_entries
+)
 from ocr_gemini import GeminiClient
+from ocr_backend import create_backend
 from scheduler import RekapScheduler
-from datetime import datetime, timedelta
+from anomaly import AnomalyDetector
+from forecast import OmzetForecaster
+from metrics import UpdateMetrics, LatencyStats, format_uptime
+from update_processor import PerChatUpdateProcessor
+from router import CallbackRouter
+from live_status import LiveStatusManager
+from outbox import OutboxRateLimiter, BULK
+from persistence import SQLitePersistence
+from ocr_queue import OCRQueue, OCRQueueFull
+from ocr_cache import OCRCache, OCRCacheEntry
+from ocr_preprocess import choose_photo_size, prepare_image
+from views import (
+    MAIN_MENU_TEXT, MAIN_MENU_KEYBOARD, INPUT_MENU_KEYBOARD, REKAP_MENU_KEYBOARD,
+    KOREKSI_MENU_KEYBOARD, STATUS_ACTIONS_KEYBOARD, BACK_TO_MAIN_KEYBOARD,
+    BACK_TO_INPUT_KEYBOARD, BACK_TO_REKAP_KEYBOARD, BACK_TO_KOREKSI_KEYBOARD,
+    BANTUAN_SINGKAT_TEXT, TIPE_EMOJI, modal_reset_keyboard, reset_confirm_keyboard,
+    ledger_nav_keyboard, render_status, render_status_singkat, render_lihat_header,
+    render_lihat_ringkasan, render_transaksi_line, render_rekap_mingguan_singkat,
+    render_rekap_bulanan_singkat, render_live_status, render_ocr_progress, render_ocr_duplicate,
+    ocr_confirm_keyboard, OCR_QUEUE_FULL_TEXT
+)
+from datetime import datetime, timedelta, timezone
 
 # Setup logging
 logging.basicConfig(
@@ -29,32 +61,84 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Jarak update pesan "sedang menganalisa" selama OCR berjalan (detik)
+OCR_PROGRESS_INTERVAL = 5
+
+# Jarak pembersihan state percakapan kedaluwarsa & user idle dari memori
+CONVERSATION_PRUNE_MINUTES = 10
+# Jarak pembersihan cache OCR lama & hasil OCR pending (menit)
+OCR_CACHE_PRUNE_MINUTES = 24 * 60
+# Hasil OCR pending dibuang: yang sudah diproses setelah 1 hari (cukup untuk tombol ditekan ulang),
+# yang tombolnya ditinggal setelah 7 hari
+OCR_PENDING_DONE_DAYS = 1
+OCR_PENDING_ABANDONED_DAYS = 7
+
+# Jenis input via tombol: kode → (nama tampilan, command)
+INPUT_TYPE_NAMES = {
+    'cash': ('Cash Akhir', '/cash'),
+    'tf': ('Transfer/QRIS', '/tf'),
+    'keluar': ('Pengeluaran', '/keluar'),
+    'modal': ('Modal Awal', '/modal'),
+    'pos': ('Total POS', '/totalpos')
+}
+
 
 class TokoBot:
     def __init__(self):
+        Config.validate()
         self.config = Config()
         self.storage = Storage(self.config.DB_PATH)
         self.logic = FinancialLogic(self.storage)
         self.gemini = GeminiClient()
-        self.scheduler = RekapScheduler(self.storage, self.logic)
-
-    async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler untuk command /start"""
-        keyboard = [
-            [InlineKeyboardButton("➕ Input Transaksi", callback_data="menu_input")],
-            [InlineKeyboardButton("📊 Rekap & Laporan", callback_data="menu_rekap")],
-            [InlineKeyboardButton("✏️ Koreksi & Reset", callback_data="menu_koreksi")],
-            [InlineKeyboardButton("❓ Bantuan", callback_data="menu_bantuan")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
-        await update.message.reply_text(
-            "🏪 *Asisten Keuangan Anisa Store v2*\n\n"
-            "Selamat datang! Pilih menu di bawah atau ketik /help untuk bantuan.\n\n"
-            "💡 _Tip: Kirim foto bukti transfer untuk OCR otomatis_",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+        self.ocr = create_backend(
+            self.config.OCR_BACKEND, gemini=self.gemini,
+            tesseract_lang=self.config.OCR_TESSERACT_LANG,
+            timeout=self.config.OCR_LOCAL_TIMEOUT,
+            threshold=self.config.OCR_CASCADE_THRESHOLD
+        )
+        self.anomaly = AnomalyDetector(
+            self.storage,
+            z_threshold=self.config.ANOMALY_Z_THRESHOLD,
+            min_samples=self.config.ANOMALY_MIN_SAMPLES,
+            window=self.config.ANOMALY_WINDOW
+        )
+        self.forecaster = OmzetForecaster(self.storage)
+        self.scheduler = RekapScheduler(
+            self.storage, self.logic,
+            detector=self.anomaly,
+            forecaster=self.forecaster
+        )
+        self.scheduler.on_anomaly = self.push_anomaly_alert
+        self.update_metrics = UpdateMetrics()
+        self.callback_router = self._build_callback_router()
+        self.outbox = OutboxRateLimiter(
+            global_rate=self.config.OUTBOX_GLOBAL_RATE,
+            private_rate=self.config.OUTBOX_PRIVATE_RATE,
+            group_per_minute=self.config.OUTBOX_GROUP_PER_MINUTE,
+            max_retries=self.config.OUTBOX_MAX_RETRIES
+        )
+        self.live_status = LiveStatusManager(
+            self.storage, self._render_live_status,
+            debounce=self.config.LIVE_STATUS_DEBOUNCE,
+            min_interval=self.config.LIVE_STATUS_MIN_INTERVAL,
+            rate_limit_args=BULK
         )
+        self.storage.on_change = self.live_status.notify
+        self.ocr_queue = OCRQueue(
+            workers=self.config.OCR_MAX_WORKERS,
+            max_depth=self.config.OCR_QUEUE_MAX
+        )
+        self.ocr_cache = OCRCache(
+            self.storage,
+            max_distance=self.config.OCR_CACHE_MAX_DISTANCE,
+            retention_days=self.config.OCR_CACHE_RETENTION_DAYS
+        )
+        self.persistence = SQLitePersistence(
+            self.storage,
+            default_ttl=self.config.CONVERSATION_TTL,
+            update_interval=self.config.CONVERSATION_FLUSH_INTERVAL
+        )
+        self.application = None
 
     async def modal_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handler untuk /modal <amount>"""
@@ -83,21 +167,13 @@ class TokoBot:
 
             if modal_exists:
                 # Kirim warning dengan pilihan
-                keyboard = [
-                    [
-                        InlineKeyboardButton("✅ Ya, Reset Hari Ini", callback_data=f"reset_and_modal_{amount}"),
-                        InlineKeyboardButton("❌ Batal", callback_data="cancel_modal")
-                    ]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-
                 await update.message.reply_text(
                     f"⚠️ *PERINGATAN*\n\n"
                     f"Anda sudah input modal hari ini.\n"
                     f"Input modal baru berarti *RESET SEMUA* transaksi hari ini.\n\n"
                     f"💰 Modal baru: {format_rupiah(amount)}\n\n"
                     f"Lanjutkan?",
-                    reply_markup=reply_markup,
+                    reply_markup=modal_reset_keyboard(amount),
                     parse_mode='Markdown'
                 )
                 return
@@ -214,37 +290,19 @@ class TokoBot:
                 await update.message.reply_text("❌ Format: /keluar <jumlah> [ket]\nContoh: /keluar 200k beli gas")
                 return
 
-            full_text = ' '.join(context.args)
-            tokens = full_text.split()
-            amount_tokens = []
-            keterangan_tokens = []
-            found_text = False
-
-            for token in tokens:
-                if not found_text:
-                    if token == '+':
-                        amount_tokens.append('+')
-                    elif self._is_amount_token(token):
-                        amount_tokens.append(token)
-                    else:
-                        found_text = True
-                        keterangan_tokens.append(token)
-                else:
-                    keterangan_tokens.append(token)
-
-            amount_str = ' '.join(amount_tokens) if amount_tokens else ''
-            keterangan = ' '.join(keterangan_tokens) if keterangan_tokens else ''
+            amount_str, keterangan = split_amount_text(' '.join(context.args))
 
             if not amount_str:
                 await update.message.reply_text("❌ Format: /keluar <jumlah> [ket]\nContoh: /keluar 2k + 4k operasional")
                 return
 
             try:
-                amount = parse_amount(amount_str)
+                detail = parse_amount_detail(amount_str)
             except ValueError as e:
                 await update.message.reply_text(f"❌ Format tidak valid: {str(e)}\n\n✅ Data TIDAK tersimpan.")
                 return
 
+            amount = detail['total']
             if amount <= 0:
                 await update.message.reply_text("❌ Jumlah harus > 0\n\n✅ Data TIDAK tersimpan.")
                 return
@@ -265,6 +323,8 @@ class TokoBot:
             )
 
             msg = f"✅ Pengeluaran {format_rupiah(amount)} tercatat"
+            if detail['is_expression']:
+                msg += f"\n{format_amount_terms(detail['terms'])}"
             if keterangan:
                 msg += f"\n📝 {keterangan}"
 
@@ -275,11 +335,6 @@ class TokoBot:
             logger.error(f"Error in keluar_command: {e}")
             await update.message.reply_text("❌ Terjadi kesalahan")
 
-    def _is_amount_token(self, token: str) -> bool:
-        """Helper untuk cek apakah token adalah angka"""
-        pattern = r'^[\d\.,]+[kmjtrbibulanosnd]*$'
-        return bool(re.match(pattern, token.lower()))
-
     async def totalpos_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handler untuk /totalpos <amount>"""
         try:
@@ -325,153 +380,80 @@ class TokoBot:
         """Handler untuk /status - rekap keuangan hari ini"""
         try:
             tanggal = datetime.now().strftime('%Y-%m-%d')
-            tanggal_display = datetime.now().strftime('%A, %d %B %Y')
-
-            try:
-                import locale
-                locale.setlocale(locale.LC_TIME, 'id_ID.UTF-8')
-                tanggal_display = datetime.now().strftime('%A, %d %B %Y')
-            except:
-                pass
-
             summary = self.logic.calculate_daily_summary(tanggal)
 
-            # Format output yang lebih rapi dan eye-catching
-            message = f"""
-╔══════════════════════════╗
-║  📊 STATUS HARI INI  ║
-╚══════════════════════════╝
-📅 {tanggal_display}
-
-━━━━━━━━━━━━━━━━━━━━━━━━
-💰 MODAL & CASH
-━━━━━━━━━━━━━━━━━━━━━━━━
-Modal Awal       : {format_rupiah(summary['modal'])}
-Cash Akhir (laci): {format_rupiah(summary['cash_akhir'])}
+            message = render_status(tanggal, summary)
+            message += self._format_forecast_today(tanggal, summary)
 
-━━━━━━━━━━━━━━━━━━━━━━━━
-💳 TRANSAKSI
-━━━━━━━━━━━━━━━━━━━━━━━━
-Total TF/QRIS    : {format_rupiah(summary['total_tf'])} ({summary['count_tf']}x)
-Total Pengeluaran: {format_rupiah(summary['total_pengeluaran'])} ({summary['count_pengeluaran']}x)
+            await update.message.reply_text(message, reply_markup=STATUS_ACTIONS_KEYBOARD)
+            logger.info(f"Status requested")
 
-━━━━━━━━━━━━━━━━━━━━━━━━
-📈 PERHITUNGAN
-━━━━━━━━━━━━━━━━━━━━━━━━
-Penjualan Cash   : {format_rupiah(summary['penjualan_cash'])}
-Omzet Manual     : {format_rupiah(summary['omzet_manual'])}
+        except Exception as e:
+            logger.error(f"Error in status_command: {e}")
+            await update.message.reply_text("❌ Terjadi kesalahan")
 
-━━━━━━━━━━━━━━━━━━━━━━━━
-🖥️ OMZET POS
-━━━━━━━━━━━━━━━━━━━━━━━━
-Omzet POS        : {format_rupiah(summary['pos_total'])} ({summary['count_pos']}x)
+    def _render_live_status(self) -> str:
+        """Teks status live hari ini (dipakai LiveStatusManager)"""
+        tanggal = datetime.now().strftime('%Y-%m-%d')
+        return render_live_status(tanggal, self.logic.calculate_daily_summary(tanggal))
 
-━━━━━━━━━━━━━━━━━━━━━━━━
-📊 SELISIH
-━━━━━━━━━━━━━━━━━━━━━━━━
-Manual - POS     : {format_rupiah(summary['selisih'])} ({summary['selisih_persen']:.2f}%)
+    async def live_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handler untuk /live [on|off] - status hari ini yang di-pin & diperbarui otomatis"""
+        try:
+            chat_id = update.effective_chat.id
+            arg = context.args[0].lower() if context.args else 'on'
 
-{summary['status_icon']} {summary['status_text']}
-"""
+            if arg in ('off', 'stop', 'mati'):
+                if await self.live_status.disable(context.bot, chat_id):
+                    await update.message.reply_text("📌 Status live dimatikan")
+                else:
+                    await update.message.reply_text("📌 Status live belum aktif di chat ini")
+                return
 
-            # Action buttons untuk quick actions
-            keyboard = [
-                [
-                    InlineKeyboardButton("➕ Tambah", callback_data="menu_input"),
-                    InlineKeyboardButton("✏️ Koreksi", callback_data="action_edit")
-                ],
-                [
-                    InlineKeyboardButton("📊 Rekap", callback_data="menu_rekap"),
-                    InlineKeyboardButton("🧹 Reset", callback_data="action_reset_today")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            if arg not in ('on', 'start', 'nyala'):
+                await update.message.reply_text("❌ Format: `/live` atau `/live off`", parse_mode='Markdown')
+                return
 
-            await update.message.reply_text(message, reply_markup=reply_markup)
-            logger.info(f"Status requested")
+            pinned = await self.live_status.enable(context.bot, chat_id)
+            if not pinned:
+                await update.message.reply_text(
+                    "⚠️ Status live aktif, tapi gagal di-pin.\n"
+                    "Jadikan bot admin dengan izin pin pesan, lalu ketik /live lagi."
+                )
+            logger.info(f"Live status enabled: chat={chat_id}, pinned={pinned}")
 
         except Exception as e:
-            logger.error(f"Error in status_command: {e}")
+            logger.error(f"Error in live_command: {e}")
             await update.message.reply_text("❌ Terjadi kesalahan")
 
     async def lihat_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler untuk /lihat - list transaksi hari ini"""
+        """Handler untuk /lihat [tanggal] - list transaksi hari ini atau tanggal tertentu"""
         try:
-            tanggal = datetime.now().strftime('%Y-%m-%d')
-            tanggal_display = datetime.now().strftime('%A, %d %B %Y')
-
+            today = datetime.now().strftime('%Y-%m-%d')
             try:
-                import locale
-                locale.setlocale(locale.LC_TIME, 'id_ID.UTF-8')
-                tanggal_display = datetime.now().strftime('%A, %d %B %Y')
-            except:
-                pass
+                tanggal = parse_date(' '.join(context.args)) if context.args else today
+            except ValueError as e:
+                await update.message.reply_text(f"❌ {str(e)}")
+                return
+            is_today = tanggal == today
 
             transactions = self.storage.get_transactions_by_date(tanggal)
             summary = self.logic.calculate_daily_summary(tanggal)
 
-            message = f"""
-╔══════════════════════════╗
-║  📒 TRANSAKSI HARI INI  ║
-╚══════════════════════════╝
-📅 {tanggal_display}
-
-"""
+            message = render_lihat_header(tanggal, is_today)
 
             if not transactions:
-                message += "📭 _Belum ada transaksi hari ini_\n"
+                message += "📭 _Belum ada transaksi hari ini_\n" if is_today else "📭 _Tidak ada transaksi_\n"
             else:
-                tipe_emoji = {
-                    'modal': '💰',
-                    'cash': '💵',
-                    'tf': '💳',
-                    'keluar': '📤',
-                    'pos': '🖥️'
-                }
-
-                tipe_label = {
-                    'modal': 'MODAL',
-                    'cash': 'CASH',
-                    'tf': 'TF',
-                    'keluar': 'KELUAR',
-                    'pos': 'POS'
-                }
-
-                for i, tx in enumerate(transactions, 1):
-                    tx_id = tx[0]
-                    waktu = tx[2][:5]  # HH:MM saja
-                    tipe = tx[3]
-                    jumlah = tx[4]
-                    keterangan = tx[6] if tx[6] else ''
-
-                    emoji = tipe_emoji.get(tipe, '📝')
-                    label = tipe_label.get(tipe, tipe.upper())
-
-                    line = f"{i}. [{waktu}] {emoji} {label}: {format_rupiah(jumlah)}"
-                    if keterangan:
-                        line += f"\n   💬 {keterangan}"
-                    line += f"\n   🔑 ID: {tx_id}\n"
-
-                    message += line
-
-            # Summary
-            message += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━
-📊 RINGKASAN
-━━━━━━━━━━━━━━━━━━━━━━━━
-💰 Modal         : {format_rupiah(summary['modal'])}
-💵 Cash Akhir    : {format_rupiah(summary['cash_akhir'])}
-💳 TF/QRIS       : {format_rupiah(summary['total_tf'])} ({summary['count_tf']}x)
-📤 Pengeluaran   : {format_rupiah(summary['total_pengeluaran'])} ({summary['count_pengeluaran']}x)
-📈 Omzet Manual  : {format_rupiah(summary['omzet_manual'])}
-🖥️ Omzet POS     : {format_rupiah(summary['pos_total'])}
-📊 Selisih       : {format_rupiah(summary['selisih'])} ({summary['selisih_persen']:.2f}%)
+                message += ''.join(
+                    render_transaksi_line(i, tx[0], tx[2], tx[3], tx[4], tx[6] or '')
+                    for i, tx in enumerate(transactions, 1)
+                )
 
-💡 Gunakan /edit <ID> untuk edit transaksi
-"""
+            message += render_lihat_ringkasan(summary)
 
             await update.message.reply_text(message)
-            logger.info(f"Lihat requested")
+            logger.info(f"Lihat requested: {tanggal}")
 
         except Exception as e:
             logger.error(f"Error in lihat_command: {e}")
@@ -591,98 +573,197 @@ Manual - POS     : {format_rupiah(summary['selisih'])} ({summary['selisih_persen
             await update.message.reply_text("❌ Terjadi kesalahan")
 
     async def photo_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler untuk foto (OCR via Gemini)"""
+        """Handler untuk foto (OCR via Gemini, tidak memblokir event loop, hasil di-cache)"""
         try:
-            # 1. Download foto kualitas tertinggi
+            # 1. Ukuran foto terkecil yang masih terbaca (bukan selalu yang terbesar)
             if not update.message.photo:
                 return
 
-            photo = update.message.photo[-1]
+            photo = choose_photo_size(update.message.photo, self.config.OCR_PHOTO_MIN_SIDE)
             file_id = photo.file_id
 
-            # Beri feedback sedang memproses
-            processing_msg = await update.message.reply_text("⏳ Sedang menganalisa gambar...")
-
-            # Download file
-            new_file = await context.bot.get_file(file_id)
-            file_byte_array = await new_file.download_as_bytearray()
-            file_bytes = bytes(file_byte_array)
-
-            # 2. Kirim ke Gemini
-            if not self.gemini or not self.gemini.model:
-                await processing_msg.edit_text("⚠️ Fitur OCR belum dikonfigurasi (API Key missing).")
+            if not self.ocr.available:
+                await update.message.reply_text(
+                    f"⚠️ Fitur OCR belum dikonfigurasi (backend {self.config.OCR_BACKEND} tidak tersedia)."
+                )
                 return
 
-            result = self.gemini.analyze_transfer_image(file_bytes)
-
-            # 3. Proses hasil
-            if result['is_transfer'] and result['amount'] > 0:
-                amount = result['amount']
-                confidence = result['confidence']
-                reason = result.get('reason', 'Transfer detected')
+            # Foto yang sama di-forward ulang: pakai hasil tersimpan, tanpa unduh & tanpa AI
+            entry = self.ocr_cache.find_by_file(photo.file_unique_id)
+            if entry is not None:
+                await self._finish_ocr(update, update.message.reply_text, entry, file_id)
+                return
 
-                tanggal = datetime.now().strftime('%Y-%m-%d')
-                waktu = datetime.now().strftime('%H:%M:%S')
-
-                # Simpan transaksi
-                tx_id = self.storage.add_transaction(
-                    tanggal=tanggal,
-                    waktu=waktu,
-                    tipe='tf',
-                    jumlah=amount,
-                    sumber='ocr_gemini',
-                    keterangan=f"OCR: {reason}",
-                    chat_id=update.effective_chat.id,
-                    user_id=update.effective_user.id,
-                    message_id=update.message.message_id,
-                    file_id=file_id
+            async def run_ocr():
+                # Unduhan ikut di dalam job supaya burst foto juga dibatasi worker
+                new_file = await context.bot.get_file(file_id)
+                buffer = io.BytesIO()
+                await new_file.download_to_memory(buffer)
+                # Hash + crop/grayscale/kompres di thread (CPU-bound)
+                loop = asyncio.get_running_loop()
+                prepared = await loop.run_in_executor(
+                    None, prepare_image, buffer, self.config.OCR_MAX_SIDE, self.config.OCR_JPEG_QUALITY
                 )
-
-                # Feedback sukses
-                await processing_msg.edit_text(
-                    f"✅ *TRANSFER TERDETEKSI*\n\n"
-                    f"💰 Nominal: {format_rupiah(amount)}\n"
-                    f"📝 Catatan: {reason}\n"
-                    f"🤖 Confidence: {int(confidence * 100)}%\n\n"
-                    f"Data berhasil disimpan sebagai transaksi TF hari ini.",
-                    parse_mode='Markdown'
+                cached = self.ocr_cache.find_by_content(photo.file_unique_id, prepared.sha256, prepared.dhash)
+                if cached is not None and cached.exact:
+                    return cached
+                result = await self.ocr.analyze(prepared.data, mime_type=prepared.mime_type)
+                if result.get('error') or result.get('degraded'):
+                    # Gagal/timeout atau hasil cadangan cascade: jangan di-cache, kiriman ulang dicoba lagi
+                    return OCRCacheEntry(None, result, None, None)
+                return self.ocr_cache.store(
+                    photo.file_unique_id, prepared.sha256, prepared.dhash, result, similar=cached
                 )
-                logger.info(f"OCR Success: {amount} from user {update.effective_user.id}")
 
-            else:
-                # Feedback gagal
-                reason = result.get('reason', 'Tidak terdeteksi sebagai bukti transfer')
-                await processing_msg.edit_text(
-                    f"⚠️ *OCR TIDAK YAKIN*\n\n"
-                    f"Analisa AI: {reason}\n\n"
-                    f"Silakan input manual dengan:\n"
-                    f"`/tf <jumlah>`",
-                    parse_mode='Markdown'
-                )
-                logger.info(f"OCR Failed/Ignored: {reason}")
+            # 2. Masuk antrean OCR (worker terbatas, bergiliran per chat)
+            try:
+                job = self.ocr_queue.submit(update.effective_chat.id, run_ocr)
+            except OCRQueueFull:
+                await update.message.reply_text(OCR_QUEUE_FULL_TEXT, parse_mode='Markdown')
+                logger.warning(f"OCR queue full, photo from chat {update.effective_chat.id} rejected")
+                return
+
+            # Beri feedback sedang memproses (posisi antrean → lama proses)
+            processing_msg = await update.message.reply_text(self._ocr_progress_text(job))
+            entry = await self._with_progress(
+                processing_msg, job.future, lambda: self._ocr_progress_text(job)
+            )
+
+            # 3. Proses hasil
+            await self._finish_ocr(update, processing_msg.edit_text, entry, file_id)
 
         except Exception as e:
             logger.error(f"Error in photo_handler: {e}")
             await update.message.reply_text("❌ Gagal memproses gambar")
 
-    async def reset_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler untuk /reset [YYYY-MM-DD] - reset transaksi hari ini atau tanggal tertentu"""
+    async def _finish_ocr(self, update: Update, respond, entry: OCRCacheEntry, file_id: str):
+        """Catat hasil OCR sebagai transaksi TF, kecuali struknya sudah pernah tercatat"""
+        result = entry.result
+        if not (result['is_transfer'] and result['amount'] > 0):
+            # Feedback gagal
+            reason = result.get('reason', 'Tidak terdeteksi sebagai bukti transfer')
+            await respond(
+                f"⚠️ *OCR TIDAK YAKIN*\n\n"
+                f"Analisa AI: {reason}\n\n"
+                f"Silakan input manual dengan:\n"
+                f"`/tf <jumlah>`",
+                parse_mode='Markdown'
+            )
+            logger.info(f"OCR Failed/Ignored: {reason}")
+            return
+
+        amount = result['amount']
+        confidence = result.get('confidence', 0.0)
+        reason = result.get('reason', 'Transfer detected')
+
+        duplicate = self._ocr_duplicate(entry, amount)
+        if duplicate is not None:
+            self.ocr_cache.stats['duplicates'] += 1
+            tx_id, tx_tanggal, tx_waktu, _, tx_jumlah = duplicate[:5]
+            reply_markup = None
+            if not entry.exact:
+                # Hanya mirip: bisa saja transfer lain dengan nominal sama, biarkan user memilih
+                pending_id = self.storage.add_ocr_pending(
+                    update.effective_chat.id, update.message.message_id, amount, reason, confidence,
+                    cache_id=entry.id, backend=result.get('backend', 'gemini')
+                )
+                reply_markup = ocr_confirm_keyboard(pending_id)
+            await respond(
+                render_ocr_duplicate(tx_id, tx_tanggal, tx_waktu, tx_jumlah, similar=not entry.exact),
+                parse_mode='Markdown',
+                reply_markup=reply_markup
+            )
+            logger.info(f"OCR duplicate of transaction {tx_id} ({entry.match} match), not saved")
+            return
+
+        tanggal = datetime.now().strftime('%Y-%m-%d')
+        waktu = datetime.now().strftime('%H:%M:%S')
+
+        # Simpan transaksi
+        tx_id = self.storage.add_transaction(
+            tanggal=tanggal,
+            waktu=waktu,
+            tipe='tf',
+            jumlah=amount,
+            sumber=f"ocr_{result.get('backend', 'gemini')}",
+            keterangan=f"OCR: {reason}",
+            chat_id=update.effective_chat.id,
+            user_id=update.effective_user.id,
+            message_id=update.message.message_id,
+            file_id=file_id
+        )
+        if entry.id is not None:
+            self.ocr_cache.link_transaction(entry.id, tx_id)
+
+        # Feedback sukses
+        await respond(
+            f"✅ *TRANSFER TERDETEKSI*\n\n"
+            f"💰 Nominal: {format_rupiah(amount)}\n"
+            f"📝 Catatan: {reason}\n"
+            f"🤖 Confidence: {int(confidence * 100)}%\n\n"
+            f"Data berhasil disimpan sebagai transaksi TF hari ini.",
+            parse_mode='Markdown'
+        )
+        logger.info(f"OCR Success: {amount} from user {update.effective_user.id}")
+
+    def _ocr_duplicate(self, entry: OCRCacheEntry, amount: int):
+        """
+        Transaksi yang sudah mencatat struk ini, atau None.
+        Foto sama persis → selalu ganda; foto mirip (dHash) → hanya jika nominalnya sama.
+        Transaksi yang sudah dihapus tidak dihitung, jadi struknya bisa dicatat lagi.
+        """
+        if entry.transaction_id is None:
+            return None
+        tx = self.storage.get_transaction_by_id(entry.transaction_id)
+        if tx is None or (not entry.exact and tx[4] != amount):
+            return None
+        return tx
+
+    async def _with_progress(self, message, awaitable, render: Callable[[], str]):
+        """
+        Tunggu `awaitable` sambil mengedit `message` dengan render()
+        setiap OCR_PROGRESS_INTERVAL detik (hanya jika teksnya berubah).
+        Jika handler dibatalkan, awaitable ikut dibatalkan.
+        """
+        task = asyncio.ensure_future(awaitable)
+        shown = message.text
         try:
-            import re
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=OCR_PROGRESS_INTERVAL)
+                if done:
+                    return task.result()
+                text = render()
+                if text == shown:
+                    continue
+                try:
+                    await message.edit_text(text)
+                    shown = text
+                except TelegramError as e:
+                    logger.debug(f"Progress edit skipped: {e}")
+        finally:
+            if not task.done():
+                task.cancel()
+
+    def _ocr_progress_text(self, job) -> str:
+        # Lama proses dihitung sejak worker mulai, bukan sejak foto masuk antrean
+        elapsed = int(time.monotonic() - job.started_at) if job.running else 0
+        return render_ocr_progress(self.ocr_queue.position(job), self.ocr_queue.running, elapsed)
 
+    async def reset_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handler untuk /reset [tanggal] - reset transaksi hari ini atau tanggal tertentu"""
+        try:
             # Check if date argument provided
             if context.args:
-                date_str = context.args[0]
-                # Validate date format
-                if not re.match(r'^\d{4}-\d{2}-\d{2}$', date_str):
+                try:
+                    tanggal = parse_date(' '.join(context.args))
+                except ValueError as e:
                     await update.message.reply_text(
-                        "❌ Format tanggal salah.\n\n"
-                        "Gunakan format: `/reset YYYY-MM-DD`\n"
-                        "Contoh: `/reset 2025-12-11`",
+                        f"❌ {str(e)}\n\n"
+                        "Gunakan format: `/reset <tanggal>`\n"
+                        "Contoh: `/reset kemarin`, `/reset 1 des`, `/reset 2025-12-11`",
                         parse_mode='Markdown'
                     )
                     return
-                tanggal = date_str
                 is_today = (tanggal == datetime.now().strftime('%Y-%m-%d'))
             else:
                 tanggal = datetime.now().strftime('%Y-%m-%d')
@@ -700,14 +781,6 @@ Manual - POS     : {format_rupiah(summary['selisih'])} ({summary['selisih_persen
 
             # Tampilkan konfirmasi (2-step)
             count = len(transactions)
-            keyboard = [
-                [
-                    InlineKeyboardButton("✅ Ya, Reset", callback_data=f"confirm_reset_{tanggal}"),
-                    InlineKeyboardButton("❌ Batal", callback_data="cancel_reset")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
             date_label = "hari ini" if is_today else f"tanggal {tanggal}"
             await update.message.reply_text(
                 f"⚠️ *KONFIRMASI RESET*\n\n"
@@ -716,7 +789,7 @@ Manual - POS     : {format_rupiah(summary['selisih'])} ({summary['selisih_persen
                 f"⚠️ Tindakan ini tidak dapat dibatalkan!\n"
                 f"💡 Rekap yang sudah tersimpan akan direvisi, bukan dihapus.\n\n"
                 f"Lanjutkan?",
-                reply_markup=reply_markup,
+                reply_markup=reset_confirm_keyboard(tanggal),
                 parse_mode='Markdown'
             )
 
@@ -724,402 +797,350 @@ Manual - POS     : {format_rupiah(summary['selisih'])} ({summary['selisih_persen
             logger.error(f"Error in reset_command: {e}")
             await update.message.reply_text("❌ Terjadi kesalahan")
 
-    async def callback_query_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler untuk inline button callback"""
-        query = update.callback_query
-        await query.answer()
+    def _build_callback_router(self) -> CallbackRouter:
+        """Daftarkan semua tombol inline ke router (exact match & prefix)"""
+        router = CallbackRouter()
+
+        # Reset & modal
+        router.prefix('reset_and_modal_', self._cb_reset_and_modal, fields=(int,))
+        router.exact('cancel_modal', self._cb_cancel_modal)
+        router.prefix('confirm_reset_', self._cb_confirm_reset, fields=(str,))
+        router.exact('cancel_reset', self._cb_cancel_reset)
+
+        # OCR & ledger
+        router.prefix('ocr_save_', self._cb_ocr_save, fields=(int,))
+        router.prefix('ocr_cancel_', self._cb_ocr_cancel, fields=(int,))
+        router.prefix('ledger_', self._cb_ledger_page, fields=(str, str, int))
+
+        # Menu (v2)
+        router.exact('menu_main', self._cb_menu_main)
+        router.exact('menu_input', self._cb_menu_input)
+        router.exact('menu_rekap', self._cb_menu_rekap)
+        router.exact('menu_koreksi', self._cb_menu_koreksi)
+        router.exact('menu_bantuan', self._cb_menu_bantuan)
+        router.exact('menu_close', self._cb_menu_close)
+        for input_type in INPUT_TYPE_NAMES:
+            router.exact(f'input_{input_type}', self._cb_input)
+
+        # Aksi
+        router.exact('action_fix_daily', self._cb_fix_daily, answer="✅ Rekap difinalisasi")
+        router.exact('action_edit', self._cb_action_edit)
+        router.exact('action_reset_today', self._cb_reset_today)
+        router.exact('action_reset_date', self._cb_reset_date)
+
+        # Rekap
+        router.exact('rekap_today', self._cb_rekap_today, answer="📊 Status hari ini")
+        router.exact('rekap_weekly', self._cb_rekap_weekly, answer="📅 Rekap mingguan")
+        router.exact('rekap_monthly', self._cb_rekap_monthly, answer="📆 Rekap bulanan")
+
+        return router
 
-        data = query.data
+    async def callback_query_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handler untuk inline button callback (dispatch via CallbackRouter)"""
+        await self.callback_router.dispatch(update, context)
 
-        # Handle reset dan modal baru
-        if data.startswith('reset_and_modal_'):
-            try:
-                amount = int(data.split('_')[3])
-                tanggal = datetime.now().strftime('%Y-%m-%d')
-                waktu = datetime.now().strftime('%H:%M:%S')
-
-                # Hapus semua transaksi hari ini
-                deleted_count = self.storage.delete_all_transactions_by_date(tanggal)
-
-                # Simpan modal baru
-                self.storage.add_transaction(
-                    tanggal=tanggal,
-                    waktu=waktu,
-                    tipe='modal',
-                    jumlah=amount,
-                    sumber='manual',
-                    keterangan='',
-                    chat_id=update.effective_chat.id,
-                    user_id=query.from_user.id,
-                    message_id=query.message.message_id
-                )
+    # ===== RESET & MODAL =====
 
-                await query.edit_message_text(
-                    f"✅ Reset berhasil!\n\n"
-                    f"🗑️ {deleted_count} transaksi lama dihapus\n"
-                    f"💰 Modal awal {format_rupiah(amount)} tersimpan\n"
-                    f"📅 Transaksi hari ini dimulai dari awal"
-                )
-                logger.info(f"Reset and new modal: {amount}, deleted: {deleted_count}")
+    async def _cb_reset_and_modal(self, update: Update, context: ContextTypes.DEFAULT_TYPE, amount: int):
+        """Reset transaksi hari ini lalu simpan modal baru"""
+        query = update.callback_query
+        tanggal = datetime.now().strftime('%Y-%m-%d')
+        waktu = datetime.now().strftime('%H:%M:%S')
+
+        # Hapus semua transaksi hari ini
+        deleted_count = self.storage.delete_all_transactions_by_date(tanggal)
+
+        # Simpan modal baru
+        self.storage.add_transaction(
+            tanggal=tanggal,
+            waktu=waktu,
+            tipe='modal',
+            jumlah=amount,
+            sumber='manual',
+            keterangan='',
+            chat_id=update.effective_chat.id,
+            user_id=query.from_user.id,
+            message_id=query.message.message_id
+        )
 
-            except Exception as e:
-                logger.error(f"Error in reset_and_modal: {e}")
-                await query.edit_message_text("❌ Terjadi kesalahan")
+        await query.edit_message_text(
+            f"✅ Reset berhasil!\n\n"
+            f"🗑️ {deleted_count} transaksi lama dihapus\n"
+            f"💰 Modal awal {format_rupiah(amount)} tersimpan\n"
+            f"📅 Transaksi hari ini dimulai dari awal"
+        )
+        logger.info(f"Reset and new modal: {amount}, deleted: {deleted_count}")
 
-        elif data == 'cancel_modal':
-            await query.edit_message_text("❌ Input modal dibatalkan")
+    async def _cb_cancel_modal(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text("❌ Input modal dibatalkan")
 
-        # Handle konfirmasi reset
-        elif data.startswith('confirm_reset_'):
-            try:
-                tanggal = data.split('_')[2]
-
-                # Check if there's an existing summary for this date
-                existing_summary = self.storage.get_latest_summary_by_date(tanggal)
-
-                # Delete all transactions
-                deleted_count = self.storage.delete_all_transactions_by_date(tanggal)
-
-                # If there was an existing summary, create a REVISED version
-                # This preserves the history that there was a reset
-                if existing_summary:
-                    # Calculate new summary (should be zeros or whatever is left)
-                    new_summary_data = self.logic.calculate_daily_summary(tanggal)
-                    self.storage.save_daily_summary(
-                        date=tanggal,
-                        state='REVISED',
-                        summary_data=new_summary_data,
-                        notes=f'Reset: {deleted_count} transaksi dihapus'
-                    )
-                    logger.info(f"Created REVISED summary for {tanggal} after reset")
-
-                await query.edit_message_text(
-                    f"✅ Reset berhasil!\n\n"
-                    f"🗑️ {deleted_count} transaksi telah dihapus\n"
-                    f"📅 {tanggal}\n"
-                    f"🔄 Rekap direvisi (tidak dihapus)\n\n"
-                    f"💡 Gunakan /modal untuk memulai transaksi baru"
-                )
-                logger.info(f"Manual reset: {tanggal}, deleted: {deleted_count}")
+    async def _cb_confirm_reset(self, update: Update, context: ContextTypes.DEFAULT_TYPE, tanggal: str):
+        """Hapus semua transaksi pada tanggal, rekap lama direvisi (tidak dihapus)"""
+        query = update.callback_query
 
-            except Exception as e:
-                logger.error(f"Error in confirm_reset: {e}")
-                await query.edit_message_text("❌ Terjadi kesalahan")
+        # Check if there's an existing summary for this date
+        existing_summary = self.storage.get_latest_summary_by_date(tanggal)
+
+        # Delete all transactions
+        deleted_count = self.storage.delete_all_transactions_by_date(tanggal)
+
+        # If there was an existing summary, create a REVISED version
+        # This preserves the history that there was a reset
+        if existing_summary:
+            # Calculate new summary (should be zeros or whatever is left)
+            new_summary_data = self.logic.calculate_daily_summary(tanggal)
+            self.scheduler.save_summary(
+                date=tanggal,
+                state='REVISED',
+                summary_data=new_summary_data,
+                notes=f'Reset: {deleted_count} transaksi dihapus'
+            )
+            logger.info(f"Created REVISED summary for {tanggal} after reset")
+
+        await query.edit_message_text(
+            f"✅ Reset berhasil!\n\n"
+            f"🗑️ {deleted_count} transaksi telah dihapus\n"
+            f"📅 {tanggal}\n"
+            f"🔄 Rekap direvisi (tidak dihapus)\n\n"
+            f"💡 Gunakan /modal untuk memulai transaksi baru"
+        )
+        logger.info(f"Manual reset: {tanggal}, deleted: {deleted_count}")
 
-        elif data == 'cancel_reset':
-            await query.edit_message_text("❌ Reset dibatalkan")
+    async def _cb_cancel_reset(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text("❌ Reset dibatalkan")
 
-        # Handle OCR save
-        elif data.startswith('ocr_save_'):
-            parts = data.split('_')
-            if len(parts) >= 4:
-                amount = int(parts[2])
-                original_msg_id = int(parts[3])
+    # ===== OCR & LEDGER =====
 
-                tanggal = datetime.now().strftime('%Y-%m-%d')
-                waktu = datetime.now().strftime('%H:%M:%S')
-
-                self.storage.add_transaction(
-                    tanggal=tanggal,
-                    waktu=waktu,
-                    tipe='tf',
-                    jumlah=amount,
-                    sumber='ocr',
-                    keterangan='Via OCR',
-                    chat_id=update.effective_chat.id,
-                    user_id=query.from_user.id,
-                    message_id=original_msg_id
-                )
+    async def _cb_ocr_save(self, update: Update, context: ContextTypes.DEFAULT_TYPE, pending_id: int):
+        """Simpan hasil OCR (dari ocr_pending) sebagai transaksi TF"""
+        query = update.callback_query
+        # Klaim atomik: tombol yang ditekan dua kali tidak menyimpan dua transaksi
+        pending = self.storage.claim_ocr_pending(pending_id, update.effective_chat.id, 'saved')
+        if pending is None:
+            await query.edit_message_text("⚠️ Hasil OCR ini sudah diproses")
+            return
+        original_msg_id, amount, cache_id, backend = pending
+
+        tanggal = datetime.now().strftime('%Y-%m-%d')
+        waktu = datetime.now().strftime('%H:%M:%S')
+
+        tx_id = self.storage.add_transaction(
+            tanggal=tanggal,
+            waktu=waktu,
+            tipe='tf',
+            jumlah=amount,
+            sumber=f"ocr_{backend}" if backend else 'ocr',
+            keterangan='Via OCR',
+            chat_id=update.effective_chat.id,
+            user_id=query.from_user.id,
+            message_id=original_msg_id
+        )
+        if cache_id is not None:
+            self.ocr_cache.link_transaction(cache_id, tx_id)
+
+        await query.edit_message_text(f"✅ Transfer {format_rupiah(amount)} dari OCR tersimpan")
+        logger.info(f"OCR transaction saved: {amount} (pending {pending_id})")
+
+    async def _cb_ocr_cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE, pending_id: int):
+        pending = self.storage.claim_ocr_pending(pending_id, update.effective_chat.id, 'cancelled')
+        if pending is not None:
+            _, _, cache_id, _ = pending
+            if cache_id is not None:
+                self.ocr_cache.discard(cache_id)
+        await update.callback_query.edit_message_text("❌ Transaksi OCR dibatalkan")
+        logger.info(f"OCR cancelled (pending {pending_id})")
+
+    def prune_ocr_pending(self) -> int:
+        """Buang baris ocr_pending lama (job harian). Returns: jumlah baris"""
+        now = datetime.now(timezone.utc)  # created_at = CURRENT_TIMESTAMP SQLite (UTC)
+        removed = self.storage.delete_ocr_pending(
+            before=(now - timedelta(days=OCR_PENDING_DONE_DAYS)).strftime('%Y-%m-%d %H:%M:%S'),
+            pending_before=(now - timedelta(days=OCR_PENDING_ABANDONED_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+        )
+        if removed:
+            logger.info(f"OCR pending pruned: {removed} rows")
+        return removed
 
-                await query.edit_message_text(f"✅ Transfer {format_rupiah(amount)} dari OCR tersimpan")
-                logger.info(f"OCR transaction saved: {amount}")
-
-        elif data.startswith('ocr_cancel_'):
-            await query.edit_message_text("❌ Transaksi OCR dibatalkan")
-            logger.info("OCR cancelled")
-
-        # ===== MENU HANDLERS (v2) =====
-        elif data == 'menu_input':
-            keyboard = [
-                [
-                    InlineKeyboardButton("💵 Cash", callback_data="input_cash"),
-                    InlineKeyboardButton("💳 Transfer", callback_data="input_tf")
-                ],
-                [
-                    InlineKeyboardButton("📤 Pengeluaran", callback_data="input_keluar"),
-                    InlineKeyboardButton("💰 Modal", callback_data="input_modal")
-                ],
-                [
-                    InlineKeyboardButton("🖥️ Total POS", callback_data="input_pos"),
-                    InlineKeyboardButton("🏠 Menu Utama", callback_data="menu_main")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(
-                "➕ *Input Transaksi*\n\nPilih jenis transaksi:",
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
+    async def _cb_ledger_page(self, update: Update, context: ContextTypes.DEFAULT_TYPE,
+                              start_date: str, end_date: str, page: int):
+        message, reply_markup = self._render_ledger_page(start_date, end_date, page)
+        await update.callback_query.edit_message_text(message, reply_markup=reply_markup)
 
-        elif data == 'menu_rekap':
-            keyboard = [
-                [InlineKeyboardButton("📊 Status Hari Ini", callback_data="rekap_today")],
-                [InlineKeyboardButton("✅ Finalisasi Rekap Hari Ini", callback_data="action_fix_daily")],
-                [InlineKeyboardButton("📅 Rekap Mingguan", callback_data="rekap_weekly")],
-                [InlineKeyboardButton("📆 Rekap Bulanan", callback_data="rekap_monthly")],
-                [InlineKeyboardButton("🏠 Menu Utama", callback_data="menu_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(
-                "📊 *Rekap & Laporan*\n\nPilih jenis laporan:",
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
+    # ===== MENU HANDLERS (v2) =====
 
-        elif data == 'menu_koreksi':
-            keyboard = [
-                [InlineKeyboardButton("✏️ Edit Transaksi", callback_data="action_edit")],
-                [InlineKeyboardButton("🧹 Reset Hari Ini", callback_data="action_reset_today")],
-                [InlineKeyboardButton("📅 Reset Tanggal Lain", callback_data="action_reset_date")],
-                [InlineKeyboardButton("🏠 Menu Utama", callback_data="menu_main")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(
-                "✏️ *Koreksi & Reset*\n\nPilih aksi:",
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
+    async def _cb_menu_main(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        # Call menu_command logic directly
+        await self.menu_command(update, context)
 
-        elif data == 'menu_bantuan':
-            help_text = """
-❓ *Bantuan Singkat*
+    async def _cb_menu_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text(
+            "➕ *Input Transaksi*\n\nPilih jenis transaksi:",
+            reply_markup=INPUT_MENU_KEYBOARD,
+            parse_mode='Markdown'
+        )
 
-• `/modal 500k` - Modal awal
-• `/cash 1jt` - Cash akhir
-• `/tf 200k` - Transfer masuk
-• `/keluar 50k beli bensin` - Pengeluaran
+    async def _cb_menu_rekap(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text(
+            "📊 *Rekap & Laporan*\n\nPilih jenis laporan:",
+            reply_markup=REKAP_MENU_KEYBOARD,
+            parse_mode='Markdown'
+        )
 
-_Ketik /help untuk panduan lengkap._
-"""
-            keyboard = [[InlineKeyboardButton("🏠 Menu Utama", callback_data="menu_main")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(help_text, reply_markup=reply_markup, parse_mode='Markdown')
+    async def _cb_menu_koreksi(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text(
+            "✏️ *Koreksi & Reset*\n\nPilih aksi:",
+            reply_markup=KOREKSI_MENU_KEYBOARD,
+            parse_mode='Markdown'
+        )
 
-        elif data == 'menu_main':
-            # Call menu_command logic directly
-            await self.menu_command(update, context)
+    async def _cb_menu_bantuan(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text(
+            BANTUAN_SINGKAT_TEXT, reply_markup=BACK_TO_MAIN_KEYBOARD, parse_mode='Markdown'
+        )
 
-        elif data == 'menu_close':
-            await query.edit_message_text("✅ Menu ditutup")
+    async def _cb_menu_close(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text("✅ Menu ditutup")
 
-        # ===== INPUT VIA BUTTON (STATE MACHINE) =====
-        elif data.startswith('input_'):
-            input_type = data.replace('input_', '')
-            type_names = {
-                'cash': ('Cash Akhir', '/cash'),
-                'tf': ('Transfer/QRIS', '/tf'),
-                'keluar': ('Pengeluaran', '/keluar'),
-                'modal': ('Modal Awal', '/modal'),
-                'pos': ('Total POS', '/totalpos')
-            }
-            name, cmd = type_names.get(input_type, ('Transaksi', ''))
+    # ===== INPUT VIA BUTTON (STATE MACHINE) =====
 
-            # Set state for text handler
-            context.user_data['pending_input'] = input_type
+    async def _cb_input(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        input_type = query.data.replace('input_', '')
+        name, cmd = INPUT_TYPE_NAMES[input_type]
+
+        # Set state for text handler
+        context.user_data['pending_input'] = input_type
+
+        await query.edit_message_text(
+            f"💰 *Input {name}*\n\n"
+            f"Ketik nominal:\n"
+            f"_Contoh: 850k atau 2jt + 500rb_\n\n"
+            f"Atau gunakan command: `{cmd} <jumlah>`",
+            reply_markup=BACK_TO_INPUT_KEYBOARD,
+            parse_mode='Markdown'
+        )
 
-            keyboard = [[InlineKeyboardButton("🔙 Kembali", callback_data="menu_input")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+    # ===== ACTION HANDLERS =====
 
-            await query.edit_message_text(
-                f"💰 *Input {name}*\n\n"
-                f"Ketik nominal:\n"
-                f"_Contoh: 850k atau 2jt + 500rb_\n\n"
-                f"Atau gunakan command: `{cmd} <jumlah>`",
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
+    async def _cb_fix_daily(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        tanggal = datetime.now().strftime('%Y-%m-%d')
 
-        # ===== ACTION HANDLERS =====
-        elif data == 'action_fix_daily':
-             tanggal = datetime.now().strftime('%Y-%m-%d')
-
-             # Calculate and save as FINAL
-             summary = self.logic.calculate_daily_summary(tanggal)
-             self.storage.save_daily_summary(
-                 date=tanggal,
-                 state='FINAL',
-                 summary_data=summary,
-                 notes='Manual Finalization via Menu'
-             )
-
-             await query.answer("✅ Rekap harian difinalisasi!")
-             await query.edit_message_text(
-                 f"✅ *Rekap Harian Final*\n"
-                 f"📅 {tanggal}\n\n"
-                 f"Data telah disimpan sebagai FINAL dan akan masuk perhitungan mingguan/bulanan.",
-                 reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Kembali", callback_data="menu_rekap")]])
-             )
-
-        elif data == 'action_edit':
-            keyboard = [[InlineKeyboardButton("🔙 Kembali", callback_data="menu_koreksi")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(
-                "✏️ *Edit Transaksi*\n\n"
-                "Gunakan command:\n"
-                "• `/edit` - lihat daftar transaksi\n"
-                "• `/edit <ID> hapus` - hapus\n"
-                "• `/edit <ID> <nominal>` - ubah nominal",
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
+        # Calculate and save as FINAL
+        summary = self.logic.calculate_daily_summary(tanggal)
+        self.scheduler.save_summary(
+            date=tanggal,
+            state='FINAL',
+            summary_data=summary,
+            notes='Manual Finalization via Menu'
+        )
+        await self.scheduler.process_final(tanggal, summary)
 
-        elif data == 'action_reset_today':
-            tanggal = datetime.now().strftime('%Y-%m-%d')
-            transactions = self.storage.get_transactions_by_date(tanggal)
+        await update.callback_query.edit_message_text(
+            f"✅ *Rekap Harian Final*\n"
+            f"📅 {tanggal}\n\n"
+            f"Data telah disimpan sebagai FINAL dan akan masuk perhitungan mingguan/bulanan.",
+            reply_markup=BACK_TO_REKAP_KEYBOARD
+        )
 
-            if not transactions:
-                await query.edit_message_text(
-                    "📭 Belum ada transaksi hari ini",
-                    reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Kembali", callback_data="menu_koreksi")]])
-                )
-                return
+    async def _cb_action_edit(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text(
+            "✏️ *Edit Transaksi*\n\n"
+            "Gunakan command:\n"
+            "• `/edit` - lihat daftar transaksi\n"
+            "• `/edit <ID> hapus` - hapus\n"
+            "• `/edit <ID> <nominal>` - ubah nominal",
+            reply_markup=BACK_TO_KOREKSI_KEYBOARD,
+            parse_mode='Markdown'
+        )
 
-            count = len(transactions)
-            keyboard = [
-                [
-                    InlineKeyboardButton("✅ Ya, Reset", callback_data=f"confirm_reset_{tanggal}"),
-                    InlineKeyboardButton("❌ Batal", callback_data="menu_koreksi")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(
-                f"⚠️ *KONFIRMASI RESET*\n\n"
-                f"Hapus *{count} transaksi* hari ini ({tanggal})?\n\n"
-                f"⚠️ Tindakan ini tidak dapat dibatalkan!",
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
+    async def _cb_reset_today(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        tanggal = datetime.now().strftime('%Y-%m-%d')
+        transactions = self.storage.get_transactions_by_date(tanggal)
 
-        elif data == 'action_reset_date':
-            keyboard = [[InlineKeyboardButton("🔙 Kembali", callback_data="menu_koreksi")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+        if not transactions:
             await query.edit_message_text(
-                "📅 *Reset Tanggal Lain*\n\n"
-                "Gunakan command:\n"
-                "`/reset YYYY-MM-DD`\n\n"
-                "Contoh: `/reset 2025-12-11`",
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
+                "📭 Belum ada transaksi hari ini",
+                reply_markup=BACK_TO_KOREKSI_KEYBOARD
             )
+            return
+
+        count = len(transactions)
+        await query.edit_message_text(
+            f"⚠️ *KONFIRMASI RESET*\n\n"
+            f"Hapus *{count} transaksi* hari ini ({tanggal})?\n\n"
+            f"⚠️ Tindakan ini tidak dapat dibatalkan!",
+            reply_markup=reset_confirm_keyboard(tanggal, 'menu_koreksi'),
+            parse_mode='Markdown'
+        )
 
-        # ===== REKAP HANDLERS =====
-        elif data == 'rekap_today':
-            await query.answer("📊 Menampilkan status...")
-            # Send status as new message
-            tanggal = datetime.now().strftime('%Y-%m-%d')
-            summary = self.logic.calculate_daily_summary(tanggal)
+    async def _cb_reset_date(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        await update.callback_query.edit_message_text(
+            "📅 *Reset Tanggal Lain*\n\n"
+            "Gunakan command:\n"
+            "`/reset <tanggal>`\n\n"
+            "Contoh: `/reset kemarin`, `/reset senin lalu`, `/reset 2025-12-11`",
+            reply_markup=BACK_TO_KOREKSI_KEYBOARD,
+            parse_mode='Markdown'
+        )
 
-            message = f"""
-📊 *Status Hari Ini*
-📅 {tanggal}
+    # ===== REKAP HANDLERS =====
 
-💰 Modal: {format_rupiah(summary['modal'])}
-💵 Cash: {format_rupiah(summary['cash_akhir'])}
-💳 TF: {format_rupiah(summary['total_tf'])} ({summary['count_tf']}x)
-📤 Keluar: {format_rupiah(summary['total_pengeluaran'])} ({summary['count_pengeluaran']}x)
-📈 Omzet: {format_rupiah(summary['omzet_manual'])}
-🖥️ POS: {format_rupiah(summary['pos_total'])}
-📊 Selisih: {format_rupiah(summary['selisih'])}
+    async def _cb_rekap_today(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        tanggal = datetime.now().strftime('%Y-%m-%d')
+        summary = self.logic.calculate_daily_summary(tanggal)
 
-{summary['status_icon']} {summary['status_text']}
-"""
-            # Add Back button
-            keyboard = [[InlineKeyboardButton("🔙 Kembali", callback_data="menu_rekap")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(message, reply_markup=reply_markup, parse_mode='Markdown')
+        await update.callback_query.edit_message_text(
+            render_status_singkat(tanggal, summary),
+            reply_markup=BACK_TO_REKAP_KEYBOARD,
+            parse_mode='Markdown'
+        )
 
-        elif data == 'rekap_weekly':
-            await query.answer("📅 Menghitung rekap mingguan...")
-            # await query.edit_message_text("⏳ Memuat rekap mingguan...")
-            # (removed edit text to avoid flicker if fast)
+    async def _cb_rekap_weekly(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=6)
 
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=6)
+        rekap = self.logic.calculate_weekly_summary(
+            start_date.strftime('%Y-%m-%d'),
+            end_date.strftime('%Y-%m-%d')
+        )
 
-            summaries = self.storage.get_summaries_range(
-                start_date.strftime('%Y-%m-%d'),
-                end_date.strftime('%Y-%m-%d')
+        if not rekap['days']:
+            await query.edit_message_text(
+                "📭 *Rekap Mingguan*\n\n"
+                "Belum ada data rekap tersimpan.\n"
+                "Rekap otomatis dibuat jam 23:00 (DRAFT) dan 02:00 (FINAL).",
+                reply_markup=BACK_TO_REKAP_KEYBOARD,
+                parse_mode='Markdown'
             )
+            return
 
-            keyboard = [[InlineKeyboardButton("🔙 Kembali", callback_data="menu_rekap")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            if not summaries:
-                await query.edit_message_text(
-                    "📭 *Rekap Mingguan*\n\n"
-                    "Belum ada data rekap tersimpan.\n"
-                    "Rekap otomatis dibuat jam 23:00 (DRAFT) dan 02:00 (FINAL).",
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-                return
-
-            total_omzet = sum(s[13] for s in summaries)  # omzet_manual index
-            total_tf = sum(s[6] for s in summaries)  # total_tf index
-            total_keluar = sum(s[8] for s in summaries)  # total_pengeluaran index
-
-            message = f"""
-📅 *Rekap Mingguan*
-{start_date.strftime('%d/%m')} - {end_date.strftime('%d/%m/%Y')}
-
-📈 Total Omzet: {format_rupiah(total_omzet)}
-💳 Total TF: {format_rupiah(total_tf)}
-📤 Total Keluar: {format_rupiah(total_keluar)}
-📊 Hari Tercatat: {len(summaries)} hari
+        message = render_rekap_mingguan_singkat(
+            f"{start_date.strftime('%d/%m')} - {end_date.strftime('%d/%m/%Y')}",
+            rekap,
+            self._format_forecast_week(end_date)
+        )
+        await query.edit_message_text(message, reply_markup=BACK_TO_REKAP_KEYBOARD, parse_mode='Markdown')
 
-_Gunakan /mingguan untuk detail_
-"""
-            await query.edit_message_text(message, reply_markup=reply_markup, parse_mode='Markdown')
+    async def _cb_rekap_monthly(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        now = datetime.now()
 
-        elif data == 'rekap_monthly':
-            await query.answer("📆 Menghitung rekap bulanan...")
-            now = datetime.now()
-            start_date = now.replace(day=1)
+        rekap = self.logic.calculate_monthly_summary(now.year, now.month)
 
-            summaries = self.storage.get_summaries_range(
-                start_date.strftime('%Y-%m-%d'),
-                now.strftime('%Y-%m-%d')
+        if not rekap['days']:
+            await query.edit_message_text(
+                "📭 *Rekap Bulanan*\n\n"
+                "Belum ada data rekap tersimpan bulan ini.\n"
+                "Rekap otomatis dibuat jam 23:00 (DRAFT) dan 02:00 (FINAL).",
+                reply_markup=BACK_TO_REKAP_KEYBOARD,
+                parse_mode='Markdown'
             )
+            return
 
-            keyboard = [[InlineKeyboardButton("🔙 Kembali", callback_data="menu_rekap")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            if not summaries:
-                await query.edit_message_text(
-                    "📭 *Rekap Bulanan*\n\n"
-                    "Belum ada data rekap tersimpan bulan ini.\n"
-                    "Rekap otomatis dibuat jam 23:00 (DRAFT) dan 02:00 (FINAL).",
-                    reply_markup=reply_markup,
-                    parse_mode='Markdown'
-                )
-                return
-
-            total_omzet = sum(s[13] for s in summaries)
-            total_tf = sum(s[6] for s in summaries)
-            total_keluar = sum(s[8] for s in summaries)
-
-            message = f"""
-📆 *Rekap Bulanan*
-{start_date.strftime('%B %Y')}
-
-📈 Total Omzet: {format_rupiah(total_omzet)}
-💳 Total TF: {format_rupiah(total_tf)}
-📤 Total Keluar: {format_rupiah(total_keluar)}
-📊 Hari Tercatat: {len(summaries)} hari
-
-_Gunakan /bulanan untuk detail_
-"""
-            await query.edit_message_text(message, reply_markup=reply_markup, parse_mode='Markdown')
+        message = render_rekap_bulanan_singkat(now, rekap)
+        await query.edit_message_text(message, reply_markup=BACK_TO_REKAP_KEYBOARD, parse_mode='Markdown')
 
     # ===== NEW COMMAND HANDLERS (v2) =====
 
@@ -1130,28 +1151,12 @@ _Gunakan /bulanan untuk detail_
 
     async def menu_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handler untuk /menu - menampilkan menu utama"""
-        keyboard = [
-            [InlineKeyboardButton("➕ Input Transaksi", callback_data="menu_input")],
-            [InlineKeyboardButton("📊 Rekap & Laporan", callback_data="menu_rekap")],
-            [InlineKeyboardButton("✏️ Koreksi & Reset", callback_data="menu_koreksi")],
-            [InlineKeyboardButton("❓ Bantuan", callback_data="menu_bantuan")],
-            [InlineKeyboardButton("❌ Tutup Menu", callback_data="menu_close")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
         # Bisa dipanggil dari /start, /menu, atau callback "menu_main"
-        msg_text = (
-            "🏪 *Asisten Keuangan Anisa Store v2*\n\n"
-            "Selamat datang! Silakan pilih menu di bawah ini.\n\n"
-            "💡 _Tip: Ketik /help untuk daftar lengkap perintah_"
-        )
-
         if update.message:
-            await update.message.reply_text(msg_text, reply_markup=reply_markup, parse_mode='Markdown')
+            await update.message.reply_text(MAIN_MENU_TEXT, reply_markup=MAIN_MENU_KEYBOARD, parse_mode='Markdown')
         elif update.callback_query:
             # Jika dari callback "menu_main"
-            await update.callback_query.edit_message_text(msg_text, reply_markup=reply_markup, parse_mode='Markdown')
-
+            await update.callback_query.edit_message_text(MAIN_MENU_TEXT, reply_markup=MAIN_MENU_KEYBOARD, parse_mode='Markdown')
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handler untuk /help - menampilkan bantuan teks lengkap"""
@@ -1171,11 +1176,22 @@ _Gunakan /bulanan untuk detail_
 
 *3️⃣ Laporan & Koreksi*
 • `/status` - Lihat rekap hari ini
-• `/mingguan` - Lihat rekap 7 hari terakhir
-• `/bulanan` - Lihat rekap bulan ini
-• `/lihat` - Daftar transaksi hari ini
+• `/mingguan [periode]` - Lihat rekap 7 hari terakhir
+• `/bulanan [bulan]` - Lihat rekap bulan ini
+• `/rekap <dari> <sampai>` - Rekap periode bebas
+• `/ledger [tanggal]` - Buku kas dengan saldo berjalan
+• `/jam [dari] [sampai]` - TF & pengeluaran per jam
+• `/lihat [tanggal]` - Daftar transaksi hari ini
+• `/live [off]` - Status hari ini di-pin, update otomatis
+• `/metrik` - Antrean & waktu proses bot
 • `/edit` - Hapus/ubah transaksi
 • `/reset` - Hapus semua transaksi hari ini (bisa pilih tanggal)
+• Tanggal bisa ditulis: `kemarin`, `senin lalu`, `1 des`, `minggu lalu`, `bulan ini`
+
+*Input Batch (satu pesan, banyak baris)*
+`tf 50k`
+`keluar 20rb es batu`
+`pos 2.3jt`
 
 *4️⃣ Fitur Otomatis*
 • 📸 Kirim foto bukti transfer untuk OCR
@@ -1184,16 +1200,27 @@ _Gunakan /bulanan untuk detail_
 
 _Gunakan tombol di bawah untuk navigasi cepat_
 """
-        keyboard = [[InlineKeyboardButton("🏠 Menu Utama", callback_data="menu_main")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.message.reply_text(help_text, reply_markup=reply_markup, parse_mode='Markdown')
+        await update.message.reply_text(help_text, reply_markup=BACK_TO_MAIN_KEYBOARD, parse_mode='Markdown')
 
     async def mingguan_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler untuk /mingguan - rekap 7 hari terakhir"""
+        """Handler untuk /mingguan [periode] - rekap 7 hari terakhir atau periode tertentu"""
         try:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=6)
 
+            if context.args:
+                try:
+                    start_str, end_str = parse_date_range(' '.join(context.args))
+                except ValueError as e:
+                    await update.message.reply_text(f"❌ {str(e)}")
+                    return
+                end_date = datetime.strptime(end_str, '%Y-%m-%d')
+                if start_str == end_str:
+                    # Satu tanggal → 7 hari yang berakhir di tanggal tersebut
+                    start_date = end_date - timedelta(days=6)
+                else:
+                    start_date = datetime.strptime(start_str, '%Y-%m-%d')
+
             summaries = self.storage.get_summaries_range(
                 start_date.strftime('%Y-%m-%d'),
                 end_date.strftime('%Y-%m-%d')
@@ -1202,7 +1229,7 @@ _Gunakan tombol di bawah untuk navigasi cepat_
             if not summaries:
                 await update.message.reply_text(
                     "📭 *Rekap Mingguan*\n\n"
-                    "Belum ada data rekap tersimpan dalam 7 hari terakhir.\n\n"
+                    f"Belum ada data rekap tersimpan untuk {format_tanggal_singkat(start_date, with_year=False)} - {format_tanggal_singkat(end_date)}.\n\n"
                     "💡 Rekap otomatis dibuat:\n"
                     "• Jam 23:00 → DRAFT\n"
                     "• Jam 02:00 → FINAL",
@@ -1210,29 +1237,35 @@ _Gunakan tombol di bawah untuk navigasi cepat_
                 )
                 return
 
-            # Calculate totals
-            total_omzet = sum(s[13] for s in summaries)  # omzet_manual
-            total_tf = sum(s[6] for s in summaries)      # total_tf
-            total_keluar = sum(s[8] for s in summaries)  # total_pengeluaran
-            total_pos = sum(s[10] for s in summaries)    # pos_total
+            # Totals dihitung dari rollup / agregat SQL, bukan dijumlah per baris
+            rekap = self.logic.calculate_weekly_summary(
+                start_date.strftime('%Y-%m-%d'),
+                end_date.strftime('%Y-%m-%d')
+            )
 
             message = f"""
 📅 *REKAP MINGGUAN*
-{start_date.strftime('%d %b')} - {end_date.strftime('%d %b %Y')}
+{format_tanggal_singkat(start_date, with_year=False)} - {format_tanggal_singkat(end_date)}
 
 ━━━━━━━━━━━━━━━━━━━━━━━━
 📊 RINGKASAN
 ━━━━━━━━━━━━━━━━━━━━━━━━
-📈 Total Omzet Manual: {format_rupiah(total_omzet)}
-🖥️ Total Omzet POS: {format_rupiah(total_pos)}
-💳 Total Transfer: {format_rupiah(total_tf)}
-📤 Total Pengeluaran: {format_rupiah(total_keluar)}
-📊 Rata-rata/hari: {format_rupiah(total_omzet // len(summaries) if summaries else 0)}
-
+📈 Total Omzet Manual: {format_rupiah(rekap['total_omzet'])}
+🖥️ Total Omzet POS: {format_rupiah(rekap['total_pos'])}
+💳 Total Transfer: {format_rupiah(rekap['total_tf'])}
+📤 Total Pengeluaran: {format_rupiah(rekap['total_pengeluaran'])}
+📊 Rata-rata/hari: {format_rupiah(rekap['avg_omzet'])}
+{self._format_forecast_week(end_date)}
 ━━━━━━━━━━━━━━━━━━━━━━━━
 📋 DETAIL PER HARI
 ━━━━━━━━━━━━━━━━━━━━━━━━
 """
+            anomalies = self._get_anomalies_for_summaries(
+                summaries,
+                start_date.strftime('%Y-%m-%d'),
+                end_date.strftime('%Y-%m-%d')
+            )
+
             for s in summaries:
                 date = s[1]
                 state = s[3]
@@ -1242,11 +1275,21 @@ _Gunakan tombol di bawah untuk navigasi cepat_
 
                 state_label = {'DRAFT': '📝', 'FINAL': '✅', 'REVISED': '🔄'}.get(state, '❓')
                 v_label = f"v{version}" if version > 1 else ""
+                anomaly_label = " 🔎" if anomalies.get(date) else ""
 
-                message += f"{date}: {format_rupiah(omzet)} {status_icon} {state_label}{v_label}\n"
+                message += f"{date}: {format_rupiah(omzet)} {status_icon} {state_label}{v_label}{anomaly_label}\n"
 
             message += f"\n📊 Data: {len(summaries)} hari tercatat"
 
+            if anomalies:
+                message += "\n\n━━━━━━━━━━━━━━━━━━━━━━━━\n"
+                message += "🔎 HARI TIDAK BIASA\n"
+                message += "━━━━━━━━━━━━━━━━━━━━━━━━\n"
+                for date, flags in anomalies.items():
+                    message += f"{date}:\n"
+                    for flag in flags:
+                        message += f"  {AnomalyDetector.format_flag(flag)}\n"
+
             await update.message.reply_text(message, parse_mode='Markdown')
 
         except Exception as e:
@@ -1254,20 +1297,29 @@ _Gunakan tombol di bawah untuk navigasi cepat_
             await update.message.reply_text("❌ Terjadi kesalahan")
 
     async def bulanan_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler untuk /bulanan - rekap bulan ini"""
+        """Handler untuk /bulanan [bulan] - rekap bulan ini atau bulan tertentu"""
         try:
             now = datetime.now()
+            if context.args:
+                try:
+                    start_str, end_str = parse_date_range(' '.join(context.args))
+                except ValueError as e:
+                    await update.message.reply_text(f"❌ {str(e)}")
+                    return
+                # Bulan diambil dari tanggal awal; periode dipotong di hari ini
+                month_start = datetime.strptime(start_str, '%Y-%m-%d').replace(day=1)
+                month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+                now = min(month_end, now)
+                if now < month_start:
+                    now = month_end
             start_date = now.replace(day=1)
 
-            summaries = self.storage.get_summaries_range(
-                start_date.strftime('%Y-%m-%d'),
-                now.strftime('%Y-%m-%d')
-            )
+            rekap = self.logic.calculate_monthly_summary(now.year, now.month)
 
-            if not summaries:
+            if not rekap['days']:
                 await update.message.reply_text(
-                    f"📭 *Rekap Bulanan - {now.strftime('%B %Y')}*\n\n"
-                    "Belum ada data rekap tersimpan bulan ini.\n\n"
+                    f"📭 *Rekap Bulanan - {format_bulan(now)}*\n\n"
+                    "Belum ada data rekap tersimpan untuk bulan tersebut.\n\n"
                     "💡 Rekap otomatis dibuat:\n"
                     "• Jam 23:00 → DRAFT\n"
                     "• Jam 02:00 → FINAL",
@@ -1275,30 +1327,24 @@ _Gunakan tombol di bawah untuk navigasi cepat_
                 )
                 return
 
-            # Calculate totals
-            total_omzet = sum(s[13] for s in summaries)
-            total_tf = sum(s[6] for s in summaries)
-            total_keluar = sum(s[8] for s in summaries)
-            total_pos = sum(s[10] for s in summaries)
-
             message = f"""
 📆 *REKAP BULANAN*
-{now.strftime('%B %Y')}
+{format_bulan(now)}
 
 ━━━━━━━━━━━━━━━━━━━━━━━━
 📊 RINGKASAN
 ━━━━━━━━━━━━━━━━━━━━━━━━
-📈 Total Omzet Manual: {format_rupiah(total_omzet)}
-🖥️ Total Omzet POS: {format_rupiah(total_pos)}
-💳 Total Transfer: {format_rupiah(total_tf)}
-📤 Total Pengeluaran: {format_rupiah(total_keluar)}
-📊 Rata-rata/hari: {format_rupiah(total_omzet // len(summaries) if summaries else 0)}
+📈 Total Omzet Manual: {format_rupiah(rekap['total_omzet'])}
+🖥️ Total Omzet POS: {format_rupiah(rekap['total_pos'])}
+💳 Total Transfer: {format_rupiah(rekap['total_tf'])}
+📤 Total Pengeluaran: {format_rupiah(rekap['total_pengeluaran'])}
+📊 Rata-rata/hari: {format_rupiah(rekap['avg_omzet'])}
 
 ━━━━━━━━━━━━━━━━━━━━━━━━
 📋 DATA
 ━━━━━━━━━━━━━━━━━━━━━━━━
-📊 Hari Tercatat: {len(summaries)} hari
-📅 Periode: {start_date.strftime('%d %b')} - {now.strftime('%d %b %Y')}
+📊 Hari Tercatat: {rekap['days']} hari
+📅 Periode: {format_tanggal_singkat(start_date, with_year=False)} - {format_tanggal_singkat(now)}
 """
 
             await update.message.reply_text(message, parse_mode='Markdown')
@@ -1307,8 +1353,351 @@ _Gunakan tombol di bawah untuk navigasi cepat_
             logger.error(f"Error in bulanan_command: {e}")
             await update.message.reply_text("❌ Terjadi kesalahan")
 
+    LEDGER_PAGE_SIZE = 15
+
+    async def ledger_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handler untuk /ledger [tanggal] [sampai] - buku kas dengan saldo berjalan"""
+        try:
+            today = datetime.now().strftime('%Y-%m-%d')
+            try:
+                start_date, end_date = self._parse_period_args(context.args, today)
+            except ValueError as e:
+                await update.message.reply_text(f"❌ {str(e)}")
+                return
+
+            message, reply_markup = self._render_ledger_page(start_date, end_date, 0)
+            await update.message.reply_text(message, reply_markup=reply_markup)
+
+        except Exception as e:
+            logger.error(f"Error in ledger_command: {e}")
+            await update.message.reply_text("❌ Terjadi kesalahan")
+
+    def _render_ledger_page(self, start_date: str, end_date: str, page: int):
+        """Render satu halaman ledger + tombol navigasi halaman"""
+        rows = self.storage.get_ledger(
+            start_date, end_date,
+            limit=self.LEDGER_PAGE_SIZE,
+            offset=page * self.LEDGER_PAGE_SIZE
+        )
+
+        period = start_date if start_date == end_date else f"{start_date} s/d {end_date}"
+        if not rows:
+            return f"📭 Belum ada transaksi kas untuk {period}", None
+
+        total_rows = rows[0][10]
+        total_pages = (total_rows + self.LEDGER_PAGE_SIZE - 1) // self.LEDGER_PAGE_SIZE
+
+        message = f"📒 BUKU KAS\n📅 {period}\n"
+
+        current_date = None
+        for tx_id, tanggal, waktu, tipe, jumlah, keterangan, laci, masuk, omzet_hari, omzet_kumulatif, _ in rows:
+            if tanggal != current_date:
+                current_date = tanggal
+                message += f"\n━━━━━━━━━━━━━━━━━━━━━━━━\n📅 {tanggal}\n━━━━━━━━━━━━━━━━━━━━━━━━\n"
+
+            sign = '-' if tipe == 'keluar' else ''
+            line = f"[{waktu[:5]}] {TIPE_EMOJI.get(tipe, '📝')} {tipe.upper()} {sign}{format_rupiah(jumlah)}"
+            if keterangan:
+                line += f" ({keterangan})"
+            line += f"\n   🗄️ Laci: {format_rupiah(laci)}"
+            if masuk:
+                line += f" │ ➕ {format_rupiah(masuk)}"
+            line += f"\n   📈 Omzet hari: {format_rupiah(omzet_hari)}"
+            if start_date != end_date:
+                line += f" │ Σ {format_rupiah(omzet_kumulatif)}"
+            message += line + "\n"
+
+        message += f"\n📄 Halaman {page + 1}/{total_pages} ({total_rows} transaksi)"
+
+        return message, ledger_nav_keyboard(start_date, end_date, page, total_pages)
+
+    async def jam_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handler untuk /jam [dari] [sampai] - analitik TF & pengeluaran per jam"""
+        try:
+            today = datetime.now().strftime('%Y-%m-%d')
+            try:
+                start_date, end_date = self._parse_period_args(context.args, today)
+            except ValueError as e:
+                await update.message.reply_text(f"❌ {str(e)}")
+                return
+
+            bucket = self.config.JAM_BUCKET_MENIT
+            rows = self.storage.get_time_buckets(start_date, end_date, bucket)
+            period = start_date if start_date == end_date else f"{start_date} s/d {end_date}"
+
+            if not rows:
+                await update.message.reply_text(f"📭 Belum ada TF/pengeluaran untuk {period}")
+                return
+
+            days = max(self.storage.count_active_days(start_date, end_date), 1)
+
+            # slot -> {tipe: (count, total)}
+            slots = {}
+            for slot, tipe, count, total in rows:
+                slots.setdefault(slot, {})[tipe] = (count, total)
+
+            max_tf = max((v.get('tf', (0, 0))[1] for v in slots.values()), default=0)
+            peak_slot = max(slots, key=lambda k: slots[k].get('tf', (0, 0))[1])
+
+            def slot_label(minute: int) -> str:
+                end_minute = minute + bucket
+                return f"{minute // 60:02d}:{minute % 60:02d}-{end_minute // 60 % 24:02d}:{end_minute % 60:02d}"
+
+            message = f"⏰ ANALITIK PER JAM\n📅 {period}"
+            if days > 1:
+                message += f" ({days} hari, rata-rata/hari)"
+            message += "\n\n"
+
+            for slot, values in slots.items():
+                tf_count, tf_total = values.get('tf', (0, 0))
+                kel_count, kel_total = values.get('keluar', (0, 0))
+                bar = '▇' * round(tf_total / max_tf * 10) if max_tf else ''
+
+                line = f"{slot_label(slot)} {bar}\n"
+                if tf_count:
+                    line += f"   💳 {tf_count / days:.1f}x {format_rupiah(tf_total / days)}"
+                if kel_count:
+                    line += f"   📤 {kel_count / days:.1f}x {format_rupiah(kel_total / days)}"
+                message += line + "\n"
+
+            if max_tf:
+                message += f"\n🔥 Jam tersibuk TF/QRIS: {slot_label(peak_slot)}"
+
+            await update.message.reply_text(message)
+            logger.info(f"Jam requested: {period}, bucket={bucket}")
+
+        except Exception as e:
+            logger.error(f"Error in jam_command: {e}")
+            await update.message.reply_text("❌ Terjadi kesalahan")
+
+    def metrics_snapshot(self) -> dict:
+        """Semua metrik dalam satu dict (untuk GET /metrics di mode webhook)"""
+        return {
+            'updates': self.update_metrics.snapshot(),
+            'outbox': {**self.outbox.stats, 'wait_time': self.outbox.wait_time.snapshot()},
+            'live_status': dict(self.live_status.stats),
+            'callbacks': self.callback_router.stats(),
+            'ocr': self.ocr_queue.snapshot(),
+            'ocr_cache': self.ocr_cache.snapshot(),
+            'ocr_backend': self.ocr.snapshot(),
+        }
+
+    async def metrik_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handler untuk /metrik - antrean & waktu proses update bot"""
+        try:
+            snap = self.update_metrics.snapshot()
+            message = f"""
+📈 *METRIK BOT*
+
+⏳ Antre: `{LatencyStats.format_ms(snap['queue_delay'])}`
+⚙️ Proses: `{LatencyStats.format_ms(snap['handle_time'])}`
+
+🔄 Sedang diproses: {snap['in_flight']} (puncak {snap['peak_in_flight']}, batas {self.config.MAX_CONCURRENT_UPDATES})
+🕒 Menunggu: {snap['waiting']}
+⏱️ Uptime: {format_uptime(snap['uptime'])}
+"""
+            outbox = self.outbox.stats
+            message += (
+                f"📤 Kirim: {outbox['sent']} pesan, {outbox['coalesced']} edit digabung, "
+                f"{outbox['retry_after']}x kena limit\n"
+                f"⏳ Antre kirim: `{LatencyStats.format_ms(self.outbox.wait_time.snapshot())}`\n"
+            )
+            live = self.live_status.stats
+            message += (
+                f"📌 Status live: {live['edits']} edit, {live['skipped']} dilewati, "
+                f"{live['notified']} perubahan\n"
+            )
+            ocr = self.ocr_queue
+            cache = self.ocr_cache.stats
+            message += (
+                f"🧾 OCR: {ocr.depth} antre, {ocr.running}/{ocr.workers} diproses, "
+                f"{ocr.stats['rejected']}x penuh\n"
+                f"⏳ Antre OCR: `{LatencyStats.format_ms(ocr.wait_time.snapshot())}`\n"
+                f"⚙️ Proses OCR: `{LatencyStats.format_ms(ocr.service_time.snapshot())}`\n"
+                f"🗂️ Cache OCR: {cache['hits_file'] + cache['hits_sha256']} hit, "
+                f"{cache['similar']} mirip, {cache['duplicates']} struk ganda dicegah\n"
+                f"🔎 Backend OCR: {self.ocr.name}, {self.ocr.stats['requests']} gambar, "
+                f"{self.ocr.stats['errors']} gagal\n"
+            )
+            if 'escalated' in self.ocr.stats:
+                message += (
+                    f"↗️ Cascade: {self.ocr.stats['local']} selesai lokal, "
+                    f"{self.ocr.stats['escalated']} diteruskan ke Gemini\n"
+                )
+            route_stats = sorted(
+                self.callback_router.stats().items(),
+                key=lambda item: item[1]['count'], reverse=True
+            )[:5]
+            if route_stats:
+                message += "\n🔘 *Tombol terbanyak*\n"
+                for name, stats in route_stats:
+                    message += f"`{name}` {LatencyStats.format_ms(stats)}\n"
+            await update.message.reply_text(message, parse_mode='Markdown')
+
+        except Exception as e:
+            logger.error(f"Error in metrik_command: {e}")
+            await update.message.reply_text("❌ Terjadi kesalahan")
+
+    async def rekap_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handler untuk /rekap <dari> <sampai> - rekap range tanggal bebas"""
+        try:
+            if not context.args:
+                await update.message.reply_text(
+                    "❌ Format: `/rekap <dari> <sampai>` atau `/rekap <periode>`\n"
+                    "Contoh: `/rekap 2025-10-01 2025-12-15`, `/rekap bulan lalu`",
+                    parse_mode='Markdown'
+                )
+                return
+
+            try:
+                start_date, end_date = self._parse_period_args(context.args)
+            except ValueError as e:
+                await update.message.reply_text(f"❌ {str(e)}")
+                return
+
+            rekap = self.logic.calculate_range_summary(start_date, end_date)
+
+            if not rekap['days']:
+                await update.message.reply_text(
+                    f"📭 Belum ada data rekap tersimpan untuk {start_date} s/d {end_date}"
+                )
+                return
+
+            message = f"""
+🗂️ *REKAP PERIODE*
+{start_date} s/d {end_date}
+
+━━━━━━━━━━━━━━━━━━━━━━━━
+📊 RINGKASAN
+━━━━━━━━━━━━━━━━━━━━━━━━
+📈 Total Omzet Manual: {format_rupiah(rekap['total_omzet'])}
+🖥️ Total Omzet POS: {format_rupiah(rekap['total_pos'])}
+💳 Total Transfer: {format_rupiah(rekap['total_tf'])} ({rekap['count_tf']}x)
+📤 Total Pengeluaran: {format_rupiah(rekap['total_pengeluaran'])} ({rekap['count_pengeluaran']}x)
+📊 Total Selisih: {format_rupiah(rekap['total_selisih'])}
+📊 Rata-rata/hari: {format_rupiah(rekap['avg_omzet'])}
+
+📊 Hari Tercatat: {rekap['days']} hari
+"""
+
+            await update.message.reply_text(message, parse_mode='Markdown')
+            logger.info(f"Rekap range {start_date}..{end_date}: {rekap['segments']} segment(s)")
+
+        except Exception as e:
+            logger.error(f"Error in rekap_command: {e}")
+            await update.message.reply_text("❌ Terjadi kesalahan")
+
+    def _parse_period_args(self, args, default: str = None):
+        """
+        Parse argumen periode command: satu ekspresi ("minggu lalu",
+        "1 des s/d 5 des", "kemarin") atau dua tanggal terpisah spasi.
+
+        Returns: (start_date, end_date) YYYY-MM-DD, start <= end
+        Raises: ValueError jika format tidak dikenali
+        """
+        if not args:
+            return default, default
+
+        try:
+            return parse_date_range(' '.join(args))
+        except ValueError:
+            if len(args) != 2:
+                raise
+        start_date, end_date = parse_date(args[0]), parse_date(args[1])
+        if start_date > end_date:
+            start_date, end_date = end_date, start_date
+        return start_date, end_date
+
+    def _format_forecast_today(self, tanggal: str, summary: dict) -> str:
+        """Blok proyeksi omzet hari ini untuk /status (kosong jika data belum cukup)"""
+        forecast = self.forecaster.predict(tanggal)
+        if not forecast:
+            return ""
+
+        message = (
+            "\n━━━━━━━━━━━━━━━━━━━━━━━━\n"
+            "🔮 PROYEKSI\n"
+            "━━━━━━━━━━━━━━━━━━━━━━━━\n"
+            f"Perkiraan Omzet  : {format_rupiah(forecast['expected'])}\n"
+            f"Rentang Wajar    : {format_rupiah(forecast['lower'])} - {format_rupiah(forecast['upper'])}\n"
+        )
+
+        omzet = summary['omzet_manual']
+        if summary['cash_akhir'] > 0 and forecast['expected'] > 0:
+            persen = omzet / forecast['expected'] * 100
+            if omzet < forecast['lower']:
+                label = "⬇️ Di bawah perkiraan"
+            elif omzet > forecast['upper']:
+                label = "⬆️ Di atas perkiraan"
+            else:
+                label = "✅ Sesuai perkiraan"
+            message += f"Realisasi        : {persen:.0f}% → {label}\n"
+
+        return message
+
+    def _format_forecast_week(self, end_date: datetime) -> str:
+        """Baris proyeksi omzet 7 hari ke depan untuk rekap mingguan"""
+        dates = [(end_date + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(1, 8)]
+        forecast = self.forecaster.predict_range(dates)
+        if not forecast:
+            return ""
+
+        return (
+            f"🔮 Proyeksi 7 hari ke depan: {format_rupiah(forecast['expected'])}\n"
+            f"   ({format_rupiah(forecast['lower'])} - {format_rupiah(forecast['upper'])})\n"
+        )
+
+    def _get_anomalies_for_summaries(self, summaries, start_date: str, end_date: str) -> dict:
+        """
+        Kumpulkan flag anomali untuk daftar rekap.
+        Tanggal FINAL pakai flag tersimpan; tanggal yang belum FINAL dicek
+        langsung terhadap statistik berjalan (O(1) per hari, tanpa scan history).
+        """
+        anomalies = self.anomaly.get_flags_range(start_date, end_date)
+        stats = None
+
+        for s in summaries:
+            date = s[1]
+            if date in anomalies or s[3] == 'FINAL':
+                continue
+            if stats is None:
+                stats = self.anomaly.load_stats()
+            flags = self.anomaly.check({
+                'omzet_manual': s[13],
+                'total_tf': s[6],
+                'selisih': s[14],
+            }, stats)
+            if flags:
+                anomalies[date] = flags
+
+        return dict(sorted(anomalies.items()))
+
+    async def push_anomaly_alert(self, date: str, flags: list):
+        """Kirim notifikasi anomali ke chat yang mencatat transaksi pada tanggal tsb"""
+        if not self.application:
+            return
+
+        message = f"🔎 *Rekap {date} Tidak Biasa*\n\n"
+        for flag in flags:
+            message += f"{AnomalyDetector.format_flag(flag)}\n"
+        message += "\n_Cek ulang catatan transaksi hari itu._"
+
+        for chat_id in self.storage.get_chat_ids_by_date(date):
+            try:
+                await self.application.bot.send_message(
+                    chat_id=chat_id, text=message, parse_mode='Markdown', rate_limit_args=BULK
+                )
+            except Exception as e:
+                logger.error(f"Failed to push anomaly alert to {chat_id}: {e}")
+
     async def text_input_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handler untuk text input dari button flow (state machine)"""
+        """Handler untuk text input dari button flow (state machine) & input batch"""
+        text = update.message.text or ''
+        if is_batch_text(text):
+            context.user_data.pop('pending_input', None)
+            await self.batch_input_handler(update, context)
+            return
+
         # Check if there's a pending input from button flow
         pending_input = context.user_data.get('pending_input')
 
@@ -1316,7 +1705,7 @@ _Gunakan tombol di bawah untuk navigasi cepat_
             return  # No pending input, let it pass to other handlers
 
         try:
-            text = update.message.text.strip()
+            text = text.strip()
             amount = parse_amount(text)
 
             if amount <= 0:
@@ -1371,9 +1760,96 @@ _Gunakan tombol di bawah untuk navigasi cepat_
             await update.message.reply_text("❌ Terjadi kesalahan")
             context.user_data.pop('pending_input', None)
 
-    def run(self):
-        """Jalankan bot"""
-        application = Application.builder().token(self.config.TELEGRAM_BOT_TOKEN).build()
+    async def batch_input_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """
+        Handler untuk input batch: satu pesan berisi banyak baris transaksi,
+        misal "tf 50k", "keluar 20rb es batu", "pos 2.3jt".
+        Semua baris divalidasi dulu, lalu disimpan dalam satu transaksi DB.
+        """
+        try:
+            entries, errors = parse_batch_entries(update.message.text)
+            tanggal = datetime.now().strftime('%Y-%m-%d')
+            waktu = datetime.now().strftime('%H:%M:%S')
+
+            if any(e['tipe'] == 'modal' for e in entries) and self.storage.check_modal_exists_today(tanggal):
+                errors.append("Modal hari ini sudah ada, gunakan /modal untuk reset")
+
+            if errors:
+                await update.message.reply_text(
+                    "❌ Input batch tidak valid:\n" + "\n".join(errors) +
+                    "\n\n✅ Data TIDAK tersimpan (tidak ada baris yang disimpan)."
+                )
+                return
+
+            ids = self.storage.add_transactions_batch([
+                {
+                    'tanggal': tanggal,
+                    'waktu': waktu,
+                    'tipe': entry['tipe'],
+                    'jumlah': entry['jumlah'],
+                    'sumber': 'batch',
+                    'keterangan': entry['keterangan'],
+                    'chat_id': update.effective_chat.id,
+                    'user_id': update.effective_user.id,
+                    'message_id': update.message.message_id,
+                }
+                for entry in entries
+            ])
+
+            tipe_emoji = {'modal': '💰', 'cash': '💵', 'tf': '💳', 'keluar': '📤', 'pos': '🖥️'}
+            message = f"✅ {len(ids)} transaksi tersimpan\n\n"
+            for tx_id, entry in zip(ids, entries):
+                line = f"{tipe_emoji.get(entry['tipe'], '📝')} {entry['tipe'].upper()} {format_rupiah(entry['jumlah'])}"
+                if entry['keterangan']:
+                    line += f" ({entry['keterangan']})"
+                message += f"{line}  🔑{tx_id}\n"
+
+            summary = self.logic.calculate_daily_summary(tanggal)
+            message += f"""
+━━━━━━━━━━━━━━━━━━━━━━━━
+📊 STATUS HARI INI
+━━━━━━━━━━━━━━━━━━━━━━━━
+💰 Modal         : {format_rupiah(summary['modal'])}
+💵 Cash Akhir    : {format_rupiah(summary['cash_akhir'])}
+💳 TF/QRIS       : {format_rupiah(summary['total_tf'])} ({summary['count_tf']}x)
+📤 Pengeluaran   : {format_rupiah(summary['total_pengeluaran'])} ({summary['count_pengeluaran']}x)
+📈 Omzet Manual  : {format_rupiah(summary['omzet_manual'])}
+🖥️ Omzet POS     : {format_rupiah(summary['pos_total'])}
+📊 Selisih       : {format_rupiah(summary['selisih'])} ({summary['selisih_persen']:.2f}%)
+
+{summary['status_icon']} {summary['status_text']}
+"""
+
+            await update.message.reply_text(message)
+            logger.info(f"Batch input saved: {len(ids)} transaksi")
+
+        except Exception as e:
+            logger.error(f"Error in batch_input_handler: {e}")
+            await update.message.reply_text("❌ Terjadi kesalahan")
+
+    def build_application(self, request=None) -> Application:
+        """
+        Bangun Application PTB lengkap dengan semua handler.
+
+        Args:
+            request: BaseRequest pengganti (misal FakeTelegram untuk test)
+        """
+        # Update diproses paralel antar chat, tetap berurutan di dalam satu chat
+        processor = PerChatUpdateProcessor(self.config.MAX_CONCURRENT_UPDATES, self.update_metrics)
+        builder = (
+            Application.builder()
+            .token(self.config.TELEGRAM_BOT_TOKEN)
+            .concurrent_updates(processor)
+            .rate_limiter(self.outbox)
+            .persistence(self.persistence)
+        )
+        if request is not None:
+            builder = builder.request(request).get_updates_request(request)
+        if self.config.RUN_MODE == 'webhook':
+            # Update masuk lewat webapp.py, bukan Updater (getUpdates)
+            builder = builder.updater(None)
+        application = builder.build()
+        self.application = application
 
         # Register handlers
         application.add_handler(CommandHandler("start", self.start))
@@ -1390,6 +1866,11 @@ _Gunakan tombol di bawah untuk navigasi cepat_
         application.add_handler(CommandHandler("reset", self.reset_command))
         application.add_handler(CommandHandler("mingguan", self.mingguan_command))
         application.add_handler(CommandHandler("bulanan", self.bulanan_command))
+        application.add_handler(CommandHandler("rekap", self.rekap_command))
+        application.add_handler(CommandHandler("ledger", self.ledger_command))
+        application.add_handler(CommandHandler("jam", self.jam_command))
+        application.add_handler(CommandHandler("metrik", self.metrik_command))
+        application.add_handler(CommandHandler("live", self.live_command))
 
         application.add_handler(MessageHandler(filters.PHOTO, self.photo_handler))
         # Text handler for button flow (must be after command handlers)
@@ -1398,15 +1879,44 @@ _Gunakan tombol di bawah untuk navigasi cepat_
 
         # Start scheduler after event loop is running (via post_init)
         async def start_scheduler(app):
+            self.live_status.bot = app.bot
+            # Siapkan backend OCR (import google.generativeai ~1 detik) di thread latar
+            asyncio.get_running_loop().run_in_executor(None, self.ocr.preload)
+            self.scheduler.add_interval_job(
+                partial(self.persistence.prune, app), CONVERSATION_PRUNE_MINUTES, 'conversation_prune'
+            )
+            self.scheduler.add_interval_job(self.ocr_cache.prune, OCR_CACHE_PRUNE_MINUTES, 'ocr_cache_prune')
+            self.scheduler.add_interval_job(self.prune_ocr_pending, OCR_CACHE_PRUNE_MINUTES, 'ocr_pending_prune')
             self.scheduler.start()
             logger.info("Scheduler started: DRAFT at 23:00, FINAL at 02:00")
 
+        # Hentikan worker OCR & thread pool backend OCR (Gemini/tesseract) saat bot berhenti
+        async def stop_ocr(app):
+            await self.ocr_queue.stop()
+            self.ocr.shutdown()
+            self.gemini.shutdown()
+
         application.post_init = start_scheduler
+        application.post_shutdown = stop_ocr
+        return application
+
+    def run(self):
+        """Jalankan bot (polling atau webhook sesuai Config.RUN_MODE)"""
+        application = self.build_application()
 
-        logger.info("Asisten Keuangan Anisa Store v2 starting...")
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+        logger.info(f"Asisten Keuangan Anisa Store v2 starting ({self.config.RUN_MODE})...")
+        if self.config.RUN_MODE == 'webhook':
+            # FastAPI/uvicorn hanya dibutuhkan di mode ini
+            from webapp import run_webhook
+            asyncio.run(run_webhook(self, application))
+        else:
+            application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == '__main__':
-    bot = TokoBot()
-    bot.run()
+    if '--profile-startup' in sys.argv:
+        from startup_profile import profile_startup
+        profile_startup(TokoBot)
+    else:
+        bot = TokoBot()
+        bot.run()
@@ -6,6 +6,8 @@ Menggunakan environment variables untuk sensitive data
 import os
 from dotenv import load_dotenv
 
+from ocr_backend import BACKENDS as OCR_BACKENDS
+
 # Load .env file
 load_dotenv()
 
@@ -13,12 +15,9 @@ load_dotenv()
 class Config:
     """Configuration class untuk bot"""
 
-    # Telegram Bot Token (WAJIB)
+    # Telegram Bot Token (WAJIB, dicek oleh validate() saat bot dibuat)
     TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 
-    if not TELEGRAM_BOT_TOKEN:
-        raise ValueError("TELEGRAM_BOT_TOKEN tidak ditemukan! Silakan set di file .env")
-
     # Database path
     DB_PATH = os.getenv('DB_PATH', 'toko_keuangan.db')
 
@@ -29,9 +28,86 @@ class Config:
     THRESHOLD_SELISIH_KECIL = int(os.getenv('THRESHOLD_SELISIH_KECIL', '1000'))
     THRESHOLD_SELISIH_BESAR = int(os.getenv('THRESHOLD_SELISIH_BESAR', '5000'))
 
+    # Deteksi anomali rekap harian (z-score terhadap statistik berjalan)
+    ANOMALY_Z_THRESHOLD = float(os.getenv('ANOMALY_Z_THRESHOLD', '2.5'))
+    ANOMALY_MIN_SAMPLES = int(os.getenv('ANOMALY_MIN_SAMPLES', '7'))
+    ANOMALY_WINDOW = int(os.getenv('ANOMALY_WINDOW', '30'))
+
+    # Lebar slot analitik per jam untuk /jam (menit)
+    JAM_BUCKET_MENIT = int(os.getenv('JAM_BUCKET_MENIT', '60'))
+
+    # Batas update yang diproses bersamaan (antar chat; satu chat tetap berurutan)
+    MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', '8'))
+
+    # Rate limit pesan keluar (batas Telegram: ~30/detik total, ~1/detik per chat, 20/menit per grup)
+    OUTBOX_GLOBAL_RATE = float(os.getenv('OUTBOX_GLOBAL_RATE', '30'))
+    OUTBOX_PRIVATE_RATE = float(os.getenv('OUTBOX_PRIVATE_RATE', '1'))
+    OUTBOX_GROUP_PER_MINUTE = float(os.getenv('OUTBOX_GROUP_PER_MINUTE', '20'))
+    OUTBOX_MAX_RETRIES = int(os.getenv('OUTBOX_MAX_RETRIES', '3'))
+
+    # Status live (/live): jeda penggabungan perubahan & jarak minimum edit per chat (detik)
+    LIVE_STATUS_DEBOUNCE = float(os.getenv('LIVE_STATUS_DEBOUNCE', '2.5'))
+    LIVE_STATUS_MIN_INTERVAL = float(os.getenv('LIVE_STATUS_MIN_INTERVAL', '3'))
+
+    # State percakapan (input via tombol) di SQLite: umur key & jeda simpan (detik)
+    CONVERSATION_TTL = float(os.getenv('CONVERSATION_TTL', '1800'))
+    CONVERSATION_FLUSH_INTERVAL = float(os.getenv('CONVERSATION_FLUSH_INTERVAL', '5'))
+
+    # OCR Gemini: batas waktu per gambar (detik) & jumlah worker antrean OCR
+    OCR_TIMEOUT = float(os.getenv('OCR_TIMEOUT', '30'))
+    OCR_MAX_WORKERS = int(os.getenv('OCR_MAX_WORKERS', '4'))
+    # Maksimal foto yang menunggu di antrean OCR (lebih dari ini → "antrian penuh")
+    OCR_QUEUE_MAX = int(os.getenv('OCR_QUEUE_MAX', '20'))
+    # Cache OCR: selisih bit dHash maksimal agar screenshot ulang dianggap gambar yang sama
+    OCR_CACHE_MAX_DISTANCE = int(os.getenv('OCR_CACHE_MAX_DISTANCE', '10'))
+    # Umur maksimal hasil OCR di cache (hari); yang lebih tua dibuang sekali sehari
+    OCR_CACHE_RETENTION_DAYS = int(os.getenv('OCR_CACHE_RETENTION_DAYS', '90'))
+    # Persiapan gambar OCR: ukuran foto Telegram terkecil yang dipakai (sisi panjang, px),
+    # batas sisi panjang setelah diperkecil & kualitas JPEG hasil kompres ulang
+    OCR_PHOTO_MIN_SIDE = int(os.getenv('OCR_PHOTO_MIN_SIDE', '1280'))
+    OCR_MAX_SIDE = int(os.getenv('OCR_MAX_SIDE', '1600'))
+    OCR_JPEG_QUALITY = int(os.getenv('OCR_JPEG_QUALITY', '85'))
+
+    # Backend OCR: gemini | tesseract (lokal) | stub (test/dev) | cascade (tesseract → Gemini)
+    OCR_BACKEND = os.getenv('OCR_BACKEND', 'gemini').lower()
+    OCR_TESSERACT_LANG = os.getenv('OCR_TESSERACT_LANG', 'eng')
+    OCR_LOCAL_TIMEOUT = float(os.getenv('OCR_LOCAL_TIMEOUT', '10'))
+    # Mode cascade: hasil lokal dengan confidence di bawah ini diteruskan ke Gemini
+    OCR_CASCADE_THRESHOLD = float(os.getenv('OCR_CASCADE_THRESHOLD', '0.8'))
+
     # OCR Callback endpoint (jika menggunakan FastAPI/Flask)
     OCR_CALLBACK_PORT = int(os.getenv('OCR_CALLBACK_PORT', '8000'))
     OCR_CALLBACK_PATH = os.getenv('OCR_CALLBACK_PATH', '/ocr-transfer-result')
 
+    # Mode jalan: 'polling' (default) atau 'webhook' (server ASGI tertanam, butuh fastapi+uvicorn)
+    RUN_MODE = os.getenv('RUN_MODE', 'polling').lower()
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # URL publik HTTPS, misal https://bot.example.com
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+    WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', str(OCR_CALLBACK_PORT)))
+    # Token header X-Metrics-Token untuk GET /metrics; kosong = hanya dari localhost
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
     # Gemini API Key
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+
+    @classmethod
+    def validate(cls):
+        """
+        Cek konfigurasi wajib. Dipanggil saat bot/endpoint dibuat, bukan saat import,
+        supaya modul bisa di-import (test, profiling) tanpa .env lengkap.
+
+        Raises:
+            ValueError: Jika ada konfigurasi wajib yang kosong/tidak valid
+        """
+        if not cls.TELEGRAM_BOT_TOKEN:
+            raise ValueError("TELEGRAM_BOT_TOKEN tidak ditemukan! Silakan set di file .env")
+        if cls.RUN_MODE not in ('polling', 'webhook'):
+            raise ValueError(f"RUN_MODE harus 'polling' atau 'webhook', bukan '{cls.RUN_MODE}'")
+        if cls.RUN_MODE == 'webhook' and not cls.WEBHOOK_URL:
+            raise ValueError("WEBHOOK_URL wajib diisi untuk RUN_MODE=webhook")
+        if cls.OCR_BACKEND not in OCR_BACKENDS:
+            raise ValueError(
+                f"OCR_BACKEND harus salah satu dari {', '.join(OCR_BACKENDS)}, bukan '{cls.OCR_BACKEND}'"
+            )
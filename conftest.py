@@ -0,0 +1,30 @@
+"""
+Fixture bersama untuk test OCR (gambar struk sintetis)
+"""
+
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+
+def _receipt(amount: str, quality: int = 90, size=(360, 640)) -> bytes:
+    """Gambar mirip struk transfer: blok header, garis, dan teks nominal"""
+    image = Image.new('RGB', (360, 640), 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, 0, 360, 120), fill=(20, 90, 200))
+    draw.ellipse((140, 160, 220, 240), fill=(30, 170, 80))
+    for y in range(300, 600, 40):
+        draw.line((30, y, 330, y), fill=(180, 180, 180), width=3)
+    draw.text((40, 260), f"Rp {amount}", fill='black')
+    if size != (360, 640):
+        image = image.resize(size)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def receipt():
+    """Pembuat JPEG struk: receipt('125.000', quality=60, size=(720, 1280))"""
+    return _receipt
@@ -0,0 +1,162 @@
+"""
+Bot API palsu in-process untuk test (tanpa jaringan)
+- FakeTelegram: pengganti BaseRequest PTB; mencatat setiap panggilan API dan
+  membalas dengan objek minimal yang valid
+- text_update / photo_update / callback_update: bangun JSON update seperti yang dikirim Telegram
+- File (getFile + unduhan) dilayani dari `files`: file_id → bytes
+
+Contoh:
+    fake = FakeTelegram()
+    application = toko_bot.build_application(request=fake)
+    async with application:
+        await application.process_update(Update.de_json(text_update('/tf 50k'), application.bot))
+    assert fake.sent_texts()
+"""
+
+import itertools
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from telegram.request import BaseRequest, RequestData
+
+BOT_ID = 123456
+BOT_USERNAME = 'toko_test_bot'
+CHAT_ID = 1001
+USER_ID = 2002
+
+# Endpoint yang mengembalikan Message; selain ini cukup `True`
+_MESSAGE_ENDPOINTS = frozenset({
+    'sendMessage', 'editMessageText', 'editMessageReplyMarkup', 'sendPhoto', 'sendDocument',
+})
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+
+
+def _chat(chat_id: int) -> Dict[str, Any]:
+    return {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group', 'title': 'Toko'}
+
+
+def _user(user_id: int) -> Dict[str, Any]:
+    return {'id': user_id, 'is_bot': False, 'first_name': 'Anisa'}
+
+
+def text_update(text: str, chat_id: int = CHAT_ID, user_id: int = USER_ID) -> Dict[str, Any]:
+    """JSON update pesan teks; awalan '/' otomatis diberi entity bot_command"""
+    message = {
+        'message_id': next(_message_ids),
+        'date': int(time.time()),
+        'chat': _chat(chat_id),
+        'from': _user(user_id),
+        'text': text,
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return {'update_id': next(_update_ids), 'message': message}
+
+
+def photo_update(file_id: str = 'photo-1', chat_id: int = CHAT_ID, user_id: int = USER_ID,
+                 sizes=((90, 160, 2000), (320, 568, 20000), (720, 1280, 90000))) -> Dict[str, Any]:
+    """JSON update foto; `sizes` = (lebar, tinggi, byte) dari kecil ke besar seperti Telegram"""
+    photo = [
+        {'file_id': f'{file_id}-{i}', 'file_unique_id': f'{file_id}-u{i}',
+         'width': width, 'height': height, 'file_size': size}
+        for i, (width, height, size) in enumerate(sizes)
+    ]
+    message = {
+        'message_id': next(_message_ids),
+        'date': int(time.time()),
+        'chat': _chat(chat_id),
+        'from': _user(user_id),
+        'photo': photo,
+    }
+    return {'update_id': next(_update_ids), 'message': message}
+
+
+def callback_update(data: str, chat_id: int = CHAT_ID, user_id: int = USER_ID,
+                    message_id: int = 1) -> Dict[str, Any]:
+    """JSON update callback query dari tombol inline pada pesan bot `message_id`"""
+    return {
+        'update_id': next(_update_ids),
+        'callback_query': {
+            'id': str(next(_update_ids)),
+            'from': _user(user_id),
+            'chat_instance': str(chat_id),
+            'data': data,
+            'message': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': _chat(chat_id),
+                'from': {'id': BOT_ID, 'is_bot': True, 'first_name': 'Toko'},
+                'text': '...',
+            },
+        },
+    }
+
+
+class FakeTelegram(BaseRequest):
+    """
+    BaseRequest palsu: setiap panggilan dicatat di `calls` sebagai (endpoint, parameter).
+    Pakai sebagai `request` dan `get_updates_request` di Application.builder().
+    """
+
+    def __init__(self, files: Optional[Dict[str, bytes]] = None):
+        self.calls: List[Tuple[str, Dict[str, Any]]] = []
+        self.files: Dict[str, bytes] = dict(files or {})
+        self._message_ids = itertools.count(5000)
+
+    @property
+    def read_timeout(self) -> Optional[float]:
+        return None
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None,
+                         read_timeout=None, write_timeout=None, connect_timeout=None,
+                         pool_timeout=None) -> Tuple[int, bytes]:
+        endpoint = url.rsplit('/', 1)[-1]
+        if '/file/bot' in url:
+            # Unduhan file: path = file_id (lihat getFile di bawah)
+            self.calls.append(('downloadFile', {'file_path': endpoint}))
+            return 200, self.files.get(endpoint, b'')
+        params = request_data.parameters if request_data else {}
+        self.calls.append((endpoint, params))
+        payload = {'ok': True, 'result': self._result(endpoint, params)}
+        return 200, json.dumps(payload).encode()
+
+    def _result(self, endpoint: str, params: Dict[str, Any]) -> Any:
+        if endpoint == 'getMe':
+            return {
+                'id': BOT_ID, 'is_bot': True, 'first_name': 'Toko', 'username': BOT_USERNAME,
+                'can_join_groups': True, 'can_read_all_group_messages': False,
+                'supports_inline_queries': False,
+            }
+        if endpoint == 'getUpdates':
+            return []
+        if endpoint == 'getFile':
+            file_id = params['file_id']
+            return {'file_id': file_id, 'file_unique_id': f'{file_id}-u',
+                    'file_size': len(self.files.get(file_id, b'')), 'file_path': file_id}
+        if endpoint in _MESSAGE_ENDPOINTS:
+            chat_id = int(params.get('chat_id', CHAT_ID))
+            return {
+                'message_id': params.get('message_id') or next(self._message_ids),
+                'date': int(time.time()),
+                'chat': _chat(chat_id),
+                'from': {'id': BOT_ID, 'is_bot': True, 'first_name': 'Toko'},
+                'text': params.get('text', ''),
+            }
+        return True
+
+    def endpoints(self) -> List[str]:
+        """Urutan endpoint yang dipanggil"""
+        return [endpoint for endpoint, _ in self.calls]
+
+    def sent_texts(self, endpoint: str = 'sendMessage') -> List[str]:
+        """Teks semua pesan yang dikirim lewat `endpoint`"""
+        return [params.get('text', '') for name, params in self.calls if name == endpoint]
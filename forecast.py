@@ -0,0 +1,134 @@
+"""
+Proyeksi omzet harian
+Model: rata-rata musiman per hari (Senin..Minggu) + exponential smoothing
+level (Holt-Winters aditif tanpa trend). State disimpan di SQLite dan
+di-update O(1) sekali per rekap FINAL, tanpa scan history.
+"""
+
+import math
+import logging
+from datetime import datetime
+from typing import Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# z untuk confidence band ~95%
+Z_BAND = 1.96
+
+
+class OmzetForecaster:
+    """
+    Forecaster omzet manual berbasis state yang di-update inkremental.
+
+    State: level, seasonal[7], seasonal_n[7], resid_var, n, last_date
+    - level      : omzet dasar (exponential smoothing, bobot alpha)
+    - seasonal   : selisih rata-rata tiap hari dalam minggu terhadap level
+                   (rata-rata biasa saat warm-up, lalu smoothing bobot gamma)
+    - resid_var  : varians error proyeksi (EWMA bobot beta) untuk band
+    """
+
+    def __init__(self, storage: 'Storage', alpha: float = 0.3, gamma: float = 0.2,
+                 beta: float = 0.2, min_samples: int = 7):
+        self.storage = storage
+        self.alpha = alpha
+        self.gamma = gamma
+        self.beta = beta
+        self.min_samples = min_samples
+
+    def load_state(self) -> Dict:
+        """Ambil state model dari storage (atau state kosong)"""
+        state = self.storage.get_forecast_state()
+        if state is None:
+            state = {
+                'level': 0.0,
+                'seasonal': [0.0] * 7,
+                'seasonal_n': [0] * 7,
+                'resid_var': 0.0,
+                'n': 0,
+                'last_date': None,
+            }
+        return state
+
+    def update(self, date: str, summary_data: Dict) -> bool:
+        """
+        Update model dengan omzet satu hari (dipanggil setelah FINAL).
+        Idempotent: tanggal <= last_date diabaikan.
+
+        Returns: True jika state berubah
+        """
+        state = self.load_state()
+        if state['last_date'] is not None and date <= state['last_date']:
+            logger.info(f"Forecast already includes {date}, skipping update")
+            return False
+
+        y = float(summary_data.get('omzet_manual', 0) or 0)
+        dow = datetime.strptime(date, '%Y-%m-%d').weekday()
+        n = state['n']
+        seasonal = state['seasonal']
+        seasonal_n = state['seasonal_n']
+
+        if n == 0:
+            level = y
+        else:
+            # Error proyeksi sebelum update → varians untuk confidence band
+            err = y - (state['level'] + seasonal[dow])
+            weight = max(self.beta, 1.0 / n)
+            state['resid_var'] = (1 - weight) * state['resid_var'] + weight * err * err
+            level = state['level'] + self.alpha * (y - seasonal[dow] - state['level'])
+
+        weight = max(self.gamma, 1.0 / (seasonal_n[dow] + 1))
+        seasonal[dow] += weight * ((y - level) - seasonal[dow])
+        seasonal_n[dow] += 1
+
+        state['level'] = level
+        state['n'] = n + 1
+        state['last_date'] = date
+
+        self.storage.save_forecast_state(state)
+        logger.info(f"Forecast updated for {date}: level={level:.0f}, n={n + 1}")
+        return True
+
+    def predict(self, date: str, state: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Proyeksi omzet untuk satu tanggal.
+
+        Returns: Dict {expected, lower, upper} atau None jika data belum cukup
+        """
+        if state is None:
+            state = self.load_state()
+        if state['n'] < self.min_samples:
+            return None
+
+        dow = datetime.strptime(date, '%Y-%m-%d').weekday()
+        expected = max(state['level'] + state['seasonal'][dow], 0.0)
+        band = Z_BAND * math.sqrt(state['resid_var'])
+
+        return {
+            'expected': expected,
+            'lower': max(expected - band, 0.0),
+            'upper': expected + band,
+        }
+
+    def predict_range(self, dates) -> Optional[Dict]:
+        """
+        Proyeksi total omzet untuk beberapa tanggal (misal 7 hari ke depan).
+        Band dijumlahkan dengan asumsi error harian independen.
+
+        Returns: Dict {expected, lower, upper} atau None jika data belum cukup
+        """
+        state = self.load_state()
+        if state['n'] < self.min_samples:
+            return None
+
+        dates = list(dates)
+        expected = sum(self.predict(d, state)['expected'] for d in dates)
+        band = Z_BAND * math.sqrt(state['resid_var'] * len(dates))
+
+        return {
+            'expected': expected,
+            'lower': max(expected - band, 0.0),
+            'upper': expected + band,
+        }
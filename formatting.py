@@ -0,0 +1,80 @@
+"""
+Formatting tampilan (tanggal & rupiah) tanpa bergantung locale host
+Nama hari/bulan Indonesia diambil dari tabel statis, bukan locale.setlocale()
+yang bersifat global untuk satu proses dan tidak thread-safe.
+"""
+
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Union
+
+
+NAMA_HARI = ('Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu')
+
+NAMA_BULAN = (
+    'Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
+    'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember',
+)
+
+NAMA_BULAN_SINGKAT = (
+    'Jan', 'Feb', 'Mar', 'Apr', 'Mei', 'Jun',
+    'Jul', 'Agu', 'Sep', 'Okt', 'Nov', 'Des',
+)
+
+
+@lru_cache(maxsize=4096)
+def format_rupiah(amount: Union[int, float]) -> str:
+    """
+    Format angka menjadi format Rupiah dengan separator titik
+
+    Examples:
+    - 1000 -> "Rp1.000"
+    - 1234567 -> "Rp1.234.567"
+    - -5000 -> "-Rp5.000"
+
+    Desimal dibuang (rupiah tidak ada desimal). Hasil di-cache karena
+    nominal yang sama sering dirender berulang (status, ledger, rekap).
+
+    Returns: string formatted rupiah
+    """
+    value = amount if type(amount) is int else int(amount)
+    if value < 0:
+        return f"-Rp{-value:,}".replace(',', '.')
+    return f"Rp{value:,}".replace(',', '.')
+
+
+def _to_date(value: Union[date, datetime, str]) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+@lru_cache(maxsize=64)
+def _format_tanggal_cached(day: date) -> str:
+    return f"{NAMA_HARI[day.weekday()]}, {day.day:02d} {NAMA_BULAN[day.month - 1]} {day.year}"
+
+
+def format_tanggal(value: Union[date, datetime, str]) -> str:
+    """
+    Header tanggal lengkap, misal "Rabu, 10 Desember 2025"
+    (pengganti strftime('%A, %d %B %Y') dengan locale id_ID).
+    Di-cache per hari.
+    """
+    return _format_tanggal_cached(_to_date(value))
+
+
+def format_tanggal_singkat(value: Union[date, datetime, str], with_year: bool = True) -> str:
+    """Tanggal singkat, misal "10 Des 2025" atau "10 Des" (tanpa tahun)"""
+    day = _to_date(value)
+    text = f"{day.day:02d} {NAMA_BULAN_SINGKAT[day.month - 1]}"
+    if with_year:
+        text += f" {day.year}"
+    return text
+
+
+def format_bulan(value: Union[date, datetime, str]) -> str:
+    """Nama bulan + tahun, misal "Desember 2025" """
+    day = _to_date(value)
+    return f"{NAMA_BULAN[day.month - 1]} {day.year}"
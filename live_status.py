@@ -0,0 +1,174 @@
+"""
+Pesan status live yang di-pin per chat (opt-in via /live)
+- Setiap perubahan transaksi hari ini menandai status "kotor"
+- Perubahan dalam jendela debounce digabung jadi satu edit
+- Edit dilewati jika teks tidak berubah; jarak edit per chat dijaga
+  (batas Telegram ~20 pesan/menit per grup)
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class LiveStatusManager:
+    """
+    Kelola pesan status live untuk banyak chat.
+
+    Args:
+        storage: Storage (menyimpan chat_id → message_id di tabel live_status)
+        render: Fungsi tanpa argumen yang menghasilkan teks status terkini
+        debounce: Detik menunggu setelah perubahan pertama sebelum edit
+        min_interval: Jarak minimum antar edit di chat yang sama (detik)
+        rate_limit_args: Diteruskan ke edit_message_text (misal outbox.BULK)
+    """
+
+    def __init__(self, storage, render: Callable[[], str],
+                 debounce: float = 2.5, min_interval: float = 3.0,
+                 rate_limit_args: Optional[Dict] = None):
+        self.storage = storage
+        self.render = render
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self._edit_kwargs = {'rate_limit_args': rate_limit_args} if rate_limit_args else {}
+        self.bot = None  # diset saat aplikasi mulai (post_init)
+        self._chats: Dict[int, int] = dict(storage.get_live_status_chats())
+        self._last_text: Dict[int, str] = {}
+        self._last_edit: Dict[int, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pending = False
+        self.stats = {'notified': 0, 'edits': 0, 'skipped': 0, 'failed': 0}
+
+    def is_enabled(self, chat_id: int) -> bool:
+        return chat_id in self._chats
+
+    async def enable(self, bot, chat_id: int) -> bool:
+        """
+        Kirim pesan status baru untuk chat lalu pin.
+        Returns: True jika berhasil di-pin (gagal pin tetap live, hanya tidak di-pin)
+        """
+        old_message_id = self._chats.get(chat_id)
+        if old_message_id is not None:
+            await self._unpin(bot, chat_id, old_message_id)
+
+        text = self.render()
+        message = await bot.send_message(chat_id=chat_id, text=text)
+        self._chats[chat_id] = message.message_id
+        self._last_text[chat_id] = text
+        self._last_edit[chat_id] = time.monotonic()
+        self.storage.save_live_status(chat_id, message.message_id)
+
+        try:
+            await bot.pin_chat_message(chat_id=chat_id, message_id=message.message_id,
+                                       disable_notification=True)
+            return True
+        except (BadRequest, Forbidden) as e:
+            logger.warning(f"Live status not pinned in chat {chat_id}: {e}")
+            return False
+
+    async def disable(self, bot, chat_id: int) -> bool:
+        """Matikan status live chat. Returns: False jika memang belum aktif"""
+        message_id = self._chats.pop(chat_id, None)
+        self._last_text.pop(chat_id, None)
+        self._last_edit.pop(chat_id, None)
+        self.storage.delete_live_status(chat_id)
+        if message_id is None:
+            return False
+        await self._unpin(bot, chat_id, message_id)
+        return True
+
+    @staticmethod
+    async def _unpin(bot, chat_id: int, message_id: int):
+        try:
+            await bot.unpin_chat_message(chat_id=chat_id, message_id=message_id)
+        except (BadRequest, Forbidden) as e:
+            logger.warning(f"Live status unpin failed in chat {chat_id}: {e}")
+
+    def notify(self, tanggal: Optional[str] = None):
+        """
+        Tandai status perlu diperbarui (dipanggil Storage.on_change).
+        Perubahan tanggal lain selain hari ini diabaikan.
+        """
+        if not self._chats:
+            return
+        if tanggal is not None and tanggal != datetime.now().strftime('%Y-%m-%d'):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # dipanggil di luar event loop (script/test sinkron)
+
+        self.stats['notified'] += 1
+        self._pending = True
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        # Perubahan yang masuk selama flush memicu satu putaran lagi
+        while self._pending:
+            await asyncio.sleep(self.debounce)
+            self._pending = False
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error updating live status: {e}")
+
+    async def flush(self):
+        """Render sekali lalu edit semua pesan live yang teksnya berubah"""
+        if self.bot is None or not self._chats:
+            return
+        text = self.render()
+        edits = []
+        for chat_id, message_id in list(self._chats.items()):
+            if self._last_text.get(chat_id) == text:
+                self.stats['skipped'] += 1
+                continue
+            edits.append(self._edit(chat_id, message_id, text))
+        # Tiap chat punya jeda rate limit sendiri, jadi diedit paralel
+        await asyncio.gather(*edits)
+
+    async def _edit(self, chat_id: int, message_id: int, text: str, retry: bool = True):
+        wait = self.min_interval - (time.monotonic() - self._last_edit.get(chat_id, 0.0))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        try:
+            await self.bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, **self._edit_kwargs)
+        except RetryAfter as e:
+            if not retry:
+                self.stats['failed'] += 1
+                return
+            await asyncio.sleep(e.retry_after)
+            await self._edit(chat_id, message_id, text, retry=False)
+            return
+        except BadRequest as e:
+            error = str(e).lower()
+            if 'not modified' in error:
+                self._last_text[chat_id] = text
+                self.stats['skipped'] += 1
+                return
+            if 'not found' in error:
+                # Pesan dihapus user → berhenti live di chat ini
+                logger.info(f"Live status message gone in chat {chat_id}, disabling")
+                self._chats.pop(chat_id, None)
+                self.storage.delete_live_status(chat_id)
+            self.stats['failed'] += 1
+            logger.warning(f"Live status edit failed in chat {chat_id}: {e}")
+            return
+        except Forbidden as e:
+            # Bot dikeluarkan dari grup / diblokir
+            self._chats.pop(chat_id, None)
+            self.storage.delete_live_status(chat_id)
+            self.stats['failed'] += 1
+            logger.warning(f"Live status disabled for chat {chat_id}: {e}")
+            return
+
+        self._last_text[chat_id] = text
+        self._last_edit[chat_id] = time.monotonic()
+        self.stats['edits'] += 1
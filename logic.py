@@ -3,8 +3,9 @@ Business logic untuk perhitungan keuangan
 PENTING: Rumus dan logika di sini sesuai spesifikasi dan TIDAK BOLEH diubah
 """
 
-from storage import Storage
-from typing import Dict
+from storage import Storage, ROLLUP_FIELDS, week_bounds, month_bounds
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -137,27 +138,101 @@ class FinancialLogic:
 
     def calculate_weekly_summary(self, start_date: str, end_date: str) -> Dict:
         """
-        STUB: Untuk rekap mingguan (future implementation)
-        Bisa dipanggil dari n8n atau command /rekapmingguan
+        Rekap mingguan (atau range apa pun) dari rollup + potongan hari di tepi.
+        Dipakai oleh /mingguan dan tombol Rekap Mingguan.
         """
-        # TODO: Implementasi rekap mingguan
-        # - Ambil transaksi dari start_date sampai end_date
-        # - Hitung total per kategori
-        # - Hitung rata-rata harian
-        # - Return summary
-        pass
+        return self.calculate_range_summary(start_date, end_date)
 
     def calculate_monthly_summary(self, year: int, month: int) -> Dict:
         """
-        STUB: Untuk rekap bulanan (future implementation)
-        Bisa dipanggil dari n8n atau command /rekapbulanan
+        Rekap bulanan: satu baris dari monthly_rollups.
+        Tanggal yang belum lewat memang belum punya rekap, jadi rollup bulan
+        berjalan = rekap month-to-date.
         """
-        # TODO: Implementasi rekap bulanan
-        # - Ambil semua transaksi di bulan tersebut
-        # - Group by tanggal
-        # - Hitung statistik: total, rata-rata, min, max
-        # - Return summary
-        pass
+        month_start, month_end = month_bounds(date(year, month, 1))
+        key = month_start.strftime('%Y-%m')
+
+        rows = self.storage.get_monthly_rollups([key])
+        totals = rows[0][1:] if rows else (0,) * len(ROLLUP_FIELDS)
+
+        return self._build_range_result(
+            month_start.isoformat(), month_end.isoformat(), [totals], segments=1
+        )
+
+    def calculate_range_summary(self, start_date: str, end_date: str) -> Dict:
+        """
+        Rekap range tanggal bebas dengan biaya baca yang kecil:
+        bulan penuh → monthly_rollups, minggu penuh (Senin-Minggu) → weekly_rollups,
+        sisa hari di tepi → satu agregat SQL per potongan.
+
+        Returns: Dict total per kategori + 'days', 'avg_omzet', 'segments'
+        """
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        plan = self.plan_range_segments(start, end)
+
+        months = [s.strftime('%Y-%m') for kind, s, _ in plan if kind == 'month']
+        weeks = [s.isoformat() for kind, s, _ in plan if kind == 'week']
+
+        totals = [row[1:] for row in self.storage.get_monthly_rollups(months)]
+        totals += [row[1:] for row in self.storage.get_weekly_rollups(weeks)]
+        for kind, s, e in plan:
+            if kind == 'days':
+                totals.append(self.storage.get_summary_totals(s.isoformat(), e.isoformat()))
+
+        return self._build_range_result(start_date, end_date, totals, segments=len(plan))
+
+    @staticmethod
+    def plan_range_segments(start: date, end: date) -> List[Tuple[str, date, date]]:
+        """
+        Pecah range menjadi segmen ('month' | 'week' | 'days', start, end).
+        Minggu yang menyeberang ke bulan yang bisa diambil utuh tidak dipakai,
+        supaya bulan tersebut tetap dibaca dari satu baris rollup.
+        """
+        segments = []
+        day_start = None
+        cursor = start
+
+        def flush_days(until: date):
+            nonlocal day_start
+            if day_start is not None:
+                segments.append(('days', day_start, until))
+                day_start = None
+
+        while cursor <= end:
+            month_start, month_end = month_bounds(cursor)
+            if cursor == month_start and month_end <= end:
+                flush_days(cursor - timedelta(days=1))
+                segments.append(('month', month_start, month_end))
+                cursor = month_end + timedelta(days=1)
+                continue
+
+            week_start, week_end = week_bounds(cursor)
+            if cursor == week_start and week_end <= end:
+                next_month_end = month_bounds(week_end)[1]
+                crosses_full_month = week_end.month != cursor.month and next_month_end <= end
+                if not crosses_full_month:
+                    flush_days(cursor - timedelta(days=1))
+                    segments.append(('week', week_start, week_end))
+                    cursor = week_end + timedelta(days=1)
+                    continue
+
+            if day_start is None:
+                day_start = cursor
+            cursor += timedelta(days=1)
+
+        flush_days(end)
+        return segments
+
+    @staticmethod
+    def _build_range_result(start_date: str, end_date: str, totals: List[Tuple], segments: int) -> Dict:
+        """Jumlahkan beberapa baris agregat (urutan ROLLUP_FIELDS) menjadi satu dict"""
+        result = {'start_date': start_date, 'end_date': end_date, 'segments': segments}
+        for i, field in enumerate(ROLLUP_FIELDS):
+            result[field] = sum(row[i] for row in totals)
+
+        result['avg_omzet'] = result['total_omzet'] / result['days'] if result['days'] else 0
+        return result
 
     def set_threshold(self, kecil: int = None, besar: int = None):
         """
@@ -0,0 +1,95 @@
+"""
+Metrik latensi ringan (in-memory) untuk monitoring bot
+Dipakai untuk antrean update (update_processor) dan ditampilkan via /metrik.
+"""
+
+import time
+from collections import deque
+from typing import Dict, Optional
+
+
+class LatencyStats:
+    """
+    Statistik latensi berjalan: count, rata-rata, maksimum, dan persentil
+    dari sampel terakhir (reservoir ukuran tetap, O(1) per record).
+    Nilai dalam detik.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        """Catat satu sampel latensi (detik)"""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        """Persentil (0..100) dari sampel terakhir"""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def snapshot(self) -> Dict[str, float]:
+        """Ringkasan statistik: {count, avg, p50, p95, max}"""
+        return {
+            'count': self.count,
+            'avg': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'max': self.max,
+        }
+
+    @staticmethod
+    def format_ms(snapshot: Dict[str, float]) -> str:
+        """Format snapshot menjadi satu baris (milidetik)"""
+        return (
+            f"n={snapshot['count']} avg={snapshot['avg'] * 1000:.0f}ms "
+            f"p50={snapshot['p50'] * 1000:.0f}ms p95={snapshot['p95'] * 1000:.0f}ms "
+            f"max={snapshot['max'] * 1000:.0f}ms"
+        )
+
+
+class UpdateMetrics:
+    """
+    Metrik pemrosesan update Telegram:
+    - queue_delay : waktu tunggu sejak update diterima sampai mulai diproses
+                    (antre di belakang update lain di chat yang sama / batas global)
+    - handle_time : lama handler berjalan
+    - in_flight / waiting : jumlah update yang sedang diproses / menunggu
+    """
+
+    def __init__(self, window: int = 1000):
+        self.queue_delay = LatencyStats(window)
+        self.handle_time = LatencyStats(window)
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_in_flight = 0
+        self.started_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        return {
+            'queue_delay': self.queue_delay.snapshot(),
+            'handle_time': self.handle_time.snapshot(),
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'peak_in_flight': self.peak_in_flight,
+            'uptime': time.monotonic() - self.started_at,
+        }
+
+
+def format_uptime(seconds: Optional[float]) -> str:
+    """Format durasi detik menjadi '1h 02m' / '5m 03s'"""
+    seconds = int(seconds or 0)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m {secs:02d}s"
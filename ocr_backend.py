@@ -0,0 +1,333 @@
+"""
+Backend OCR yang bisa dipilih per deployment (OCR_BACKEND)
+- gemini: Google Gemini (butuh jaringan & GEMINI_API_KEY)
+- tesseract: OCR lokal + heuristik nominal rupiah (butuh pytesseract & binary tesseract)
+- stub: hasil tetap/deterministik, untuk test & development tanpa jaringan
+- cascade: tesseract dulu, diteruskan ke Gemini hanya jika keyakinannya rendah
+
+Semua backend mengembalikan dict yang sama dengan GeminiClient.analyze_transfer_image
+(is_transfer, amount, confidence, reason, opsional error/degraded), ditambah `backend`.
+"""
+
+import abc
+import asyncio
+import hashlib
+import io
+import logging
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('gemini', 'tesseract', 'stub', 'cascade')
+
+
+def _failed(reason: str, backend: str, **extra) -> Dict[str, Any]:
+    return {
+        "is_transfer": False,
+        "amount": 0,
+        "confidence": 0.0,
+        "reason": reason,
+        "error": True,
+        "backend": backend,
+        **extra,
+    }
+
+
+class OCRBackend(abc.ABC):
+    """Antarmuka backend OCR; subclass cukup mengimplementasikan _analyze"""
+
+    name = 'base'
+
+    def __init__(self):
+        self.stats = {'requests': 0, 'errors': 0}
+
+    @property
+    def available(self) -> bool:
+        """Backend siap dipakai (dependency & konfigurasi ada)"""
+        return True
+
+    def preload(self):
+        """Siapkan backend (import berat dll); aman dipanggil dari thread lain"""
+
+    def shutdown(self):
+        """Lepas resource backend (thread pool dll) saat bot berhenti"""
+
+    async def analyze(self, image_data: bytes, mime_type: str = 'image/jpeg',
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+        self.stats['requests'] += 1
+        result = await self._analyze(image_data, mime_type, timeout)
+        result.setdefault('backend', self.name)
+        if result.get('error'):
+            self.stats['errors'] += 1
+        return result
+
+    @abc.abstractmethod
+    async def _analyze(self, image_data: bytes, mime_type: str,
+                       timeout: Optional[float]) -> Dict[str, Any]:
+        """Analisa satu gambar; format hasil lihat docstring modul"""
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {'backend': self.name, **self.stats}
+
+
+class GeminiBackend(OCRBackend):
+    """Adapter GeminiClient (thread pool & timeout diatur di GeminiClient)"""
+
+    name = 'gemini'
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    @property
+    def available(self) -> bool:
+        return bool(self.client.api_key)
+
+    def preload(self):
+        self.client.preload()
+
+    def shutdown(self):
+        self.client.shutdown()
+
+    async def _analyze(self, image_data, mime_type, timeout):
+        return await self.client.analyze_transfer_image_async(image_data, timeout, mime_type)
+
+
+# ===== OCR LOKAL =====
+
+# "Rp 125.000", "Rp125,000.00", "IDR 50.000,00", "Rp. 1.250.000"
+_AMOUNT_RE = re.compile(
+    r'(?:Rp\.?|IDR)\s*([0-9]{1,3}(?:[.,][0-9]{3})+|[0-9]{4,})(?:[.,][0-9]{2})?(?![0-9])',
+    re.IGNORECASE
+)
+# Angka berpemisah ribuan tanpa "Rp", hanya dipakai di baris berlabel ("Nominal 125.000")
+_NUMBER_RE = re.compile(r'(?<![0-9.,])([0-9]{1,3}(?:[.,][0-9]{3})+)(?:[.,][0-9]{2})?(?![0-9])')
+_AMOUNT_LABELS = ('total', 'nominal', 'jumlah', 'amount', 'nilai', 'transfer')
+# Baris nominal yang bukan nilai transfer
+_IGNORED_LABELS = ('biaya', 'admin', 'fee', 'saldo', 'limit', 'diskon', 'cashback')
+_STATUS_WORDS = ('berhasil', 'sukses', 'success', 'successful', 'completed')
+_TRANSFER_WORDS = ('transfer', 'qris', 'pembayaran', 'payment', 'rekening', 'referensi', 'ref', 'penerima')
+
+
+def _line_has(line: str, words) -> bool:
+    return any(re.search(rf'\b{word}\b', line) for word in words)
+
+
+def extract_transfer(text: str) -> Dict[str, Any]:
+    """
+    Heuristik bukti transfer dari teks OCR: nominal rupiah yang diberi label
+    (Total/Nominal/Jumlah) diutamakan, baris biaya/saldo diabaikan. Keyakinan
+    naik jika ada kata status (Berhasil/Sukses) dan nominal yang sama muncul
+    lebih dari sekali.
+    """
+    lines = [line.strip().lower() for line in text.splitlines() if line.strip()]
+    candidates: Dict[int, List[float]] = {}  # nominal → skor setiap kemunculan
+    for index, line in enumerate(lines):
+        if _line_has(line, _IGNORED_LABELS):
+            continue
+        previous = lines[index - 1] if index else ''
+        # Label bisa di baris yang sama atau tepat di atas nominal
+        labeled = _line_has(line, _AMOUNT_LABELS) or (
+            _line_has(previous, _AMOUNT_LABELS) and not _AMOUNT_RE.search(previous)
+        )
+        matches = list(_AMOUNT_RE.finditer(line))
+        if not matches and _line_has(line, _AMOUNT_LABELS):
+            matches = list(_NUMBER_RE.finditer(line))
+        for match in matches:
+            amount = int(re.sub(r'[.,]', '', match.group(1)))
+            if amount <= 0:
+                continue
+            candidates.setdefault(amount, []).append(1.0 if labeled else 0.5)
+
+    if not candidates:
+        return {"is_transfer": False, "amount": 0, "confidence": 0.0,
+                "reason": "Tidak ada nominal rupiah terbaca"}
+
+    amount, scores = max(candidates.items(), key=lambda item: (max(item[1]), len(item[1]), item[0]))
+    joined = '\n'.join(lines)
+    has_status = _line_has(joined, _STATUS_WORDS)
+    has_transfer = _line_has(joined, _TRANSFER_WORDS)
+
+    confidence = 0.5
+    confidence += 0.2 if max(scores) == 1.0 else 0.0
+    confidence += 0.15 if has_status else 0.0
+    confidence += 0.1 if len(scores) > 1 else 0.0
+    confidence += 0.05 if has_transfer else 0.0
+    reasons = ['nominal berlabel' if max(scores) == 1.0 else 'nominal tanpa label']
+    if has_status:
+        reasons.append('status berhasil')
+    if len(scores) > 1:
+        reasons.append(f'muncul {len(scores)}x')
+    return {
+        "is_transfer": has_status or has_transfer,
+        "amount": amount,
+        "confidence": round(min(confidence, 0.95), 2),
+        "reason": f"OCR lokal: {', '.join(reasons)}",
+    }
+
+
+class TesseractBackend(OCRBackend):
+    """
+    OCR lokal dengan Tesseract (pytesseract) + extract_transfer.
+
+    Args:
+        lang: Bahasa tesseract, misal 'eng' atau 'ind+eng'
+        timeout: Batas waktu per gambar (detik)
+        max_workers: Jumlah gambar yang diproses bersamaan
+    """
+
+    name = 'tesseract'
+
+    def __init__(self, lang: str = 'eng', timeout: float = 10, max_workers: int = 2):
+        super().__init__()
+        self.lang = lang
+        self.timeout = timeout
+        self._pytesseract = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tesseract')
+
+    @property
+    def available(self) -> bool:
+        """
+        Hanya membaca flag (dipanggil di event loop, tidak menunggu preload):
+        sebelum preload selesai dianggap tersedia, _analyze yang memastikan.
+        """
+        return not self._loaded or self._pytesseract is not None
+
+    def preload(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                import pytesseract
+            except ImportError:
+                logger.warning("pytesseract not installed, local OCR disabled")
+                return
+            if shutil.which(pytesseract.pytesseract.tesseract_cmd) is None:
+                logger.warning("tesseract binary not found, local OCR disabled")
+                return
+            self._pytesseract = pytesseract
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _read_text(self, image_data: bytes, timeout: float) -> str:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(image_data)) as image:
+            return self._pytesseract.image_to_string(image, lang=self.lang, timeout=timeout)
+
+    async def _analyze(self, image_data, mime_type, timeout):
+        loop = asyncio.get_running_loop()
+        if not self._loaded:
+            await loop.run_in_executor(self._executor, self.preload)
+        if self._pytesseract is None:
+            return _failed("Tesseract tidak tersedia", self.name)
+        timeout = timeout or self.timeout
+        try:
+            text = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._read_text, image_data, timeout), timeout
+            )
+        except asyncio.TimeoutError:
+            return _failed(f"OCR lokal tidak selesai dalam {timeout:g} detik", self.name, timed_out=True)
+        except Exception as e:
+            logger.error(f"Tesseract failed: {e}")
+            return _failed(f"Error OCR lokal: {e}", self.name)
+        return extract_transfer(text)
+
+
+class StubBackend(OCRBackend):
+    """
+    Backend deterministik tanpa jaringan: hasil per sha256 gambar (`results`),
+    selain itu `default`.
+    """
+
+    name = 'stub'
+
+    def __init__(self, default: Optional[Dict[str, Any]] = None,
+                 results: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__()
+        self.default = default or {"is_transfer": False, "amount": 0, "confidence": 0.0,
+                                   "reason": "OCR stub: tidak ada hasil untuk gambar ini"}
+        self.results = dict(results or {})
+
+    async def _analyze(self, image_data, mime_type, timeout):
+        return dict(self.results.get(hashlib.sha256(image_data).hexdigest(), self.default))
+
+
+class CascadeBackend(OCRBackend):
+    """
+    Backend lokal dulu; diteruskan ke backend remote jika hasil lokal bukan
+    transfer yakin (confidence < threshold). Jika remote gagal, hasil lokal dipakai
+    dengan tanda `degraded` (jangan di-cache: foto yang sama dicoba ulang ke remote).
+    """
+
+    name = 'cascade'
+
+    def __init__(self, local: OCRBackend, remote: OCRBackend, threshold: float = 0.8):
+        super().__init__()
+        self.local = local
+        self.remote = remote
+        self.threshold = threshold
+        self.stats.update({'local': 0, 'escalated': 0})
+
+    @property
+    def available(self) -> bool:
+        return self.local.available or self.remote.available
+
+    def preload(self):
+        self.local.preload()
+        if self.remote.available:
+            self.remote.preload()
+
+    def shutdown(self):
+        self.local.shutdown()
+        self.remote.shutdown()
+
+    def _confident(self, result: Dict[str, Any]) -> bool:
+        return (not result.get('error') and result['is_transfer'] and result['amount'] > 0
+                and result.get('confidence', 0.0) >= self.threshold)
+
+    async def _analyze(self, image_data, mime_type, timeout):
+        local = await self.local.analyze(image_data, mime_type, timeout)
+        if self._confident(local) or not self.remote.available:
+            self.stats['local'] += 1
+            return local
+        self.stats['escalated'] += 1
+        remote = await self.remote.analyze(image_data, mime_type, timeout)
+        if remote.get('error') and not local.get('error'):
+            return {**local, 'degraded': True}
+        return remote
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**super().snapshot(), 'local_backend': self.local.snapshot(),
+                'remote_backend': self.remote.snapshot()}
+
+
+def create_backend(name: str, gemini=None, tesseract_lang: str = 'eng',
+                   timeout: float = 10, threshold: float = 0.8) -> OCRBackend:
+    """
+    Buat backend sesuai OCR_BACKEND.
+
+    Args:
+        gemini: GeminiClient (untuk 'gemini' & 'cascade')
+
+    Raises:
+        ValueError: Nama backend tidak dikenal
+    """
+    if name == 'gemini':
+        return GeminiBackend(gemini)
+    if name == 'tesseract':
+        return TesseractBackend(lang=tesseract_lang, timeout=timeout)
+    if name == 'stub':
+        return StubBackend()
+    if name == 'cascade':
+        return CascadeBackend(TesseractBackend(lang=tesseract_lang, timeout=timeout),
+                              GeminiBackend(gemini), threshold=threshold)
+    raise ValueError(f"OCR_BACKEND harus salah satu dari {', '.join(BACKENDS)}, bukan '{name}'")
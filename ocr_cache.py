@@ -0,0 +1,176 @@
+"""
+Cache hasil OCR & penjaga struk ganda (tabel ocr_cache)
+- file_unique_id Telegram: foto yang di-forward ulang → cocok tanpa perlu diunduh
+- sha256 isi file: file yang sama dikirim ulang sebagai foto baru
+- dHash 64-bit: screenshot ulang dari struk yang sama (byte beda, gambar mirip)
+
+Kecocokan persis (file_unique_id / sha256) memakai hasil tersimpan tanpa
+memanggil Gemini. Kecocokan dHash hanya petunjuk: struk dari aplikasi bank yang
+sama bisa sangat mirip walau nominalnya beda, jadi gambar tetap dianalisa dan
+baru dianggap ganda jika nominalnya sama dengan transaksi yang sudah tercatat.
+Entry yang lebih tua dari retention_days dibuang oleh job prune berkala.
+"""
+
+import hashlib
+import io
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MATCH_FILE = 'file'
+MATCH_SHA256 = 'sha256'
+MATCH_DHASH = 'dhash'
+
+
+class OCRCacheEntry(NamedTuple):
+    id: int
+    result: Dict[str, Any]
+    transaction_id: Optional[int]
+    match: Optional[str]  # None = hasil baru (bukan dari cache)
+
+    @property
+    def exact(self) -> bool:
+        return self.match in (MATCH_FILE, MATCH_SHA256)
+
+
+def dhash_image(image, size: int = 8) -> int:
+    """
+    Difference hash gambar PIL: diperkecil jadi (size+1)×size grayscale, tiap
+    bit = piksel lebih terang dari tetangga kanannya.
+    """
+    from PIL import Image
+
+    pixels = image.convert('L').resize((size + 1, size), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def dhash(image_data: bytes, size: int = 8) -> Optional[int]:
+    """dHash dari bytes gambar; None jika gambar tidak terbaca"""
+    from PIL import Image  # hanya dibutuhkan saat ada foto masuk
+
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            return dhash_image(image, size)
+    except Exception as e:
+        logger.debug(f"dHash skipped: {e}")
+        return None
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def image_fingerprint(image_data: bytes) -> Tuple[str, Optional[int]]:
+    """(sha256 hex, dHash) — CPU-bound, jalankan di thread dari event loop"""
+    return hashlib.sha256(image_data).hexdigest(), dhash(image_data)
+
+
+class OCRCache:
+    """
+    Lookup & simpan hasil OCR.
+
+    Args:
+        storage: Storage (tabel ocr_cache)
+        max_distance: Selisih bit dHash maksimal agar dua gambar dianggap mirip
+        window_days: Hanya cache sekian hari terakhir yang dibandingkan dHash-nya
+        retention_days: Umur maksimal entry cache sebelum dibuang prune()
+    """
+
+    def __init__(self, storage, max_distance: int = 10, window_days: int = 30, retention_days: int = 90):
+        self.storage = storage
+        self.max_distance = max_distance
+        self.window_days = window_days
+        self.retention_days = retention_days
+        self.stats = {'hits_file': 0, 'hits_sha256': 0, 'similar': 0, 'misses': 0, 'duplicates': 0}
+
+    def find_by_file(self, file_unique_id: str) -> Optional[OCRCacheEntry]:
+        """Cek sebelum mengunduh foto"""
+        row = self.storage.find_ocr_cache(file_unique_id=file_unique_id)
+        if row is None:
+            return None
+        self.stats['hits_file'] += 1
+        return self._entry(row, MATCH_FILE)
+
+    def find_by_content(self, file_unique_id: str, sha256: str,
+                        image_hash: Optional[int]) -> Optional[OCRCacheEntry]:
+        """
+        Cari berdasarkan isi gambar. Kecocokan sha256 dicatat ulang dengan
+        file_unique_id baru supaya kiriman berikutnya cocok tanpa unduh.
+        """
+        row = self.storage.find_ocr_cache(sha256=sha256)
+        if row is not None:
+            self.stats['hits_sha256'] += 1
+            cache_id, result, transaction_id = row
+            self.storage.add_ocr_cache(file_unique_id, sha256, _hex(image_hash), result, transaction_id)
+            return self._entry(row, MATCH_SHA256)
+
+        if image_hash is not None:
+            # Hanya entry yang sudah tercatat sebagai transaksi (kemiripan dipakai untuk cek ganda)
+            since = _utc_days_ago(self.window_days)
+            best = None
+            for cache_id, stored_hash, result, transaction_id in self.storage.get_ocr_cache_hashes(since):
+                distance = hamming(image_hash, int(stored_hash, 16))
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, (cache_id, result, transaction_id))
+            if best is not None:
+                self.stats['similar'] += 1
+                return self._entry(best[1], MATCH_DHASH)
+
+        self.stats['misses'] += 1
+        return None
+
+    def store(self, file_unique_id: str, sha256: str, image_hash: Optional[int],
+              result: Dict[str, Any], similar: Optional[OCRCacheEntry] = None) -> OCRCacheEntry:
+        """
+        Simpan hasil OCR baru, belum terhubung ke transaksi (link_transaction
+        setelah dicatat). `similar` = entry mirip (dHash) yang ditemukan
+        sebelumnya: transaksinya hanya dibawa di entry yang dikembalikan untuk
+        cek struk ganda, tidak disimpan, karena kemiripan saja bukan bukti.
+        """
+        encoded = json.dumps(result, sort_keys=True)
+        cache_id = self.storage.add_ocr_cache(file_unique_id, sha256, _hex(image_hash), encoded)
+        if similar is None:
+            return OCRCacheEntry(cache_id, result, None, None)
+        return OCRCacheEntry(cache_id, result, similar.transaction_id, MATCH_DHASH)
+
+    def link_transaction(self, cache_id: int, transaction_id: int):
+        """Tandai hasil OCR sudah dicatat sebagai transaksi"""
+        self.storage.set_ocr_cache_transaction(cache_id, transaction_id)
+
+    def discard(self, cache_id: int):
+        """Buang hasil OCR yang dibatalkan user, supaya kiriman ulang ditanyakan lagi"""
+        self.storage.delete_ocr_cache(cache_id=cache_id)
+
+    def prune(self) -> int:
+        """Buang entry yang lebih tua dari retention_days. Returns: jumlah entry"""
+        removed = self.storage.delete_ocr_cache(before=_utc_days_ago(self.retention_days))
+        if removed:
+            logger.info(f"OCR cache pruned: {removed} entries older than {self.retention_days} days")
+        return removed
+
+    def snapshot(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+    @staticmethod
+    def _entry(row: Tuple, match: str) -> OCRCacheEntry:
+        cache_id, result, transaction_id = row
+        return OCRCacheEntry(cache_id, json.loads(result), transaction_id, match)
+
+
+def _utc_days_ago(days: int) -> str:
+    # Format created_at = CURRENT_TIMESTAMP SQLite (UTC)
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _hex(image_hash: Optional[int]) -> Optional[str]:
+    # Disimpan sebagai teks: INTEGER SQLite bertanda, dHash 64-bit bisa melewatinya
+    return None if image_hash is None else f'{image_hash:016x}'
@@ -0,0 +1,60 @@
+"""
+Kirim hasil OCR dari n8n ke chat (konfirmasi simpan atau info gagal)
+Dipakai bersama oleh webapp.py (mode webhook) dan ocr_endpoint.py (proses terpisah)
+"""
+
+import logging
+from typing import Optional
+
+from views import ocr_confirm_keyboard
+
+logger = logging.getLogger(__name__)
+
+
+async def send_ocr_result(bot, storage, chat_id: int, message_id: int, is_tf_receipt: bool,
+                          amount: Optional[int] = None, raw_text: Optional[str] = None,
+                          confidence: Optional[float] = None):
+    """
+    Balas foto asli dengan hasil OCR.
+
+    Bukti transfer dengan nominal → disimpan di ocr_pending lalu dikirim pesan
+    konfirmasi + tombol Simpan/Batal, selain itu → pesan bahwa gambar bukan
+    bukti transfer yang valid.
+    """
+    if is_tf_receipt and amount:
+        message = (
+            f"🔍 *OCR Detected*\n\n"
+            f"Terbaca: *Transfer Masuk*\n"
+            f"Jumlah: *Rp{amount:,}*\n\n"
+            f"Simpan sebagai transaksi hari ini?"
+        )
+        if confidence:
+            message += f"\n_Confidence: {confidence*100:.1f}%_"
+
+        pending_id = storage.add_ocr_pending(chat_id, message_id, amount, raw_text, confidence, backend='n8n')
+        await bot.send_message(
+            chat_id=chat_id,
+            text=message,
+            reply_to_message_id=message_id,
+            reply_markup=ocr_confirm_keyboard(pending_id),
+            parse_mode='Markdown'
+        )
+        logger.info(f"Confirmation message sent for amount {amount} (pending {pending_id})")
+        return
+
+    # Bukan bukti transfer atau gagal detect amount
+    if raw_text:
+        message = (
+            f"🔍 *OCR Processed*\n\n"
+            f"Gambar diproses tapi tidak terdeteksi sebagai bukti transfer yang valid.\n\n"
+            f"_Raw text: {raw_text[:100]}..._"
+        )
+    else:
+        message = "🔍 Gambar diproses tapi tidak ada teks yang terdeteksi."
+
+    await bot.send_message(
+        chat_id=chat_id,
+        text=message,
+        reply_to_message_id=message_id,
+        parse_mode='Markdown'
+    )
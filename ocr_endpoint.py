@@ -2,40 +2,45 @@
 OPTIONAL: OCR Callback Endpoint menggunakan FastAPI
 Endpoint ini menerima hasil OCR dari n8n
 
-CATATAN: File ini OPSIONAL dan untuk future implementation.
-Bot utama (bot.py) sudah bisa jalan tanpa file ini.
+CATATAN: File ini OPSIONAL. Dengan RUN_MODE=webhook, route yang sama sudah
+dilayani langsung oleh bot (lihat webapp.py) sehingga file ini tidak perlu
+dijalankan. Tetap tersedia untuk mode polling.
 
-Jika ingin mengaktifkan OCR callback:
+Jika ingin mengaktifkan OCR callback di mode polling:
 1. Install FastAPI dan uvicorn (uncomment di requirements.txt)
 2. Jalankan file ini terpisah: uvicorn ocr_endpoint:app --host 0.0.0.0 --port 8000
 3. Set N8N_OCR_URL di .env mengarah ke endpoint ini
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional
 import logging
-from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Bot
 from config import Config
-import asyncio
+from storage import Storage
+from ocr_callback import send_ocr_result
+from webapp import OCRResult
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Toko Bot OCR Callback")
-
 # Load config
+Config.validate()
 config = Config()
 
+# Satu Bot (dan pool koneksi HTTP-nya) untuk semua callback; pending OCR
+# disimpan di database yang sama dengan bot supaya tombol Simpan bisa diproses
+bot = Bot(token=config.TELEGRAM_BOT_TOKEN)
+storage = Storage(config.DB_PATH)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with bot:
+        yield
+
 
-class OCRResult(BaseModel):
-    """Model untuk hasil OCR dari n8n"""
-    chat_id: int
-    message_id: int
-    is_tf_receipt: bool
-    amount: Optional[int] = None
-    raw_text: Optional[str] = None
-    confidence: Optional[float] = None
+app = FastAPI(title="Toko Bot OCR Callback", lifespan=lifespan)
 
 
 @app.post("/ocr-transfer-result")
@@ -56,58 +61,16 @@ async def ocr_transfer_result(result: OCRResult):
     try:
         logger.info(f"OCR result received: {result.dict()}")
 
-        # Inisialisasi bot
-        bot = Bot(token=config.TELEGRAM_BOT_TOKEN)
-
-        if result.is_tf_receipt and result.amount:
-            # Format pesan konfirmasi
-            message = (
-                f"🔍 *OCR Detected*\n\n"
-                f"Terbaca: *Transfer Masuk*\n"
-                f"Jumlah: *Rp{result.amount:,}*\n\n"
-                f"Simpan sebagai transaksi hari ini?"
-            )
-
-            if result.confidence:
-                message += f"\n_Confidence: {result.confidence*100:.1f}%_"
-
-            # Buat inline keyboard untuk konfirmasi
-            keyboard = [
-                [
-                    InlineKeyboardButton("✅ Simpan", callback_data=f"ocr_save_{result.amount}_{result.message_id}"),
-                    InlineKeyboardButton("❌ Batal", callback_data=f"ocr_cancel_{result.message_id}")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
-            # Kirim pesan ke Telegram
-            await bot.send_message(
-                chat_id=result.chat_id,
-                text=message,
-                reply_to_message_id=result.message_id,
-                reply_markup=reply_markup,
-                parse_mode='Markdown'
-            )
-
-            logger.info(f"Confirmation message sent for amount {result.amount}")
-
-        else:
-            # Bukan bukti transfer atau gagal detect amount
-            if result.raw_text:
-                message = (
-                    f"🔍 *OCR Processed*\n\n"
-                    f"Gambar diproses tapi tidak terdeteksi sebagai bukti transfer yang valid.\n\n"
-                    f"_Raw text: {result.raw_text[:100]}..._"
-                )
-            else:
-                message = "🔍 Gambar diproses tapi tidak ada teks yang terdeteksi."
-
-            await bot.send_message(
-                chat_id=result.chat_id,
-                text=message,
-                reply_to_message_id=result.message_id,
-                parse_mode='Markdown'
-            )
+        await send_ocr_result(
+            bot,
+            storage,
+            chat_id=result.chat_id,
+            message_id=result.message_id,
+            is_tf_receipt=result.is_tf_receipt,
+            amount=result.amount,
+            raw_text=result.raw_text,
+            confidence=result.confidence,
+        )
 
         return {"status": "success", "message": "OCR result processed"}
 
@@ -5,37 +5,70 @@ Menangani OCR dan ekstraksi data dari gambar bukti transfer
 
 import os
 import json
+import asyncio
 import logging
-import google.generativeai as genai
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, Any
 from config import Config
 
 logger = logging.getLogger(__name__)
 
 class GeminiClient:
-    def __init__(self):
-        api_key = Config.GEMINI_API_KEY
-        if not api_key:
+    MODEL_NAME = 'gemini-2.0-flash'
+
+    def __init__(self, timeout: Optional[float] = None, max_workers: Optional[int] = None):
+        # google.generativeai baru di-import saat model pertama kali dipakai
+        # (import-nya ~1 detik, jauh lebih lambat dari seluruh startup bot)
+        self.api_key = Config.GEMINI_API_KEY
+        self.timeout = timeout or Config.OCR_TIMEOUT
+        self._model = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        # SDK Gemini sinkron → dijalankan di thread pool terbatas, bukan di event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.OCR_MAX_WORKERS, thread_name_prefix='gemini'
+        )
+        if not self.api_key:
             logger.warning("GEMINI_API_KEY not found in environment variables")
-            self.model = None
-            return
 
-        try:
-            genai.configure(api_key=api_key)
-            # Menggunakan Gemini 2.0 Flash karena tersedia di list user
-            # Mode flash sangat cocok untuk tugas OCR simpel
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
-            logger.info("GeminiClient initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize GeminiClient: {e}")
-            self.model = None
-
-    def analyze_transfer_image(self, image_data: bytes) -> Dict[str, Any]:
+    @property
+    def model(self):
+        """Model Gemini (None jika API key tidak ada / gagal inisialisasi)"""
+        if not self._loaded:
+            self.preload()
+        return self._model
+
+    def preload(self):
+        """Import & konfigurasi Gemini sekarang (aman dipanggil dari thread lain)"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.api_key:
+                return
+            try:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self.api_key)
+                # Menggunakan Gemini 2.0 Flash karena tersedia di list user
+                # Mode flash sangat cocok untuk tugas OCR simpel
+                self._model = genai.GenerativeModel(self.MODEL_NAME)
+                logger.info("GeminiClient initialized successfully")
+            except Exception as e:
+                logger.error(f"Failed to initialize GeminiClient: {e}")
+                self._model = None
+
+    def analyze_transfer_image(self, image_data: bytes, timeout: Optional[float] = None,
+                               mime_type: str = 'image/jpeg') -> Dict[str, Any]:
         """
-        Menganalisa gambar bukti transfer menggunakan Gemini
+        Menganalisa gambar bukti transfer menggunakan Gemini (blocking,
+        dari event loop pakai analyze_transfer_image_async)
 
         Args:
             image_data: Bytes data dari gambar
+            timeout: Batas waktu request (detik), default self.timeout
+            mime_type: Tipe gambar (lihat ocr_preprocess.prepare_image)
 
         Returns:
             Dict dengan format:
@@ -44,7 +77,8 @@ class GeminiClient:
                 "amount": int,
                 "confidence": float,
                 "reason": str,
-                "raw_response": str (optional)
+                "raw_response": str (optional),
+                "error": True jika analisa gagal (bukan jawaban AI, jangan di-cache)
             }
         """
         if not self.model:
@@ -52,7 +86,8 @@ class GeminiClient:
                 "is_transfer": False,
                 "amount": 0,
                 "confidence": 0.0,
-                "reason": "Gemini client not initialized (API Key missing?)"
+                "reason": "Gemini client not initialized (API Key missing?)",
+                "error": True
             }
 
         try:
@@ -75,10 +110,11 @@ class GeminiClient:
             """
 
             # Gemini menerima list parts, bisa text dan image bytes
-            response = self.model.generate_content([
-                {'mime_type': 'image/jpeg', 'data': image_data},
-                prompt
-            ])
+            response = self.model.generate_content(
+                [{'mime_type': mime_type, 'data': image_data}, prompt],
+                # Batas waktu di sisi SDK supaya thread tidak tertahan setelah wait_for menyerah
+                request_options={'timeout': timeout or self.timeout}
+            )
 
             # Clean up response text to ensure it's valid JSON
             text_response = response.text.strip()
@@ -115,7 +151,8 @@ class GeminiClient:
                     "is_transfer": False,
                     "amount": 0,
                     "confidence": 0.0,
-                    "reason": "Gagal parsing respon AI"
+                    "reason": "Gagal parsing respon AI",
+                    "error": True
                 }
 
         except Exception as e:
@@ -124,5 +161,35 @@ class GeminiClient:
                 "is_transfer": False,
                 "amount": 0,
                 "confidence": 0.0,
-                "reason": f"Error sistem: {str(e)}"
+                "reason": f"Error sistem: {str(e)}",
+                "error": True
+            }
+
+    async def analyze_transfer_image_async(self, image_data: bytes, timeout: Optional[float] = None,
+                                           mime_type: str = 'image/jpeg') -> Dict[str, Any]:
+        """
+        Versi async analyze_transfer_image: dijalankan di thread pool Gemini
+        dengan batas waktu, event loop tetap bebas melayani chat lain.
+        Hasil sama dengan analyze_transfer_image, plus `timed_out: True` (dan `error`) jika habis waktu.
+        """
+        timeout = timeout or self.timeout
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor, self.analyze_transfer_image, image_data, timeout, mime_type
+        )
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Gemini request timed out after {timeout:g}s")
+            return {
+                "is_transfer": False,
+                "amount": 0,
+                "confidence": 0.0,
+                "reason": f"AI tidak merespon dalam {timeout:g} detik",
+                "timed_out": True,
+                "error": True
             }
+
+    def shutdown(self):
+        """Hentikan thread pool (request yang sedang jalan dibiarkan selesai)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,90 @@
+"""
+Persiapan gambar sebelum dikirim ke Gemini
+- Pilih ukuran foto Telegram terkecil yang masih terbaca (tidak selalu yang terbesar)
+- Buang tepi polos, ubah ke grayscale, perkecil & kompres ulang ke JPEG
+- Sekalian hitung sha256 & dHash untuk cache OCR (gambar hanya di-decode sekali)
+Semua langkah CPU-bound: jalankan prepare_image di thread, bukan di event loop.
+"""
+
+import hashlib
+import io
+import logging
+from typing import NamedTuple, Optional, Sequence
+
+from ocr_cache import dhash_image
+
+logger = logging.getLogger(__name__)
+
+# Selisih warna dari pojok kiri atas yang masih dianggap "tepi polos"
+_BORDER_TOLERANCE = 16
+
+
+class PreparedImage(NamedTuple):
+    data: bytes               # payload untuk Gemini
+    mime_type: str
+    sha256: str               # dari file asli (kunci cache)
+    dhash: Optional[int]      # None jika gambar tidak bisa dibaca
+    original_size: int        # byte file asli
+
+
+def choose_photo_size(photos: Sequence, min_side: int):
+    """
+    PhotoSize terkecil yang sisi panjangnya >= min_side, atau yang terbesar
+    jika tidak ada. Telegram mengirim beberapa ukuran dari satu foto; teks struk
+    sudah terbaca jelas jauh sebelum ukuran aslinya.
+    """
+    by_area = sorted(photos, key=lambda photo: photo.width * photo.height)
+    for photo in by_area:
+        if max(photo.width, photo.height) >= min_side:
+            return photo
+    return by_area[-1]
+
+
+def _trim_border(image):
+    """Potong tepi berwarna polos (margin foto/scan), sisakan sedikit ruang"""
+    from PIL import Image, ImageChops
+
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    mask = ImageChops.difference(image, background).point(lambda v: 255 if v > _BORDER_TOLERANCE else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return image
+    pad = 8
+    left, top, right, bottom = bbox
+    bbox = (max(left - pad, 0), max(top - pad, 0),
+            min(right + pad, image.width), min(bottom + pad, image.height))
+    if (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) > 0.9 * image.width * image.height:
+        return image  # tepinya tipis, tidak sebanding dengan biaya crop
+    return image.crop(bbox)
+
+
+def prepare_image(buffer: io.BytesIO, max_side: int = 1600, quality: int = 85) -> PreparedImage:
+    """
+    Siapkan file foto (hasil download_to_memory) untuk OCR.
+    Hasil kompres ulang hanya dipakai jika lebih kecil dari file aslinya.
+    """
+    from PIL import Image, ImageOps
+
+    with buffer.getbuffer() as view:
+        sha256 = hashlib.sha256(view).hexdigest()
+        original_size = view.nbytes
+
+    try:
+        buffer.seek(0)
+        with Image.open(buffer) as image:
+            mime_type = Image.MIME.get(image.format, 'image/jpeg')
+            image_hash = dhash_image(image)
+            gray = ImageOps.exif_transpose(image).convert('L')
+    except Exception as e:
+        logger.debug(f"Preprocess skipped, sending original: {e}")
+        return PreparedImage(buffer.getvalue(), 'image/jpeg', sha256, None, original_size)
+
+    gray = _trim_border(gray)
+    if max(gray.size) > max_side:
+        gray.thumbnail((max_side, max_side), Image.LANCZOS)
+    output = io.BytesIO()
+    gray.save(output, 'JPEG', quality=quality, optimize=True)
+
+    if output.tell() >= original_size:
+        return PreparedImage(buffer.getvalue(), mime_type, sha256, image_hash, original_size)
+    return PreparedImage(output.getvalue(), 'image/jpeg', sha256, image_hash, original_size)
@@ -0,0 +1,198 @@
+"""
+Antrean job OCR dengan worker pool terbatas
+- Jumlah job yang berjalan bersamaan = jumlah worker
+- Adil per chat: chat dilayani bergiliran (round-robin), satu kasir yang
+  mengirim banyak foto tidak membuat chat lain menunggu semua fotonya
+- Kedalaman antrean dibatasi → OCRQueueFull (pengirim diberi tahu "antrian penuh")
+- Waktu tunggu & waktu proses dicatat untuk /metrik
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+class OCRQueueFull(Exception):
+    """Antrean OCR sudah mencapai batas kedalaman"""
+
+
+class OCRJob:
+    """Satu job OCR; hasil/exception tersedia lewat `future`"""
+
+    __slots__ = ('chat_id', 'func', 'future', 'enqueued_at', 'started_at')
+
+    def __init__(self, chat_id: Any, func: Callable[[], Awaitable[Any]]):
+        self.chat_id = chat_id
+        self.func = func
+        self.future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None
+
+
+class OCRQueue:
+    """
+    Antrean OCR bersama untuk semua chat.
+
+    Args:
+        workers: Jumlah job yang diproses bersamaan
+        max_depth: Maksimal job yang menunggu (belum diproses)
+    """
+
+    def __init__(self, workers: int = 4, max_depth: int = 20):
+        self.workers = workers
+        self.max_depth = max_depth
+        # chat_id → job menunggu; urutan dict = giliran chat berikutnya
+        self._chats: 'OrderedDict[Any, Deque[OCRJob]]' = OrderedDict()
+        self._depth = 0
+        self._available: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self.running = 0
+        self.wait_time = LatencyStats()
+        self.service_time = LatencyStats()
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'rejected': 0}
+
+    @property
+    def depth(self) -> int:
+        """Jumlah job yang menunggu worker"""
+        return self._depth
+
+    def _ensure_started(self):
+        # Dibuat saat job pertama supaya terikat ke event loop yang menjalankan bot
+        if self._available is None:
+            self._available = asyncio.Semaphore(0)
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+            logger.info(f"OCR queue started: {self.workers} workers, max depth {self.max_depth}")
+
+    def submit(self, chat_id: Any, func: Callable[[], Awaitable[Any]]) -> OCRJob:
+        """
+        Masukkan job ke antrean chat.
+
+        Raises:
+            OCRQueueFull: Jika sudah ada `max_depth` job menunggu
+        """
+        if self._depth >= self.max_depth:
+            self.stats['rejected'] += 1
+            raise OCRQueueFull(f"OCR queue full ({self._depth} waiting)")
+        self._ensure_started()
+
+        job = OCRJob(chat_id, func)
+        self._chats.setdefault(chat_id, deque()).append(job)
+        self._depth += 1
+        self.stats['submitted'] += 1
+        # Pengirim batal menunggu (future di-cancel) → keluarkan dari antrean
+        job.future.add_done_callback(lambda _: self._discard(job))
+        self._available.release()
+        return job
+
+    def _discard(self, job: OCRJob):
+        jobs = self._chats.get(job.chat_id)
+        if job.running or not jobs or job not in jobs:
+            return
+        jobs.remove(job)
+        self._depth -= 1
+        if not jobs:
+            del self._chats[job.chat_id]
+
+    def position(self, job: OCRJob) -> int:
+        """
+        Posisi job dalam urutan layanan (1 = berikutnya), 0 jika sedang/selesai diproses.
+        Mengikuti round-robin: putaran ke-i mengambil job ke-i dari setiap chat.
+        """
+        jobs = self._chats.get(job.chat_id)
+        if job.running or job.future.done() or not jobs or job not in jobs:
+            return 0
+        index = jobs.index(job)
+        ahead = 0
+        before = True
+        for chat_id, queued in self._chats.items():
+            if chat_id == job.chat_id:
+                before = False
+            ahead += min(len(queued), index)  # putaran sebelumnya
+            if before and len(queued) > index:
+                ahead += 1  # chat yang gilirannya lebih dulu di putaran yang sama
+        return ahead + 1
+
+    def _next_job(self) -> Optional[OCRJob]:
+        while self._chats:
+            chat_id, jobs = next(iter(self._chats.items()))
+            job = jobs.popleft()
+            if jobs:
+                self._chats.move_to_end(chat_id)  # giliran chat berikutnya
+            else:
+                del self._chats[chat_id]
+            self._depth -= 1
+            if not job.future.done():  # dibatalkan tapi callback _discard belum jalan
+                return job
+        return None
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            job = self._next_job()
+            if job is None:
+                continue  # job sudah dikeluarkan karena dibatalkan
+
+            job.started_at = time.monotonic()
+            self.wait_time.record(job.started_at - job.enqueued_at)
+            self.running += 1
+            # Job jalan sebagai task sendiri: pengirim batal (future di-cancel) → job ikut dihentikan
+            task = asyncio.ensure_future(job.func())
+            job.future.add_done_callback(lambda future, task=task: future.cancelled() and task.cancel())
+            try:
+                # asyncio.wait tidak membatalkan task jika worker sendiri yang dibatalkan
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            finally:
+                self.running -= 1
+                self.service_time.record(time.monotonic() - job.started_at)
+
+            if task.cancelled():
+                self.stats['cancelled'] += 1
+                if not job.future.done():
+                    job.future.cancel()
+            elif task.exception() is not None:
+                self.stats['failed'] += 1
+                if not job.future.done():
+                    job.future.set_exception(task.exception())
+            else:
+                self.stats['completed'] += 1
+                if not job.future.done():
+                    job.future.set_result(task.result())
+
+    async def stop(self):
+        """Hentikan worker; job yang masih menunggu dibatalkan"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for jobs in self._chats.values():
+            for job in jobs:
+                job.future.cancel()
+        self._chats.clear()
+        self._depth = 0
+        self._tasks = []
+        self._available = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'waiting': self._depth,
+            'running': self.running,
+            'workers': self.workers,
+            'wait_time': self.wait_time.snapshot(),
+            'service_time': self.service_time.snapshot(),
+            **self.stats,
+        }
@@ -0,0 +1,256 @@
+"""
+Rate limiter keluar (outbox) untuk python-telegram-bot
+- Token bucket global (~30 pesan/detik) dan per chat (privat ~1/detik, grup ~20/menit)
+- Jalur prioritas: balasan interaktif didahulukan dari push terjadwal (BULK)
+- RetryAfter (429) → semua pengiriman dijeda global lalu request diulang
+- Edit beruntun ke pesan yang sama yang belum terkirim digabung jadi satu
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional, Tuple
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+# Dipakai sebagai rate_limit_args untuk pengiriman latar belakang, misal:
+#   await bot.send_message(chat_id, text, rate_limit_args=BULK)
+BULK = {'priority': PRIORITY_BULK}
+
+# Endpoint edit yang boleh digabung (hanya versi terakhir yang dikirim)
+_COALESCE_ENDPOINTS = frozenset({'editMessageText', 'editMessageReplyMarkup', 'editMessageCaption'})
+
+_seq = itertools.count()
+
+
+class TokenBucket:
+    """Token bucket sederhana: `rate` token/detik, maksimal `capacity` token"""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        """Detik sampai satu token tersedia (0 jika sudah ada)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class _Lane:
+    """
+    Antrean prioritas di depan satu token bucket.
+    Hanya waiter terdepan (prioritas terkecil, lalu urutan datang) yang boleh
+    mengambil token; waiter lain menunggu notifikasi.
+    """
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.pause_until = 0.0
+        self._waiters = []
+        self._cond = asyncio.Condition()
+
+    @property
+    def idle(self) -> bool:
+        return not self._waiters
+
+    async def acquire(self, priority: int):
+        entry = (priority, next(_seq))
+        heapq.heappush(self._waiters, entry)
+        async with self._cond:
+            self._cond.notify_all()  # waiter baru bisa jadi terdepan
+            try:
+                while True:
+                    timeout = None
+                    if self._waiters[0] == entry:
+                        now = time.monotonic()
+                        delay = max(self.bucket.delay(now), self.pause_until - now)
+                        if delay <= 0:
+                            self.bucket.consume()
+                            return
+                        timeout = delay
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+
+class _PendingEdit:
+    """Edit yang menunggu giliran; edit berikutnya ke pesan sama mengganti isinya"""
+
+    __slots__ = ('args', 'kwargs', 'future', 'followers')
+
+    def __init__(self, args, kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.future = asyncio.get_running_loop().create_future()
+        self.followers = 0
+
+
+class OutboxRateLimiter(BaseRateLimiter[Dict[str, Any]]):
+    """
+    Rate limiter untuk Application.builder().rate_limiter(...).
+
+    rate_limit_args (opsional, per pemanggilan bot method):
+        {'priority': PRIORITY_BULK}  → jalur latar belakang
+        {'max_retries': 5}           → batas ulang saat RetryAfter
+
+    Args:
+        global_rate: Pesan per detik untuk seluruh bot
+        private_rate: Pesan per detik per chat privat
+        group_per_minute: Pesan per menit per grup
+        max_retries: Ulang maksimal saat kena RetryAfter
+    """
+
+    MAX_IDLE_CHATS = 1000
+
+    def __init__(self, global_rate: float = 30, private_rate: float = 1,
+                 group_per_minute: float = 20, max_retries: int = 3):
+        self.global_rate = global_rate
+        self.private_rate = private_rate
+        self.group_rate = group_per_minute / 60
+        self.max_retries = max_retries
+        self._global: Optional[_Lane] = None
+        self._chats: Dict[Any, _Lane] = {}
+        self._edits: Dict[Tuple, _PendingEdit] = {}
+        self.wait_time = LatencyStats()
+        self.stats = {'sent': 0, 'retry_after': 0, 'coalesced': 0}
+
+    async def initialize(self) -> None:
+        # Dibuat di sini supaya terikat ke event loop yang menjalankan bot
+        self._global = _Lane(TokenBucket(self.global_rate, self.global_rate))
+        logger.info(
+            f"OutboxRateLimiter ready: global {self.global_rate}/s, "
+            f"private {self.private_rate}/s, group {self.group_rate * 60:.0f}/min"
+        )
+
+    async def shutdown(self) -> None:
+        self._chats.clear()
+        self._edits.clear()
+
+    def _chat_lane(self, chat_id: Any) -> _Lane:
+        lane = self._chats.get(chat_id)
+        if lane is None:
+            if len(self._chats) >= self.MAX_IDLE_CHATS:
+                self._prune_chats()
+            # chat_id negatif / @username = grup atau channel
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = (TokenBucket(self.group_rate, 5) if is_group
+                      else TokenBucket(self.private_rate, 3))
+            lane = self._chats[chat_id] = _Lane(bucket)
+        return lane
+
+    def _prune_chats(self):
+        now = time.monotonic()
+        for chat_id in [cid for cid, lane in self._chats.items() if lane.idle and lane.bucket.is_full(now)]:
+            del self._chats[chat_id]
+
+    @staticmethod
+    def _chat_id(data: Dict[str, Any]):
+        chat_id = data.get('chat_id')
+        if isinstance(chat_id, str):
+            try:
+                return int(chat_id)
+            except ValueError:
+                return chat_id
+        return chat_id
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]],
+    ):
+        if self._global is None:
+            await self.initialize()
+        options = rate_limit_args or {}
+        priority = options.get('priority', PRIORITY_INTERACTIVE)
+        max_retries = options.get('max_retries', self.max_retries)
+        chat_id = self._chat_id(data)
+
+        key = pending = None
+        if endpoint in _COALESCE_ENDPOINTS:
+            key = (endpoint, chat_id, data.get('message_id'), data.get('inline_message_id'))
+            pending = self._edits.get(key)
+            if pending is not None:
+                # Edit sebelumnya belum terkirim → kirim versi terbaru saja
+                pending.args, pending.kwargs = args, kwargs
+                pending.followers += 1
+                self.stats['coalesced'] += 1
+                return await asyncio.shield(pending.future)
+            pending = self._edits[key] = _PendingEdit(args, kwargs)
+
+        try:
+            result = await self._send(callback, args, kwargs, chat_id, priority, max_retries, key, pending)
+        except BaseException as e:
+            self._finish_edit(key, pending, exception=e)
+            raise
+        self._finish_edit(key, pending, result=result)
+        return result
+
+    def _finish_edit(self, key, pending: Optional[_PendingEdit], result=None, exception=None):
+        if pending is None:
+            return
+        if self._edits.get(key) is pending:
+            del self._edits[key]
+        if not pending.followers or pending.future.done():
+            return
+        if exception is not None:
+            pending.future.set_exception(exception)
+        else:
+            pending.future.set_result(result)
+
+    async def _send(self, callback, args, kwargs, chat_id, priority, max_retries, key, pending):
+        queued = time.monotonic()
+        for attempt in range(max_retries + 1):
+            if chat_id is not None:
+                await self._chat_lane(chat_id).acquire(priority)
+            await self._global.acquire(priority)
+
+            if attempt == 0:
+                self.wait_time.record(time.monotonic() - queued)
+                if pending is not None:
+                    # Mulai kirim versi terbaru; edit berikutnya masuk antrean baru
+                    if self._edits.get(key) is pending:
+                        del self._edits[key]
+                    args, kwargs = pending.args, pending.kwargs
+
+            try:
+                result = await callback(*args, **kwargs)
+                self.stats['sent'] += 1
+                return result
+            except RetryAfter as e:
+                self.stats['retry_after'] += 1
+                if attempt == max_retries:
+                    logger.error(f"RetryAfter still hit after {max_retries} retries")
+                    raise
+                pause = time.monotonic() + e.retry_after + 0.1
+                self._global.pause_until = max(self._global.pause_until, pause)
+                logger.warning(f"Flood control: pausing outbox for {e.retry_after}s")
@@ -0,0 +1,197 @@
+"""
+Persistence PTB berbasis SQLite untuk state percakapan (context.user_data)
+- Cache di memori; setiap perubahan langsung dicatat untuk ditulis ke tabel
+  conversation_state (write-through)
+- Semua perubahan dalam satu putaran update_persistence PTB ditulis dalam satu
+  transaksi SQLite
+- TTL per key: key kedaluwarsa dibuang sebelum handler jalan dan saat prune(),
+  user tanpa state dilepas dari memori
+Hanya user_data yang disimpan; bot ini tidak memakai chat_data/bot_data/ConversationHandler.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+logger = logging.getLogger(__name__)
+
+
+class SQLitePersistence(BasePersistence):
+    """
+    Persistence untuk Application.builder().persistence(...).
+
+    Args:
+        storage: Storage (tabel conversation_state)
+        default_ttl: Umur key dalam detik sejak terakhir diubah
+        ttls: TTL khusus per key, misal {'pending_input': 900}
+        update_interval: Jarak (detik) PTB menyimpan perubahan ke persistence
+    """
+
+    def __init__(self, storage, default_ttl: float = 1800, ttls: Optional[Dict[str, float]] = None,
+                 update_interval: float = 5):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.storage = storage
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        # user_id → key → (value_json, expires_at)
+        self._cache: Dict[int, Dict[str, Tuple[str, float]]] = {}
+        # (user_id, key) → (value_json, expires_at), atau None untuk hapus
+        self._dirty: Dict[Tuple[int, str], Optional[Tuple[str, float]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {'flushes': 0, 'rows': 0, 'expired': 0}
+
+    def _ttl(self, key: str) -> float:
+        return self.ttls.get(key, self.default_ttl)
+
+    # ===== USER DATA =====
+
+    async def get_user_data(self) -> Dict[int, Dict[Any, Any]]:
+        now = time.time()
+        self.storage.delete_conversation_state(expired_before=now)
+        self._cache = {}
+        for user_id, key, value, expires_at in self.storage.get_conversation_state(now):
+            self._cache.setdefault(user_id, {})[key] = (value, expires_at)
+        logger.info(f"Conversation state loaded for {len(self._cache)} users")
+        return {
+            user_id: {key: json.loads(value) for key, (value, _) in entries.items()}
+            for user_id, entries in self._cache.items()
+        }
+
+    async def update_user_data(self, user_id: int, data: Dict[Any, Any]) -> None:
+        now = time.time()
+        entries = self._cache.setdefault(user_id, {})
+        for key, value in data.items():
+            if not isinstance(key, str):
+                continue
+            try:
+                encoded = json.dumps(value, sort_keys=True)
+            except (TypeError, ValueError):
+                logger.warning(f"user_data[{key!r}] of user {user_id} is not JSON-serializable, not persisted")
+                continue
+            current = entries.get(key)
+            if current is not None and current[0] == encoded:
+                continue
+            entries[key] = self._dirty[(user_id, key)] = (encoded, now + self._ttl(key))
+
+        for key in [key for key in entries if key not in data]:
+            del entries[key]
+            self._dirty[(user_id, key)] = None
+        if not entries:
+            del self._cache[user_id]
+        await self._flush_soon()
+
+    async def refresh_user_data(self, user_id: int, user_data: Dict[Any, Any]) -> None:
+        # Dipanggil PTB sebelum handler: key kedaluwarsa tidak terlihat oleh handler
+        if self._expire(user_id, user_data, time.time()):
+            await self._flush_soon()
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._cache.pop(user_id, None)
+        for dirty_key in [k for k in self._dirty if k[0] == user_id]:
+            del self._dirty[dirty_key]
+        self.storage.delete_conversation_state(user_id=user_id)
+
+    def _expire(self, user_id: int, user_data: Dict[Any, Any], now: float) -> int:
+        entries = self._cache.get(user_id)
+        if not entries:
+            return 0
+        expired = [key for key, (_, expires_at) in entries.items() if expires_at <= now]
+        for key in expired:
+            del entries[key]
+            user_data.pop(key, None)
+            self._dirty[(user_id, key)] = None
+        if not entries:
+            del self._cache[user_id]
+        self.stats['expired'] += len(expired)
+        return len(expired)
+
+    async def prune(self, application) -> int:
+        """
+        Buang key kedaluwarsa dan lepas user tanpa state dari application.user_data
+        (PTB membuat entry kosong untuk setiap user yang pernah mengirim update).
+
+        Returns: jumlah user yang dilepas
+        """
+        now = time.time()
+        dropped = 0
+        for user_id, data in list(application.user_data.items()):
+            self._expire(user_id, data, now)
+            if not data:
+                application.drop_user_data(user_id)
+                dropped += 1
+        self._write()
+        if dropped:
+            logger.info(f"Conversation state pruned: {dropped} idle users released")
+        return dropped
+
+    # ===== FLUSH =====
+
+    async def _flush_soon(self):
+        """
+        Tulis perubahan setelah semua update_user_data dalam putaran yang sama
+        (PTB memanggilnya bersamaan via gather) sempat mencatat perubahannya.
+        """
+        if not self._dirty:
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_batch())
+        await asyncio.shield(self._flush_task)
+
+    async def _flush_batch(self):
+        await asyncio.sleep(0)
+        self._write()
+
+    def _write(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        upserts = [(user_id, key) + entry for (user_id, key), entry in dirty.items() if entry is not None]
+        deletes = [dirty_key for dirty_key, entry in dirty.items() if entry is None]
+        self.storage.save_conversation_state(upserts, deletes)
+        self.stats['flushes'] += 1
+        self.stats['rows'] += len(dirty)
+
+    async def flush(self) -> None:
+        self._write()
+
+    # ===== TIDAK DIPAKAI =====
+
+    async def get_chat_data(self) -> Dict[int, Any]:
+        return {}
+
+    async def get_bot_data(self) -> Dict[Any, Any]:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> Dict:
+        return {}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data) -> None:
+        pass
+
+    async def update_bot_data(self, data) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data) -> None:
+        pass
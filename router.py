@@ -0,0 +1,151 @@
+"""
+Router untuk callback query (tombol inline)
+- callback_data yang persis sama → dict lookup O(1)
+- callback_data berawalan (misal `ledger_<dari>_<sampai>_<hal>`) → tabel prefix
+  yang dikelompokkan per segmen pertama, payload di-parse sesuai tipe field
+- Setiap query di-answer tepat satu kali, waktu per route dicatat. Route tanpa
+  teks answer di-answer kosong sebelum handler; route dengan teks answer di-answer
+  setelah handler selesai (teks route jika sukses, ERROR_TEXT jika gagal)
+"""
+
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+CallbackHandler = Callable[..., Awaitable[Any]]
+
+ERROR_TEXT = "❌ Terjadi kesalahan"
+STALE_TEXT = "⚠️ Tombol sudah tidak berlaku"
+
+
+class Route:
+    """Satu route callback: nama, handler, tipe field payload, teks answer jika sukses"""
+
+    __slots__ = ('name', 'handler', 'fields', 'answer', 'stats')
+
+    def __init__(self, name: str, handler: CallbackHandler,
+                 fields: Sequence[Callable[[str], Any]] = (), answer: str = ''):
+        self.name = name
+        self.handler = handler
+        self.fields = tuple(fields)
+        self.answer = answer
+        self.stats = LatencyStats()
+
+    def parse(self, payload: str) -> Tuple:
+        """
+        Parse payload menjadi tuple bertipe sesuai `fields`.
+        Field terakhir menampung sisa payload (boleh mengandung '_').
+
+        Raises:
+            ValueError: Jika jumlah/tipe field tidak cocok
+        """
+        if not self.fields:
+            return ()
+        parts = payload.split('_', len(self.fields) - 1)
+        if len(parts) != len(self.fields) or not all(parts):
+            raise ValueError(f"payload '{payload}' tidak cocok untuk route {self.name}")
+        return tuple(convert(part) for convert, part in zip(self.fields, parts))
+
+
+class CallbackRouter:
+    """
+    Dispatch callback_data ke handler terdaftar.
+
+    Handler dipanggil sebagai `handler(update, context, *payload)`.
+    Contoh:
+        router.exact('menu_main', show_menu)
+        router.prefix('ledger_', show_ledger, fields=(str, str, int))
+    """
+
+    def __init__(self):
+        self._exact: Dict[str, Route] = {}
+        # segmen pertama → [(prefix, route)] urut prefix terpanjang dulu
+        self._prefixes: Dict[str, List[Tuple[str, Route]]] = {}
+
+    @staticmethod
+    def _bucket(data: str) -> str:
+        return data.split('_', 1)[0]
+
+    def exact(self, data: str, handler: CallbackHandler, answer: str = ''):
+        """Daftarkan handler untuk callback_data yang persis sama"""
+        if data in self._exact:
+            raise ValueError(f"Route '{data}' sudah terdaftar")
+        self._exact[data] = Route(data, handler, answer=answer)
+
+    def prefix(self, prefix: str, handler: CallbackHandler,
+               fields: Sequence[Callable[[str], Any]] = (), answer: str = ''):
+        """Daftarkan handler untuk callback_data berawalan `prefix`; sisa data di-parse ke `fields`"""
+        bucket = self._prefixes.setdefault(self._bucket(prefix), [])
+        if any(existing == prefix for existing, _ in bucket):
+            raise ValueError(f"Prefix '{prefix}' sudah terdaftar")
+        bucket.append((prefix, Route(prefix + '*', handler, fields, answer)))
+        bucket.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def resolve(self, data: str) -> Tuple[Optional[Route], Tuple]:
+        """
+        Cari route + payload ter-parse untuk callback_data.
+
+        Returns:
+            (route, args) atau (None, ()) jika tidak ada route
+
+        Raises:
+            ValueError: Jika route ditemukan tapi payload tidak valid
+        """
+        route = self._exact.get(data)
+        if route is not None:
+            return route, ()
+        for prefix, route in self._prefixes.get(self._bucket(data), ()):
+            if data.startswith(prefix):
+                return route, route.parse(data[len(prefix):])
+        return None, ()
+
+    def routes(self) -> List[Route]:
+        """Semua route terdaftar (exact lalu prefix)"""
+        prefixed = [route for bucket in self._prefixes.values() for _, route in bucket]
+        return list(self._exact.values()) + prefixed
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Snapshot waktu per route yang pernah dipanggil"""
+        return {route.name: route.stats.snapshot() for route in self.routes() if route.stats.count}
+
+    async def dispatch(self, update, context):
+        """Handler PTB untuk CallbackQueryHandler"""
+        query = update.callback_query
+        data = query.data or ''
+
+        try:
+            route, args = self.resolve(data)
+        except ValueError as e:
+            logger.warning(f"Invalid callback payload: {e}")
+            await query.answer(STALE_TEXT)
+            return
+
+        if route is None:
+            logger.warning(f"Unknown callback_data: {data}")
+            await query.answer(STALE_TEXT)
+            return
+
+        # Teks answer route baru dikirim setelah handler sukses; tanpa teks → answer kosong sekarang
+        if not route.answer:
+            await query.answer()
+
+        started = time.monotonic()
+        try:
+            await route.handler(update, context, *args)
+        except Exception as e:
+            logger.error(f"Error in callback {route.name}: {e}")
+            try:
+                if route.answer:
+                    await query.answer(ERROR_TEXT)
+                await query.edit_message_text(ERROR_TEXT)
+            except Exception:
+                pass
+        else:
+            if route.answer:
+                await query.answer(route.answer)
+        finally:
+            route.stats.record(time.monotonic() - started)
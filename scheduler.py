@@ -1,21 +1,24 @@
 """
 Scheduler untuk generate rekap harian otomatis
 - 23:00 → DRAFT (hari ini)
-- 02:00 → FINAL (kemarin, with grace period)
+- 02:00 → FINAL (kemarin, with grace period) + update statistik anomali & proyeksi
 
 Diintegrasikan ke dalam bot.py process yang sama.
 """
 
 import logging
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING
+from typing import Awaitable, Callable, Dict, List, Optional, TYPE_CHECKING
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 if TYPE_CHECKING:
     from storage import Storage
     from logic import FinancialLogic
+    from anomaly import AnomalyDetector
+    from forecast import OmzetForecaster
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +31,15 @@ class RekapScheduler:
     - FINAL jam 02:00: finalisasi kemarin (after grace period)
     """
 
-    def __init__(self, storage: 'Storage', logic: 'FinancialLogic', timezone: str = "Asia/Jakarta"):
+    def __init__(self, storage: 'Storage', logic: 'FinancialLogic', timezone: str = "Asia/Jakarta",
+                 detector: Optional['AnomalyDetector'] = None,
+                 forecaster: Optional['OmzetForecaster'] = None):
         self.storage = storage
         self.logic = logic
+        self.detector = detector
+        self.forecaster = forecaster
+        # Callback async (date, flags) untuk push notifikasi anomali setelah FINAL
+        self.on_anomaly: Optional[Callable[[str, List[Dict]], Awaitable[None]]] = None
         self.timezone = timezone
         self.scheduler = AsyncIOScheduler(timezone=timezone)
         self._is_running = False
@@ -69,6 +78,16 @@ class RekapScheduler:
         logger.info("  - DRAFT: every day at 23:00")
         logger.info("  - FINAL: every day at 02:00 (for previous day)")
 
+    def add_interval_job(self, func: Callable, minutes: float, job_id: str):
+        """Tambah job pemeliharaan berkala (misal prune state percakapan)"""
+        self.scheduler.add_job(
+            func,
+            IntervalTrigger(minutes=minutes, timezone=self.timezone),
+            id=job_id,
+            name=f'{job_id} every {minutes:g} min',
+            replace_existing=True
+        )
+
     def stop(self):
         """Stop scheduler gracefully"""
         if self._is_running:
@@ -96,7 +115,7 @@ class RekapScheduler:
                 return None
 
             # Simpan sebagai DRAFT
-            summary_id = self.storage.save_daily_summary(
+            summary_id = self.save_summary(
                 date=target_date,
                 state='DRAFT',
                 summary_data=summary_data,
@@ -134,7 +153,7 @@ class RekapScheduler:
                 return None
 
             # Simpan sebagai FINAL
-            summary_id = self.storage.save_daily_summary(
+            summary_id = self.save_summary(
                 date=target_date,
                 state='FINAL',
                 summary_data=summary_data,
@@ -142,6 +161,8 @@ class RekapScheduler:
             )
 
             logger.info(f"FINAL saved for {target_date}, ID={summary_id}")
+
+            await self.process_final(target_date, summary_data)
             return summary_id
 
         except Exception as e:
@@ -164,7 +185,7 @@ class RekapScheduler:
             summary_data = self.logic.calculate_daily_summary(target_date)
 
             # Simpan sebagai REVISED
-            summary_id = self.storage.save_daily_summary(
+            summary_id = self.save_summary(
                 date=target_date,
                 state='REVISED',
                 summary_data=summary_data,
@@ -178,6 +199,43 @@ class RekapScheduler:
             logger.error(f"Error generating REVISED for {target_date}: {e}")
             return None
 
+    def save_summary(self, date: str, state: str, summary_data: dict, notes: str = None) -> int:
+        """
+        Simpan rekap harian (versi baru) lalu update rollup mingguan & bulanan.
+        Semua penyimpanan rekap (otomatis maupun manual) lewat sini supaya
+        weekly_rollups / monthly_rollups selalu sinkron.
+
+        Returns: summary ID
+        """
+        summary_id = self.storage.save_daily_summary(
+            date=date,
+            state=state,
+            summary_data=summary_data,
+            notes=notes
+        )
+        self.storage.refresh_rollups(date)
+        return summary_id
+
+    async def process_final(self, target_date: str, summary_data: dict):
+        """
+        Update model inkremental (anomali & proyeksi) dengan rekap FINAL,
+        lalu push flag anomali (jika ada). Masing-masing O(1) per hari.
+        Error di sini tidak boleh menggagalkan FINAL yang sudah tersimpan.
+        """
+        if self.forecaster is not None:
+            try:
+                self.forecaster.update(target_date, summary_data)
+            except Exception as e:
+                logger.error(f"Error updating forecast for {target_date}: {e}")
+
+        if self.detector is not None:
+            try:
+                flags = self.detector.observe(target_date, summary_data)
+                if flags and self.on_anomaly is not None:
+                    await self.on_anomaly(target_date, flags)
+            except Exception as e:
+                logger.error(f"Error processing anomalies for {target_date}: {e}")
+
     def trigger_draft_now(self, target_date: str = None):
         """
         Trigger DRAFT generation secara manual (untuk testing).
@@ -0,0 +1,88 @@
+"""
+Profil cold start bot: `python bot.py --profile-startup`
+- Waktu import per modul (python -X importtime di interpreter baru)
+- Waktu membuat TokoBot & Application (tanpa menghubungi Telegram)
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import List, NamedTuple
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(stderr: str) -> List[ImportTime]:
+    """Parse output `-X importtime` (satu baris per modul, indentasi 2 spasi per level)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.split('|', 2)
+        self_us = int(self_us.replace('import time:', ''))
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append(ImportTime(name.strip(), self_us, int(cumulative_us), depth))
+    return rows
+
+
+def direct_imports(rows: List[ImportTime]) -> List[ImportTime]:
+    """
+    Modul yang di-import langsung oleh modul terakhir (baris terakhir output).
+    importtime mencetak anak sebelum induknya, jadi anak langsung = baris
+    depth 1 setelah baris depth 0 sebelumnya.
+    """
+    children = []
+    for row in reversed(rows[:-1]):
+        if row.depth == 0:
+            break
+        if row.depth == 1:
+            children.append(row)
+    return children
+
+
+def measure_imports(module: str = 'bot') -> List[ImportTime]:
+    """Import `module` di interpreter baru dengan -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} gagal:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def _ms(us: float) -> str:
+    return f"{us / 1000:8.1f} ms"
+
+
+def profile_startup(bot_class, top: int = 15):
+    """Cetak rincian waktu startup: import per modul lalu pembuatan bot & Application"""
+    rows = measure_imports()
+    print("⏱️ Profil startup bot\n")
+    print(f"import bot: {_ms(rows[-1].cumulative_us)}\n")
+
+    direct = sorted(direct_imports(rows), key=lambda row: row.cumulative_us, reverse=True)
+    print(f"Import terlama (langsung dari bot.py, top {top}):")
+    for row in direct[:top]:
+        print(f"  {_ms(row.cumulative_us)}  {row.module}")
+
+    heaviest = sorted(rows, key=lambda row: row.self_us, reverse=True)
+    print(f"\nModul terberat (waktu sendiri, top {top}):")
+    for row in heaviest[:top]:
+        print(f"  {_ms(row.self_us)}  {row.module}")
+
+    started = time.perf_counter()
+    toko_bot = bot_class()
+    created = time.perf_counter()
+    toko_bot.build_application()
+    built = time.perf_counter()
+    print("\nInisialisasi:")
+    print(f"  {_ms((created - started) * 1e6)}  TokoBot()")
+    print(f"  {_ms((built - created) * 1e6)}  build_application()")
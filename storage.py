@@ -4,20 +4,84 @@ Layer ini bisa diganti dengan Google Sheets atau database lain di masa depan
 """
 
 import sqlite3
-from datetime import datetime
-from typing import List, Tuple, Optional
+import json
+from datetime import datetime, date as date_cls, timedelta
+from typing import Callable, Dict, List, Tuple, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Kolom agregat yang disimpan di weekly_rollups / monthly_rollups.
+# Urutan ini juga urutan hasil get_*_rollups() dan get_summary_totals().
+ROLLUP_FIELDS = (
+    'days', 'total_omzet', 'total_pos', 'total_tf', 'count_tf',
+    'total_pengeluaran', 'count_pengeluaran', 'total_selisih'
+)
+
+# Agregat dari rekap TERBARU per tanggal dalam range (parameter: start, end)
+_LATEST_SUMMARY_TOTALS_SQL = '''
+    SELECT COUNT(*),
+           COALESCE(SUM(ds.omzet_manual), 0),
+           COALESCE(SUM(ds.pos_total), 0),
+           COALESCE(SUM(ds.total_tf), 0),
+           COALESCE(SUM(ds.count_tf), 0),
+           COALESCE(SUM(ds.total_pengeluaran), 0),
+           COALESCE(SUM(ds.count_pengeluaran), 0),
+           COALESCE(SUM(ds.selisih), 0)
+    FROM daily_summaries ds
+    INNER JOIN (
+        SELECT date, MAX(version) as max_version
+        FROM daily_summaries
+        WHERE date BETWEEN ? AND ?
+        GROUP BY date
+    ) latest ON ds.date = latest.date AND ds.version = latest.max_version
+'''
+
+# TF & pengeluaran per slot waktu (parameter: menit slot, menit slot, start, end);
+# dijawab dari covering index idx_tanggal_waktu_tipe_jumlah
+_TIME_BUCKETS_SQL = '''
+    SELECT ((CAST(substr(waktu, 1, 2) AS INTEGER) * 60
+             + CAST(substr(waktu, 4, 2) AS INTEGER)) / ?) * ? AS slot,
+           tipe, COUNT(*), SUM(jumlah)
+    FROM transactions
+    WHERE tanggal BETWEEN ? AND ?
+      AND tipe IN ('tf', 'keluar')
+    GROUP BY slot, tipe
+    ORDER BY slot ASC, tipe ASC
+'''
+
+
+def week_bounds(day: date_cls) -> Tuple[date_cls, date_cls]:
+    """Senin dan Minggu dari minggu yang memuat tanggal tersebut"""
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=6)
+
+
+def month_bounds(day: date_cls) -> Tuple[date_cls, date_cls]:
+    """Tanggal pertama dan terakhir dari bulan yang memuat tanggal tersebut"""
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
 
 class Storage:
     """Class untuk handle penyimpanan data ke SQLite"""
 
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # Callback setelah transaksi berubah: fn(tanggal) — tanggal None jika tidak diketahui
+        self.on_change: Optional[Callable[[Optional[str]], None]] = None
         self._init_db()
 
+    def _notify_change(self, tanggal: Optional[str] = None):
+        """Panggil on_change (jika ada); error listener tidak boleh menggagalkan penyimpanan"""
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(tanggal)
+        except Exception as e:
+            logger.error(f"Error in storage on_change listener: {e}")
+
     def _init_db(self):
         """Inisialisasi database dan tabel"""
         conn = sqlite3.connect(self.db_path)
@@ -52,6 +116,12 @@ class Storage:
             ON transactions(tanggal, tipe)
         ''')
 
+        # Covering index untuk analitik per jam (tidak perlu baca tabel)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_tanggal_waktu_tipe_jumlah
+            ON transactions(tanggal, waktu, tipe, jumlah)
+        ''')
+
         # Tabel untuk rekap harian (v2)
         # Menyimpan snapshot rekap dengan versioning
         cursor.execute('''
@@ -89,10 +159,138 @@ class Storage:
             ON daily_summaries(date)
         ''')
 
+        # Rollup mingguan (Senin-Minggu) dan bulanan dari rekap terbaru per tanggal
+        # Di-maintain oleh RekapScheduler setiap rekap disimpan
+        rollup_columns = '''
+                days INTEGER NOT NULL DEFAULT 0,
+                total_omzet REAL NOT NULL DEFAULT 0,
+                total_pos REAL NOT NULL DEFAULT 0,
+                total_tf REAL NOT NULL DEFAULT 0,
+                count_tf INTEGER NOT NULL DEFAULT 0,
+                total_pengeluaran REAL NOT NULL DEFAULT 0,
+                count_pengeluaran INTEGER NOT NULL DEFAULT 0,
+                total_selisih REAL NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        '''
+
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS weekly_rollups (
+                week_start TEXT PRIMARY KEY,
+                week_end TEXT NOT NULL,
+                {rollup_columns}
+            )
+        ''')
+
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS monthly_rollups (
+                month TEXT PRIMARY KEY,
+                month_start TEXT NOT NULL,
+                month_end TEXT NOT NULL,
+                {rollup_columns}
+            )
+        ''')
+
+        # Statistik berjalan (EWMA mean/variance) per metrik rekap harian
+        # Di-update O(1) setiap ada rekap FINAL, tidak perlu scan history
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS summary_stats (
+                metric TEXT PRIMARY KEY,
+                n INTEGER NOT NULL DEFAULT 0,
+                mean REAL NOT NULL DEFAULT 0,
+                var REAL NOT NULL DEFAULT 0,
+                last_date TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Hasil deteksi anomali per tanggal
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS summary_anomalies (
+                date TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                value REAL NOT NULL,
+                mean REAL NOT NULL,
+                std REAL NOT NULL,
+                zscore REAL NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+                PRIMARY KEY (date, metric)
+            )
+        ''')
+
+        # State model proyeksi omzet (satu baris, di-update sekali per FINAL)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS forecast_state (
+                id INTEGER PRIMARY KEY CHECK(id = 1),
+                level REAL NOT NULL DEFAULT 0,
+                seasonal TEXT NOT NULL,
+                seasonal_n TEXT NOT NULL,
+                resid_var REAL NOT NULL DEFAULT 0,
+                n INTEGER NOT NULL DEFAULT 0,
+                last_date TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Pesan status live yang di-pin per chat (opt-in via /live)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS live_status (
+                chat_id INTEGER PRIMARY KEY,
+                message_id INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Hasil OCR (n8n / struk mirip) yang menunggu konfirmasi Simpan/Batal
+        # cache_id = entry ocr_cache yang dihubungkan ke transaksi saat disimpan,
+        # backend = asal hasil OCR (gemini/tesseract/.../n8n) untuk kolom sumber transaksi
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_pending (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id INTEGER NOT NULL,
+                message_id INTEGER NOT NULL,
+                amount REAL NOT NULL,
+                raw_text TEXT,
+                confidence REAL,
+                cache_id INTEGER,
+                backend TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Cache hasil OCR Gemini: per file Telegram, isi file (sha256) & kemiripan gambar (dHash)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_unique_id TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                dhash TEXT,
+                result TEXT NOT NULL,
+                transaction_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ocr_cache_file ON ocr_cache(file_unique_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ocr_cache_sha256 ON ocr_cache(sha256)')
+
+        # State percakapan per user (context.user_data), satu baris per key dengan TTL
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS conversation_state (
+                user_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (user_id, key)
+            )
+        ''')
+
         conn.commit()
         conn.close()
         logger.info(f"Database initialized at {self.db_path}")
 
+        self._backfill_rollups()
+
     def add_transaction(
         self,
         tanggal: str,
@@ -126,8 +324,46 @@ class Storage:
         conn.close()
 
         logger.info(f"Transaction added: ID={transaction_id}, tipe={tipe}, jumlah={jumlah}")
+        self._notify_change(tanggal)
         return transaction_id
 
+    def add_transactions_batch(self, transactions: List[Dict]) -> List[int]:
+        """
+        Menambahkan banyak transaksi sekaligus dalam SATU transaksi database
+        (semua tersimpan atau tidak sama sekali).
+
+        Args:
+            transactions: List dict dengan key sama seperti argumen add_transaction()
+
+        Returns: List transaction ID sesuai urutan input
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        ids = []
+        try:
+            for tx in transactions:
+                cursor.execute('''
+                    INSERT INTO transactions
+                    (tanggal, waktu, tipe, jumlah, sumber, keterangan,
+                     chat_id, user_id, message_id, file_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (tx['tanggal'], tx['waktu'], tx['tipe'], tx['jumlah'], tx['sumber'],
+                      tx.get('keterangan', ''), tx.get('chat_id', 0), tx.get('user_id', 0),
+                      tx.get('message_id', 0), tx.get('file_id')))
+                ids.append(cursor.lastrowid)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        logger.info(f"Batch transactions added: {len(ids)} rows")
+        for tanggal in {tx['tanggal'] for tx in transactions}:
+            self._notify_change(tanggal)
+        return ids
+
     def get_transactions_by_date(self, tanggal: str) -> List[Tuple]:
         """
         Mengambil semua transaksi untuk tanggal tertentu
@@ -234,6 +470,7 @@ class Storage:
 
         if affected > 0:
             logger.info(f"Transaction deleted: ID={transaction_id}")
+            self._notify_change()
             return True
         return False
 
@@ -257,6 +494,7 @@ class Storage:
 
         if affected > 0:
             logger.info(f"Transaction updated: ID={transaction_id}")
+            self._notify_change()
             return True
         return False
 
@@ -338,6 +576,7 @@ class Storage:
 
         if affected > 0:
             logger.info(f"All transactions deleted for date: {tanggal}, count: {affected}")
+            self._notify_change(tanggal)
 
         return affected
 
@@ -522,3 +761,646 @@ class Storage:
         conn.close()
 
         return results
+
+    # ===== ROLLUP METHODS =====
+
+    def _refresh_rollups_cursor(self, cursor, day: date_cls):
+        """Hitung ulang rollup minggu & bulan yang memuat tanggal (maks 31 baris dibaca)"""
+        week_start, week_end = week_bounds(day)
+        cursor.execute(_LATEST_SUMMARY_TOTALS_SQL, (week_start.isoformat(), week_end.isoformat()))
+        totals = cursor.fetchone()
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO weekly_rollups
+            (week_start, week_end, {', '.join(ROLLUP_FIELDS)})
+            VALUES (?, ?, {', '.join('?' * len(ROLLUP_FIELDS))})
+        ''', (week_start.isoformat(), week_end.isoformat()) + tuple(totals))
+
+        month_start, month_end = month_bounds(day)
+        cursor.execute(_LATEST_SUMMARY_TOTALS_SQL, (month_start.isoformat(), month_end.isoformat()))
+        totals = cursor.fetchone()
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO monthly_rollups
+            (month, month_start, month_end, {', '.join(ROLLUP_FIELDS)})
+            VALUES (?, ?, ?, {', '.join('?' * len(ROLLUP_FIELDS))})
+        ''', (month_start.strftime('%Y-%m'), month_start.isoformat(), month_end.isoformat()) + tuple(totals))
+
+    def refresh_rollups(self, date: str):
+        """
+        Update rollup mingguan & bulanan untuk tanggal yang rekapnya baru disimpan.
+        Dipanggil oleh RekapScheduler setelah DRAFT/FINAL/REVISED.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        self._refresh_rollups_cursor(cursor, datetime.strptime(date, '%Y-%m-%d').date())
+
+        conn.commit()
+        conn.close()
+
+    def _backfill_rollups(self):
+        """
+        Bangun rollup untuk database lama yang sudah punya rekap
+        tapi belum punya tabel rollup (sekali jalan saat startup).
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT EXISTS(SELECT 1 FROM daily_summaries),
+                   EXISTS(SELECT 1 FROM monthly_rollups)
+        ''')
+        has_summaries, has_rollups = cursor.fetchone()
+
+        if has_summaries and not has_rollups:
+            cursor.execute('SELECT DISTINCT date FROM daily_summaries')
+            weeks = {}
+            for (date,) in cursor.fetchall():
+                day = datetime.strptime(date, '%Y-%m-%d').date()
+                weeks[(week_bounds(day)[0], day.strftime('%Y-%m'))] = day
+            for day in weeks.values():
+                self._refresh_rollups_cursor(cursor, day)
+            conn.commit()
+            logger.info(f"Rollups backfilled for {len(weeks)} week/month pairs")
+
+        conn.close()
+
+    def get_weekly_rollups(self, week_starts: List[str]) -> List[Tuple]:
+        """
+        Ambil rollup mingguan untuk daftar week_start (Senin, YYYY-MM-DD).
+
+        Returns: List of tuples (week_start, *ROLLUP_FIELDS)
+        """
+        if not week_starts:
+            return []
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f'''
+            SELECT week_start, {', '.join(ROLLUP_FIELDS)}
+            FROM weekly_rollups
+            WHERE week_start IN ({', '.join('?' * len(week_starts))})
+        ''', tuple(week_starts))
+
+        results = cursor.fetchall()
+        conn.close()
+
+        return results
+
+    def get_monthly_rollups(self, months: List[str]) -> List[Tuple]:
+        """
+        Ambil rollup bulanan untuk daftar bulan (YYYY-MM).
+
+        Returns: List of tuples (month, *ROLLUP_FIELDS)
+        """
+        if not months:
+            return []
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(f'''
+            SELECT month, {', '.join(ROLLUP_FIELDS)}
+            FROM monthly_rollups
+            WHERE month IN ({', '.join('?' * len(months))})
+        ''', tuple(months))
+
+        results = cursor.fetchall()
+        conn.close()
+
+        return results
+
+    def get_summary_totals(self, start_date: str, end_date: str) -> Tuple:
+        """
+        Agregat rekap terbaru per tanggal dalam range, dihitung di SQL.
+        Dipakai untuk potongan hari di tepi range yang tidak tercakup rollup.
+
+        Returns: Tuple sesuai urutan ROLLUP_FIELDS
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(_LATEST_SUMMARY_TOTALS_SQL, (start_date, end_date))
+
+        result = cursor.fetchone()
+        conn.close()
+
+        return result
+
+    # ===== LEDGER =====
+
+    def get_ledger(self, start_date: str, end_date: str, limit: int = 20, offset: int = 0) -> List[Tuple]:
+        """
+        Buku kas dengan saldo berjalan, dihitung sepenuhnya di SQL (window function).
+
+        Urutan per hari: modal → keluar → cash (checkpoint laci) → tf.
+        - laci           : saldo laci berjalan. Modal menambah (modal terakhir
+                           menggantikan yang lama), keluar mengurangi, cash
+                           menimpa dengan hasil hitung fisik.
+        - masuk          : pemasukan baris ini. TF = jumlahnya, cash = selisih
+                           hitung fisik dengan saldo laci sebelumnya (penjualan cash).
+        - omzet_hari     : SUM(masuk) berjalan per hari (akhir hari = omzet manual)
+        - omzet_kumulatif: SUM(masuk) berjalan sepanjang range
+
+        Returns: List of tuples (id, tanggal, waktu, tipe, jumlah, keterangan,
+                 laci, masuk, omzet_hari, omzet_kumulatif, total_rows)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            WITH berurut AS (
+                SELECT id, tanggal, waktu, tipe, jumlah, keterangan, created_at,
+                       CASE tipe WHEN 'modal' THEN 0 WHEN 'keluar' THEN 1
+                                 WHEN 'cash' THEN 2 ELSE 3 END AS fase,
+                       CASE tipe
+                           WHEN 'modal' THEN jumlah - COALESCE(LAG(jumlah) OVER (
+                               PARTITION BY tanggal, tipe ORDER BY waktu, created_at, id), 0)
+                           WHEN 'keluar' THEN -jumlah
+                           ELSE 0
+                       END AS arus
+                FROM transactions
+                WHERE tanggal BETWEEN ? AND ?
+                  AND tipe IN ('modal', 'keluar', 'cash', 'tf')
+            ),
+            kelompok AS (
+                SELECT *,
+                       SUM(arus) OVER hari AS laci_dasar,
+                       SUM(tipe = 'cash') OVER hari AS grup_cash
+                FROM berurut
+                WINDOW hari AS (PARTITION BY tanggal ORDER BY fase, waktu, created_at, id)
+            ),
+            saldo AS (
+                SELECT *,
+                       CASE WHEN grup_cash = 0 THEN laci_dasar
+                            ELSE FIRST_VALUE(jumlah) OVER (
+                                PARTITION BY tanggal, grup_cash
+                                ORDER BY fase, waktu, created_at, id)
+                       END AS laci
+                FROM kelompok
+            ),
+            pemasukan AS (
+                SELECT *,
+                       CASE tipe
+                           WHEN 'tf' THEN jumlah
+                           WHEN 'cash' THEN laci - COALESCE(LAG(laci) OVER hari, 0)
+                           ELSE 0
+                       END AS masuk
+                FROM saldo
+                WINDOW hari AS (PARTITION BY tanggal ORDER BY fase, waktu, created_at, id)
+            )
+            SELECT id, tanggal, waktu, tipe, jumlah, keterangan, laci, masuk,
+                   SUM(masuk) OVER hari AS omzet_hari,
+                   SUM(masuk) OVER semua AS omzet_kumulatif,
+                   COUNT(*) OVER () AS total_rows
+            FROM pemasukan
+            WINDOW hari AS (PARTITION BY tanggal ORDER BY fase, waktu, created_at, id),
+                   semua AS (ORDER BY tanggal, fase, waktu, created_at, id)
+            ORDER BY tanggal, fase, waktu, created_at, id
+            LIMIT ? OFFSET ?
+        ''', (start_date, end_date, limit, offset))
+
+        results = cursor.fetchall()
+        conn.close()
+
+        return results
+
+    # ===== INTRADAY ANALYTICS =====
+
+    def get_time_buckets(self, start_date: str, end_date: str, bucket_minutes: int = 60) -> List[Tuple]:
+        """
+        Agregasi TF dan pengeluaran per slot waktu (berdasarkan kolom waktu).
+        Dijawab dari covering index idx_tanggal_waktu_tipe_jumlah.
+
+        Args:
+            bucket_minutes: Lebar slot dalam menit (misal 60 = per jam, 30 = per setengah jam)
+
+        Returns: List of tuples (slot_start_minute, tipe, count, total), sorted by slot
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute(_TIME_BUCKETS_SQL, (bucket_minutes, bucket_minutes, start_date, end_date))
+
+        results = cursor.fetchall()
+        conn.close()
+
+        return results
+
+    def count_active_days(self, start_date: str, end_date: str) -> int:
+        """Jumlah tanggal yang punya transaksi dalam range (untuk rata-rata per hari)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT COUNT(DISTINCT tanggal) FROM transactions
+            WHERE tanggal BETWEEN ? AND ?
+        ''', (start_date, end_date))
+
+        result = cursor.fetchone()
+        conn.close()
+
+        return result[0] if result else 0
+
+    def get_chat_ids_by_date(self, tanggal: str) -> List[int]:
+        """
+        Ambil daftar chat yang mencatat transaksi pada tanggal tertentu.
+        Dipakai untuk push notifikasi (misal: anomali setelah FINAL).
+
+        Returns: List of chat_id
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT DISTINCT chat_id FROM transactions
+            WHERE tanggal = ? AND chat_id IS NOT NULL AND chat_id != 0
+        ''', (tanggal,))
+
+        results = [row[0] for row in cursor.fetchall()]
+        conn.close()
+
+        return results
+
+    # ===== ANOMALY STATS METHODS =====
+
+    def get_summary_stats(self) -> Dict[str, Tuple]:
+        """
+        Ambil statistik berjalan semua metrik.
+
+        Returns: Dict metric -> (n, mean, var, last_date)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT metric, n, mean, var, last_date FROM summary_stats
+        ''')
+
+        results = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+        conn.close()
+
+        return results
+
+    def save_summary_stats(self, stats: Dict[str, Tuple]):
+        """
+        Simpan statistik berjalan (upsert) dalam satu transaksi.
+
+        Args:
+            stats: Dict metric -> (n, mean, var, last_date)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.executemany('''
+            INSERT INTO summary_stats (metric, n, mean, var, last_date, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(metric) DO UPDATE SET
+                n = excluded.n,
+                mean = excluded.mean,
+                var = excluded.var,
+                last_date = excluded.last_date,
+                updated_at = excluded.updated_at
+        ''', [(metric,) + tuple(values) for metric, values in stats.items()])
+
+        conn.commit()
+        conn.close()
+
+    def save_anomalies(self, date: str, flags: List[Dict]):
+        """
+        Simpan hasil deteksi anomali untuk satu tanggal.
+        Flag lama untuk tanggal tersebut diganti.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('DELETE FROM summary_anomalies WHERE date = ?', (date,))
+        cursor.executemany('''
+            INSERT INTO summary_anomalies (date, metric, value, mean, std, zscore)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (date, f['metric'], f['value'], f['mean'], f['std'], f['zscore'])
+            for f in flags
+        ])
+
+        conn.commit()
+        conn.close()
+
+        if flags:
+            logger.info(f"Anomalies saved: date={date}, count={len(flags)}")
+
+    def get_anomalies_range(self, start_date: str, end_date: str) -> List[Tuple]:
+        """
+        Ambil flag anomali dalam range tanggal.
+
+        Returns: List of tuples (date, metric, value, mean, std, zscore), sorted by date ASC
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT date, metric, value, mean, std, zscore
+            FROM summary_anomalies
+            WHERE date BETWEEN ? AND ?
+            ORDER BY date ASC, metric ASC
+        ''', (start_date, end_date))
+
+        results = cursor.fetchall()
+        conn.close()
+
+        return results
+
+    # ===== FORECAST STATE METHODS =====
+
+    def get_forecast_state(self) -> Optional[Dict]:
+        """
+        Ambil state model proyeksi omzet.
+
+        Returns: Dict state atau None jika belum pernah di-update
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT level, seasonal, seasonal_n, resid_var, n, last_date
+            FROM forecast_state WHERE id = 1
+        ''')
+
+        row = cursor.fetchone()
+        conn.close()
+
+        if row is None:
+            return None
+
+        return {
+            'level': row[0],
+            'seasonal': json.loads(row[1]),
+            'seasonal_n': json.loads(row[2]),
+            'resid_var': row[3],
+            'n': row[4],
+            'last_date': row[5],
+        }
+
+    def save_forecast_state(self, state: Dict):
+        """Simpan state model proyeksi omzet (upsert satu baris)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT INTO forecast_state
+            (id, level, seasonal, seasonal_n, resid_var, n, last_date, updated_at)
+            VALUES (1, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(id) DO UPDATE SET
+                level = excluded.level,
+                seasonal = excluded.seasonal,
+                seasonal_n = excluded.seasonal_n,
+                resid_var = excluded.resid_var,
+                n = excluded.n,
+                last_date = excluded.last_date,
+                updated_at = excluded.updated_at
+        ''', (
+            state['level'],
+            json.dumps(state['seasonal']),
+            json.dumps(state['seasonal_n']),
+            state['resid_var'],
+            state['n'],
+            state['last_date']
+        ))
+
+        conn.commit()
+        conn.close()
+
+    def save_live_status(self, chat_id: int, message_id: int):
+        """Simpan/ganti pesan status live untuk chat (upsert)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT INTO live_status (chat_id, message_id, created_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(chat_id) DO UPDATE SET
+                message_id = excluded.message_id,
+                created_at = excluded.created_at
+        ''', (chat_id, message_id))
+
+        conn.commit()
+        conn.close()
+
+    def delete_live_status(self, chat_id: int) -> bool:
+        """Hapus status live chat. Returns: True jika ada yang dihapus"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('DELETE FROM live_status WHERE chat_id = ?', (chat_id,))
+        affected = cursor.rowcount
+
+        conn.commit()
+        conn.close()
+        return affected > 0
+
+    def get_live_status_chats(self) -> List[Tuple[int, int]]:
+        """Semua status live aktif: list (chat_id, message_id)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT chat_id, message_id FROM live_status')
+        rows = cursor.fetchall()
+
+        conn.close()
+        return rows
+
+    def add_ocr_pending(self, chat_id: int, message_id: int, amount: float,
+                        raw_text: str = None, confidence: float = None, cache_id: int = None,
+                        backend: str = None) -> int:
+        """Simpan hasil OCR yang menunggu konfirmasi. Returns: ID pending"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT INTO ocr_pending (chat_id, message_id, amount, raw_text, confidence, cache_id, backend)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (chat_id, message_id, amount, raw_text, confidence, cache_id, backend))
+        pending_id = cursor.lastrowid
+
+        conn.commit()
+        conn.close()
+        return pending_id
+
+    def claim_ocr_pending(self, pending_id: int, chat_id: int, status: str) -> Optional[Tuple]:
+        """
+        Tandai hasil OCR pending sebagai `status` ('saved'/'cancelled'), hanya sekali.
+
+        Returns:
+            (message_id, amount, cache_id, backend) atau None jika tidak ada, beda chat, atau sudah diproses
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE ocr_pending SET status = ?
+            WHERE id = ? AND chat_id = ? AND status = 'pending'
+        ''', (status, pending_id, chat_id))
+        row = None
+        if cursor.rowcount:
+            cursor.execute('SELECT message_id, amount, cache_id, backend FROM ocr_pending WHERE id = ?', (pending_id,))
+            row = cursor.fetchone()
+
+        conn.commit()
+        conn.close()
+        return row
+
+    def delete_ocr_pending(self, before: str, pending_before: str = None) -> int:
+        """
+        Hapus hasil OCR yang sudah diproses (saved/cancelled) sebelum `before`, dan
+        yang masih pending (tombol tidak pernah ditekan) sebelum `pending_before`. Waktu UTC.
+
+        Returns: jumlah baris
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("DELETE FROM ocr_pending WHERE status != 'pending' AND created_at < ?", (before,))
+        affected = cursor.rowcount
+        if pending_before is not None:
+            cursor.execute("DELETE FROM ocr_pending WHERE status = 'pending' AND created_at < ?", (pending_before,))
+            affected += cursor.rowcount
+
+        conn.commit()
+        conn.close()
+        return affected
+
+    def find_ocr_cache(self, file_unique_id: str = None, sha256: str = None) -> Optional[Tuple]:
+        """
+        Cari hasil OCR tersimpan berdasarkan file_unique_id atau sha256.
+
+        Returns:
+            (id, result_json, transaction_id) entry terbaru, atau None
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        column, value = ('file_unique_id', file_unique_id) if file_unique_id else ('sha256', sha256)
+        cursor.execute(f'''
+            SELECT id, result, transaction_id FROM ocr_cache
+            WHERE {column} = ?
+            ORDER BY id DESC LIMIT 1
+        ''', (value,))
+        row = cursor.fetchone()
+
+        conn.close()
+        return row
+
+    def get_ocr_cache_hashes(self, since: str) -> List[Tuple]:
+        """
+        dHash entry cache yang sudah tercatat sebagai transaksi sejak `since`:
+        list (id, dhash_hex, result_json, transaction_id)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, dhash, result, transaction_id FROM ocr_cache
+            WHERE dhash IS NOT NULL AND transaction_id IS NOT NULL AND created_at >= ?
+        ''', (since,))
+        rows = cursor.fetchall()
+
+        conn.close()
+        return rows
+
+    def add_ocr_cache(self, file_unique_id: str, sha256: str, dhash: Optional[str], result: str,
+                      transaction_id: int = None) -> int:
+        """Simpan hasil OCR (result = JSON). Returns: ID cache"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            INSERT INTO ocr_cache (file_unique_id, sha256, dhash, result, transaction_id)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (file_unique_id, sha256, dhash, result, transaction_id))
+        cache_id = cursor.lastrowid
+
+        conn.commit()
+        conn.close()
+        return cache_id
+
+    def set_ocr_cache_transaction(self, cache_id: int, transaction_id: int):
+        """Hubungkan hasil OCR (dan semua entry dengan isi file yang sama) ke transaksi"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            UPDATE ocr_cache SET transaction_id = ?
+            WHERE sha256 = (SELECT sha256 FROM ocr_cache WHERE id = ?)
+        ''', (transaction_id, cache_id))
+
+        conn.commit()
+        conn.close()
+
+    def delete_ocr_cache(self, cache_id: int = None, before: str = None) -> int:
+        """Hapus satu entry cache, atau semua yang dibuat sebelum `before` (UTC). Returns: jumlah baris"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        if cache_id is not None:
+            cursor.execute('DELETE FROM ocr_cache WHERE id = ?', (cache_id,))
+        else:
+            cursor.execute('DELETE FROM ocr_cache WHERE created_at < ?', (before,))
+        affected = cursor.rowcount
+
+        conn.commit()
+        conn.close()
+        return affected
+
+    def get_conversation_state(self, now: float) -> List[Tuple]:
+        """Semua state percakapan yang belum kedaluwarsa: list (user_id, key, value_json, expires_at)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT user_id, key, value, expires_at FROM conversation_state
+            WHERE expires_at > ?
+        ''', (now,))
+        rows = cursor.fetchall()
+
+        conn.close()
+        return rows
+
+    def save_conversation_state(self, upserts: List[Tuple], deletes: List[Tuple]):
+        """
+        Tulis perubahan state percakapan dalam satu transaksi.
+
+        Args:
+            upserts: list (user_id, key, value_json, expires_at)
+            deletes: list (user_id, key)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.executemany('''
+            INSERT INTO conversation_state (user_id, key, value, expires_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(user_id, key) DO UPDATE SET
+                value = excluded.value,
+                expires_at = excluded.expires_at
+        ''', upserts)
+        cursor.executemany(
+            'DELETE FROM conversation_state WHERE user_id = ? AND key = ?', deletes
+        )
+
+        conn.commit()
+        conn.close()
+
+    def delete_conversation_state(self, user_id: int = None, expired_before: float = None) -> int:
+        """Hapus state satu user, atau semua yang kedaluwarsa sebelum `expired_before`. Returns: jumlah baris"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        if user_id is not None:
+            cursor.execute('DELETE FROM conversation_state WHERE user_id = ?', (user_id,))
+        else:
+            cursor.execute('DELETE FROM conversation_state WHERE expires_at <= ?', (expired_before,))
+        affected = cursor.rowcount
+
+        conn.commit()
+        conn.close()
+        return affected
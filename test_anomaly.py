@@ -0,0 +1,119 @@
+"""
+Unit test untuk deteksi anomali rekap harian (statistik EWMA, z-score, flag tersimpan)
+Jalankan dengan: python -m pytest test_anomaly.py
+"""
+
+import asyncio
+import statistics
+
+import pytest
+
+from anomaly import AnomalyDetector
+from logic import FinancialLogic
+from scheduler import RekapScheduler
+from storage import Storage
+
+# Omzet normal: sekitar 1 juta, variasi kecil
+NORMAL = [1_000_000, 1_050_000, 980_000, 1_020_000, 990_000, 1_010_000, 1_040_000, 970_000, 1_000_000, 1_030_000]
+
+
+def summary(omzet: float) -> dict:
+    return {'omzet_manual': omzet, 'total_tf': omzet * 0.4, 'selisih': 0}
+
+
+def day(i: int) -> str:
+    return f"2025-01-{i + 1:02d}"
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return Storage(str(tmp_path / 'test.db'))
+
+
+def test_stats_follow_mean_then_ewma(storage):
+    detector = AnomalyDetector(storage, window=30)  # alpha = 2/31, warm-up 15 sampel
+    for i, omzet in enumerate(NORMAL):
+        detector.observe(day(i), summary(omzet))
+
+    # Selama warm-up bobot 1/(n+1): sama dengan rata-rata & varians populasi biasa
+    n, mean, var, last_date = storage.get_summary_stats()['omzet']
+    assert (n, last_date) == (len(NORMAL), day(len(NORMAL) - 1))
+    assert mean == pytest.approx(statistics.mean(NORMAL))
+    assert var == pytest.approx(statistics.pvariance(NORMAL))
+
+    values = NORMAL + [1_000_000] * 5
+    for i in range(len(NORMAL), len(values)):
+        detector.observe(day(i), summary(values[i]))
+    _, mean, var, _ = storage.get_summary_stats()['omzet']
+    assert mean == pytest.approx(statistics.mean(values))
+
+    # Sampel ke-16: bobot tetap alpha
+    alpha = 2 / 31
+    detector.observe(day(len(values)), summary(1_300_000))
+    n, new_mean, new_var, _ = storage.get_summary_stats()['omzet']
+    diff = 1_300_000 - mean
+    assert n == 16
+    assert new_mean == pytest.approx(mean + alpha * diff)
+    assert new_var == pytest.approx((1 - alpha) * (var + diff * alpha * diff))
+
+
+def test_no_flag_before_min_samples(storage):
+    detector = AnomalyDetector(storage, min_samples=7)
+    for i, omzet in enumerate(NORMAL[:6]):
+        detector.observe(day(i), summary(omzet))
+
+    # Baru 6 sampel: nilai ekstrem pun belum di-flag
+    assert detector.check(summary(5_000_000)) == []
+    assert detector.observe(day(6), summary(5_000_000)) == []
+
+
+def test_flag_when_zscore_exceeds_threshold(storage):
+    detector = AnomalyDetector(storage, z_threshold=2.5, min_samples=7)
+    for i, omzet in enumerate(NORMAL):
+        detector.observe(day(i), summary(omzet))
+    std = statistics.pstdev(NORMAL)
+    mean = statistics.mean(NORMAL)
+
+    assert detector.check(summary(mean + 2 * std)) == []
+    flags = detector.observe(day(10), summary(mean - 4 * std))
+    omzet_flag, = [flag for flag in flags if flag['metric'] == 'omzet']
+    assert omzet_flag['zscore'] == pytest.approx(-4)
+    assert omzet_flag['mean'] == pytest.approx(mean)
+    assert detector.get_flags_range(day(10), day(10)) == {day(10): flags}
+
+
+def test_same_or_older_date_is_not_observed_twice(storage):
+    detector = AnomalyDetector(storage, min_samples=3)
+    for i, omzet in enumerate(NORMAL):
+        detector.observe(day(i), summary(omzet))
+    before = storage.get_summary_stats()
+
+    # FINAL ulang (tanggal sama) atau rekap tanggal lama: statistik & flag tidak berubah
+    assert detector.observe(day(len(NORMAL) - 1), summary(9_000_000)) == []
+    assert detector.observe(day(0), summary(9_000_000)) == []
+    assert storage.get_summary_stats() == before
+    assert detector.get_flags_range(day(0), day(len(NORMAL) - 1)) == {}
+
+
+def test_process_final_persists_flags_for_weekly_report(storage):
+    detector = AnomalyDetector(storage, min_samples=7)
+    scheduler = RekapScheduler(storage, FinancialLogic(storage), detector=detector)
+    pushed = []
+
+    async def on_anomaly(date, flags):
+        pushed.append((date, flags))
+
+    scheduler.on_anomaly = on_anomaly
+
+    async def main():
+        for i, omzet in enumerate(NORMAL):
+            await scheduler.process_final(day(i), summary(omzet))
+        await scheduler.process_final(day(10), summary(200_000))
+
+    asyncio.run(main())
+
+    # /mingguan membaca flag tersimpan lewat get_flags_range
+    flags = detector.get_flags_range(day(4), day(10))
+    assert list(flags) == [day(10)]
+    assert 'omzet' in {flag['metric'] for flag in flags[day(10)]}
+    assert pushed == [(day(10), flags[day(10)])]
@@ -0,0 +1,359 @@
+"""
+Test end-to-end TokoBot lewat Bot API palsu (fake_telegram.py), tanpa jaringan
+Jalankan dengan: python -m pytest test_fake_telegram.py
+"""
+
+import asyncio
+import io
+from datetime import datetime
+
+import pytest
+from telegram import Update
+
+from config import Config
+from fake_telegram import CHAT_ID, FakeTelegram, callback_update, photo_update, text_update
+from ocr_backend import StubBackend
+from ocr_callback import send_ocr_result
+
+
+@pytest.fixture
+def toko_bot(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'TELEGRAM_BOT_TOKEN', '123456:TEST-TOKEN')
+    monkeypatch.setattr(Config, 'DB_PATH', str(tmp_path / 'bot.db'))
+    from bot import TokoBot
+    return TokoBot()
+
+
+class RecordingBackend(StubBackend):
+    """StubBackend yang mencatat payload gambar; `delay` meniru OCR lambat"""
+
+    def __init__(self, default=None, delay=0.0):
+        super().__init__(default)
+        self.delay = delay
+        self.images = []
+
+    async def _analyze(self, image_data, mime_type, timeout):
+        self.images.append(image_data)
+        await asyncio.sleep(self.delay)
+        return await super()._analyze(image_data, mime_type, timeout)
+
+
+@pytest.fixture
+def stub_ocr(toko_bot):
+    """Backend OCR palsu di toko_bot.ocr; hasil diatur lewat stub_ocr.default"""
+    backend = RecordingBackend({'is_transfer': True, 'amount': 125000, 'confidence': 0.9})
+    toko_bot.ocr = backend
+    toko_bot.outbox.private_rate = 1000  # banyak balasan ke satu chat; bukan yang diuji di sini
+    return backend
+
+
+def feed(toko_bot, *updates):
+    """Proses update berurutan lewat Application yang terhubung ke FakeTelegram"""
+    fake = FakeTelegram()
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        async with application:
+            for data in updates:
+                await application.process_update(Update.de_json(data, application.bot))
+
+    asyncio.run(main())
+    return fake
+
+
+def test_command_reply_and_storage(toko_bot):
+    fake = feed(toko_bot, text_update('/tf 50k'))
+
+    assert fake.endpoints()[0] == 'getMe'
+    texts = fake.sent_texts()
+    assert len(texts) == 1
+    assert '50.000' in texts[0]
+    today = datetime.now().strftime('%Y-%m-%d')
+    assert toko_bot.storage.get_sum_by_type(today, 'tf') == 50000
+
+
+def test_callback_is_answered_and_edited(toko_bot):
+    fake = feed(toko_bot, callback_update('menu_main'))
+
+    endpoints = fake.endpoints()
+    assert 'answerCallbackQuery' in endpoints
+    assert 'editMessageText' in endpoints
+
+
+def test_unknown_callback_answered_stale(toko_bot):
+    fake = feed(toko_bot, callback_update('tidak_ada_route'))
+
+    assert fake.endpoints().count('answerCallbackQuery') == 1
+    assert 'editMessageText' not in fake.endpoints()
+
+
+def test_ocr_confirmation_saved_once(toko_bot):
+    fake = FakeTelegram()
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        async with application:
+            await send_ocr_result(application.bot, toko_bot.storage, chat_id=CHAT_ID,
+                                  message_id=77, is_tf_receipt=True, amount=150000)
+            markup = fake.calls[-1][1]['reply_markup']
+            save_data = markup['inline_keyboard'][0][0]['callback_data']
+            # Tombol Simpan ditekan dua kali
+            for _ in range(2):
+                await application.process_update(Update.de_json(callback_update(save_data), application.bot))
+
+    asyncio.run(main())
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    assert toko_bot.storage.get_sum_by_type(today, 'tf') == 150000
+    assert toko_bot.storage.get_recent_transactions(today)[0][5] == 'ocr_n8n'
+    edits = fake.sent_texts('editMessageText')
+    assert 'tersimpan' in edits[0]
+    assert 'sudah diproses' in edits[1]
+
+
+def test_button_input_survives_restart(toko_bot):
+    # Pilih "Transfer" lalu bot restart sebelum nominal diketik
+    feed(toko_bot, callback_update('input_tf'))
+
+    from bot import TokoBot
+    restarted = TokoBot()
+    fake = feed(restarted, text_update('75rb'))
+
+    assert 'tersimpan' in fake.sent_texts()[0]
+    today = datetime.now().strftime('%Y-%m-%d')
+    assert restarted.storage.get_sum_by_type(today, 'tf') == 75000
+
+
+def test_photo_ocr_does_not_stall_other_chats(toko_bot, stub_ocr, monkeypatch):
+    import bot
+
+    monkeypatch.setattr(bot, 'OCR_PROGRESS_INTERVAL', 0.1)
+    stub_ocr.default['amount'] = 80000
+    stub_ocr.delay = 0.35
+
+    fake = FakeTelegram(files={'photo-1-2': b'jpeg'})
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        async with application:
+            photo = asyncio.create_task(application.process_update(
+                Update.de_json(photo_update(), application.bot)))
+            await asyncio.sleep(0.05)
+            # Chat lain tetap dilayani selagi OCR berjalan
+            await application.process_update(Update.de_json(text_update('/status', chat_id=3003), application.bot))
+            assert not photo.done()
+            await photo
+
+    asyncio.run(main())
+
+    assert 'TRANSFER TERDETEKSI' in fake.sent_texts('editMessageText')[-1]
+
+
+def test_ocr_queue_is_fair_and_shows_position(toko_bot, stub_ocr, monkeypatch):
+    import bot
+    from ocr_queue import OCRQueue
+    from views import OCR_QUEUE_FULL_TEXT
+
+    monkeypatch.setattr(bot, 'OCR_PROGRESS_INTERVAL', 0.02)
+    stub_ocr.default = {'is_transfer': False, 'reason': 'bukan struk'}
+    stub_ocr.delay = 0.1
+    toko_bot.ocr_queue = OCRQueue(workers=1, max_depth=3)
+
+    files = {f'{name}-2': name.encode() for name in ('a1', 'a2', 'a3', 'b1')}
+    fake = FakeTelegram(files=files)
+    application = toko_bot.build_application(request=fake)
+    updates = [photo_update('a1'), photo_update('a2'), photo_update('a3'),
+               photo_update('b1', chat_id=3003), photo_update('a4')]
+
+    async def main():
+        async with application:
+            tasks = []
+            for data in updates:
+                tasks.append(asyncio.create_task(application.process_update(Update.de_json(data, application.bot))))
+                await asyncio.sleep(0.01)
+            await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+
+    # a1 langsung diproses, a2/a3/b1 menunggu, a4 ditolak; b1 mendahului a3 (bergiliran per chat)
+    assert stub_ocr.images == [b'a1', b'a2', b'b1', b'a3']
+    texts = fake.sent_texts()
+    assert texts.count(OCR_QUEUE_FULL_TEXT) == 1
+    assert 'Antrian ke-2' in texts[3]  # b1: setelah a2, sebelum a3
+    assert toko_bot.ocr_queue.stats['rejected'] == 1
+
+
+def test_ocr_progress_counts_from_start_and_shutdown_stops_workers(toko_bot):
+    import time
+    from ocr_backend import create_backend
+
+    toko_bot.ocr = create_backend('cascade', gemini=toko_bot.gemini)
+
+    fake = FakeTelegram()
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        blocker = asyncio.Event()
+        jobs = [toko_bot.ocr_queue.submit(CHAT_ID, blocker.wait) for _ in range(toko_bot.ocr_queue.workers + 1)]
+        await asyncio.sleep(0)
+        running, waiting = jobs[0], jobs[-1]
+        # Sudah lama di antrean, baru 3 detik diproses → "(3 dtk)", bukan sejak foto masuk
+        running.enqueued_at -= 60
+        running.started_at = time.monotonic() - 3
+        texts = toko_bot._ocr_progress_text(running), toko_bot._ocr_progress_text(waiting)
+
+        await application.post_shutdown(application)
+        return texts, jobs
+
+    (running_text, waiting_text), jobs = asyncio.run(main())
+
+    assert running_text.endswith('(3 dtk)')
+    assert 'Antrian ke-1' in waiting_text
+    assert all(job.future.cancelled() for job in jobs)
+    assert toko_bot.ocr.local._executor._shutdown and toko_bot.gemini._executor._shutdown
+
+
+def test_forwarded_receipt_not_recorded_twice(toko_bot, stub_ocr, receipt):
+    original = receipt('125.000')
+    fake = FakeTelegram(files={
+        'a-2': original,
+        'b-2': original,  # file sama, dikirim ulang sebagai foto baru
+        'c-2': receipt('125.000', quality=60, size=(720, 1280)),  # screenshot ulang
+    })
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        async with application:
+            for data in (photo_update('a'), photo_update('a'), photo_update('b'), photo_update('c')):
+                await application.process_update(Update.de_json(data, application.bot))
+
+    asyncio.run(main())
+
+    # OCR hanya dipanggil untuk foto pertama & screenshot ulang (kemiripan tidak cukup)
+    assert len(stub_ocr.images) == 2
+    today = datetime.now().strftime('%Y-%m-%d')
+    assert toko_bot.storage.get_sum_by_type(today, 'tf') == 125000
+
+    # Forward ulang (a) dijawab langsung tanpa unduh; b & c lewat pesan proses
+    assert 'SUDAH TERCATAT' in fake.sent_texts()[1]
+    edits = fake.sent_texts('editMessageText')
+    assert 'TRANSFER TERDETEKSI' in edits[0]
+    assert 'STRUK SUDAH TERCATAT' in edits[1]
+    assert 'STRUK MIRIP SUDAH TERCATAT' in edits[2]
+    assert 'reply_markup' in fake.calls[-1][1]  # tombol Simpan/Batal untuk struk mirip
+    assert fake.endpoints().count('downloadFile') == 3
+    assert toko_bot.ocr_cache.stats['duplicates'] == 3
+
+
+def test_confirmed_similar_receipt_is_linked_to_new_transaction(toko_bot, stub_ocr, receipt):
+    fake = FakeTelegram(files={
+        'a-2': receipt('125.000'),
+        'c-2': receipt('125.000', quality=60, size=(720, 1280)),
+    })
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        async with application:
+            for data in (photo_update('a'), photo_update('c')):
+                await application.process_update(Update.de_json(data, application.bot))
+            markup = fake.calls[-1][1]['reply_markup']
+            save_data = markup['inline_keyboard'][0][0]['callback_data']
+            await application.process_update(Update.de_json(callback_update(save_data), application.bot))
+            # Forward ulang foto yang baru disimpan: dikenali tanpa analisa ulang
+            await application.process_update(Update.de_json(photo_update('c'), application.bot))
+
+    asyncio.run(main())
+
+    today = datetime.now().strftime('%Y-%m-%d')
+    assert toko_bot.storage.get_sum_by_type(today, 'tf') == 250000
+    saved_id = max(tx[0] for tx in toko_bot.storage.get_recent_transactions(today))
+    assert toko_bot.ocr_cache.find_by_file('c-u2').transaction_id == saved_id
+    # Sumber sama dengan jalur langsung (ocr_<backend>)
+    assert {tx[5] for tx in toko_bot.storage.get_recent_transactions(today)} == {'ocr_stub'}
+    assert len(stub_ocr.images) == 2
+    assert 'SUDAH TERCATAT' in fake.sent_texts()[-1]
+
+
+def test_photo_ocr_uses_smallest_readable_size(toko_bot, stub_ocr, receipt):
+    from PIL import Image
+
+    stub_ocr.default['amount'] = 50000
+
+    sizes = ((144, 320, 4000), (360, 800, 30000), (576, 1280, 70000), (1080, 2400, 250000))
+    fake = FakeTelegram(files={'s-2': receipt('50.000', quality=95, size=(576, 1280))})
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        async with application:
+            await application.process_update(Update.de_json(photo_update('s', sizes=sizes), application.bot))
+
+    asyncio.run(main())
+
+    assert [params['file_path'] for name, params in fake.calls if name == 'downloadFile'] == ['s-2']
+    payload = stub_ocr.images[0]
+    assert len(payload) < len(fake.files['s-2'])
+    with Image.open(io.BytesIO(payload)) as image:
+        assert image.mode == 'L'
+    assert 'TRANSFER TERDETEKSI' in fake.sent_texts('editMessageText')[-1]
+
+
+def test_photo_ocr_with_local_backend_needs_no_gemini(toko_bot):
+    assert not toko_bot.gemini.api_key
+    toko_bot.ocr = StubBackend(default={'is_transfer': True, 'amount': 42000, 'confidence': 0.9})
+    fake = FakeTelegram(files={'photo-1-2': b'jpeg'})
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        async with application:
+            await application.process_update(Update.de_json(photo_update(), application.bot))
+
+    asyncio.run(main())
+
+    assert 'TRANSFER TERDETEKSI' in fake.sent_texts('editMessageText')[-1]
+    today = datetime.now().strftime('%Y-%m-%d')
+    assert toko_bot.storage.get_recent_transactions(today)[0][5] == 'ocr_stub'
+
+
+def test_cascade_fallback_result_is_not_cached(toko_bot):
+    from ocr_backend import CascadeBackend
+
+    toko_bot.ocr = CascadeBackend(
+        StubBackend(default={'is_transfer': True, 'amount': 42000, 'confidence': 0.6}),
+        StubBackend(default={'is_transfer': False, 'amount': 0, 'error': True})
+    )
+    fake = FakeTelegram(files={'photo-1-2': b'jpeg'})
+    application = toko_bot.build_application(request=fake)
+
+    async def main():
+        async with application:
+            await application.process_update(Update.de_json(photo_update(), application.bot))
+
+    asyncio.run(main())
+
+    assert 'TRANSFER TERDETEKSI' in fake.sent_texts('editMessageText')[-1]
+    # Gemini gagal → hasil lokal dipakai sekali, kiriman ulang dianalisa lagi
+    assert toko_bot.ocr_cache.find_by_file('photo-1-u2') is None
+
+
+def test_prune_ocr_pending_job_is_registered_and_drops_old_rows(toko_bot):
+    import sqlite3
+
+    old = toko_bot.storage.add_ocr_pending(chat_id=CHAT_ID, message_id=1, amount=1000)
+    fresh = toko_bot.storage.add_ocr_pending(chat_id=CHAT_ID, message_id=2, amount=2000)
+    with sqlite3.connect(toko_bot.storage.db_path) as conn:
+        conn.execute("UPDATE ocr_pending SET created_at = datetime('now', '-8 days') WHERE id = ?", (old,))
+
+    application = toko_bot.build_application(request=FakeTelegram())
+
+    async def main():
+        async with application:
+            await application.post_init(application)
+            jobs = {job.id for job in toko_bot.scheduler.scheduler.get_jobs()}
+            toko_bot.scheduler.stop()
+            await application.post_shutdown(application)
+            return jobs
+
+    assert 'ocr_pending_prune' in asyncio.run(main())
+    assert toko_bot.prune_ocr_pending() == 1
+    assert toko_bot.storage.claim_ocr_pending(old, CHAT_ID, 'saved') is None
+    assert toko_bot.storage.claim_ocr_pending(fresh, CHAT_ID, 'saved') == (2, 2000, None, None)
@@ -0,0 +1,90 @@
+"""
+Unit test untuk proyeksi omzet (level + musiman per hari, band, state tersimpan)
+Jalankan dengan: python -m pytest test_forecast.py
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from forecast import OmzetForecaster
+from storage import Storage
+
+# Omzet tetap per hari dalam minggu (Senin..Minggu)
+WEEKLY = [800_000, 900_000, 850_000, 950_000, 1_200_000, 1_800_000, 1_500_000]
+MONDAY = date(2025, 1, 6)
+
+
+def feed(forecaster: OmzetForecaster, days: int, noise=lambda i: 0, start: date = MONDAY):
+    for i in range(days):
+        day = start + timedelta(days=i)
+        forecaster.update(day.isoformat(), {'omzet_manual': WEEKLY[day.weekday()] + noise(i)})
+    return start + timedelta(days=days)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return Storage(str(tmp_path / 'test.db'))
+
+
+def test_no_prediction_before_min_samples(storage):
+    forecaster = OmzetForecaster(storage, min_samples=7)
+    next_day = feed(forecaster, 6)
+
+    assert forecaster.predict(next_day.isoformat()) is None
+    assert forecaster.predict_range([next_day.isoformat()]) is None
+
+    forecaster.update(next_day.isoformat(), {'omzet_manual': WEEKLY[next_day.weekday()]})
+    assert forecaster.predict((next_day + timedelta(days=1)).isoformat()) is not None
+
+
+def test_constant_weekly_pattern_converges(storage):
+    forecaster = OmzetForecaster(storage)
+    after_month = feed(forecaster, 7 * 4)
+    early = forecaster.predict(after_month.isoformat())
+    next_day = feed(forecaster, 7 * 22, start=after_month)
+
+    for offset in range(7):
+        day = next_day + timedelta(days=offset)
+        forecast = forecaster.predict(day.isoformat())
+        assert forecast['expected'] == pytest.approx(WEEKLY[day.weekday()], rel=0.01)
+
+    # Pola tanpa noise: error proyeksi mengecil, band ikut menyempit
+    late = forecaster.predict(next_day.isoformat())
+    assert late['upper'] - late['lower'] < (early['upper'] - early['lower']) / 10
+
+    week = [(next_day + timedelta(days=offset)).isoformat() for offset in range(7)]
+    assert forecaster.predict_range(week)['expected'] == pytest.approx(sum(WEEKLY), rel=0.01)
+
+
+def test_band_is_ordered(storage):
+    forecaster = OmzetForecaster(storage)
+    next_day = feed(forecaster, 7 * 6, noise=lambda i: (i * 37_000) % 150_000 - 75_000)
+
+    week = [(next_day + timedelta(days=offset)).isoformat() for offset in range(7)]
+    for forecast in [forecaster.predict(day) for day in week] + [forecaster.predict_range(week)]:
+        assert 0 <= forecast['lower'] <= forecast['expected'] <= forecast['upper']
+        assert forecast['lower'] < forecast['upper']  # ada noise → band tidak nol
+
+
+def test_same_date_is_not_applied_twice(storage):
+    forecaster = OmzetForecaster(storage)
+    next_day = feed(forecaster, 10)
+    last = (next_day - timedelta(days=1)).isoformat()
+    before = forecaster.load_state()
+
+    # FINAL ulang (tanggal sama) atau tanggal lama tidak mengubah state
+    assert forecaster.update(last, {'omzet_manual': 5_000_000}) is False
+    assert forecaster.update(MONDAY.isoformat(), {'omzet_manual': 5_000_000}) is False
+    assert forecaster.load_state() == before
+    assert forecaster.update(next_day.isoformat(), {'omzet_manual': 1_000_000}) is True
+
+
+def test_state_survives_new_instance(storage):
+    forecaster = OmzetForecaster(storage)
+    next_day = feed(forecaster, 7 * 3)
+    state = forecaster.load_state()
+
+    restarted = OmzetForecaster(Storage(storage.db_path))
+    assert restarted.load_state() == state
+    assert restarted.predict(next_day.isoformat()) == forecaster.predict(next_day.isoformat())
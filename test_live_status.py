@@ -0,0 +1,121 @@
+"""
+Unit test untuk LiveStatusManager (debounce, skip teks sama, pesan hilang)
+Jalankan dengan: python -m pytest test_live_status.py
+"""
+
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from telegram.error import BadRequest
+
+from live_status import LiveStatusManager
+from storage import Storage
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self.edits = []
+        self.pinned = []
+        self.fail_edit = None
+
+    async def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+        return SimpleNamespace(message_id=100 + len(self.sent))
+
+    async def pin_chat_message(self, chat_id, message_id, disable_notification=False):
+        self.pinned.append((chat_id, message_id))
+
+    async def unpin_chat_message(self, chat_id, message_id):
+        self.pinned.remove((chat_id, message_id))
+
+    async def edit_message_text(self, text, chat_id, message_id):
+        if self.fail_edit:
+            raise self.fail_edit
+        self.edits.append((chat_id, message_id, text))
+
+
+def make_manager(tmp_path, texts):
+    storage = Storage(str(tmp_path / 'live.db'))
+    manager = LiveStatusManager(storage, lambda: texts[-1], debounce=0.02, min_interval=0)
+    storage.on_change = manager.notify
+    manager.bot = FakeBot()
+    return storage, manager
+
+
+def add_tf(storage, jumlah):
+    storage.add_transaction(datetime.now().strftime('%Y-%m-%d'), '10:00:00', 'tf', jumlah, 'manual')
+
+
+def test_writes_within_window_coalesce_into_one_edit(tmp_path):
+    texts = ['v0']
+    storage, manager = make_manager(tmp_path, texts)
+
+    async def main():
+        await manager.enable(manager.bot, 1)
+        for i in range(1, 6):
+            texts.append(f'v{i}')
+            add_tf(storage, 1000 * i)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert manager.bot.pinned == [(1, 101)]
+    assert manager.bot.edits == [(1, 101, 'v5')]
+    assert manager.stats['notified'] == 5
+
+
+def test_unchanged_text_is_not_edited(tmp_path):
+    texts = ['sama']
+    storage, manager = make_manager(tmp_path, texts)
+
+    async def main():
+        await manager.enable(manager.bot, 1)
+        add_tf(storage, 1000)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert manager.bot.edits == []
+    assert manager.stats['skipped'] == 1
+
+
+def test_other_dates_and_disabled_chats_ignored(tmp_path):
+    texts = ['v0']
+    storage, manager = make_manager(tmp_path, texts)
+
+    async def main():
+        await manager.enable(manager.bot, 1)
+        texts.append('v1')
+        storage.add_transaction('2020-01-01', '10:00:00', 'tf', 1000, 'manual')
+        await asyncio.sleep(0.05)
+        assert await manager.disable(manager.bot, 1)
+        add_tf(storage, 1000)
+        await asyncio.sleep(0.05)
+
+    asyncio.run(main())
+    assert manager.bot.edits == []
+    assert manager.bot.pinned == []
+    assert storage.get_live_status_chats() == []
+
+
+def test_deleted_message_disables_live_status(tmp_path):
+    texts = ['v0']
+    storage, manager = make_manager(tmp_path, texts)
+
+    async def main():
+        await manager.enable(manager.bot, 1)
+        manager.bot.fail_edit = BadRequest("Message to edit not found")
+        texts.append('v1')
+        add_tf(storage, 1000)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert not manager.is_enabled(1)
+    assert storage.get_live_status_chats() == []
+
+
+def test_subscriptions_survive_restart(tmp_path):
+    storage = Storage(str(tmp_path / 'live.db'))
+    storage.save_live_status(7, 55)
+    manager = LiveStatusManager(storage, lambda: '')
+    assert manager.is_enabled(7)
@@ -0,0 +1,159 @@
+"""
+Unit test untuk backend OCR (heuristik nominal, tesseract, stub, cascade, factory)
+Jalankan dengan: python -m pytest test_ocr_backend.py
+"""
+
+import asyncio
+import hashlib
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from config import Config
+from ocr_backend import (
+    BACKENDS, CascadeBackend, GeminiBackend, OCRBackend, StubBackend, TesseractBackend, create_backend,
+    extract_transfer,
+)
+from ocr_gemini import GeminiClient
+
+BCA_TEXT = """Transfer Berhasil
+Rp125.000
+Penerima
+ANISA STORE
+Nominal Transfer
+Rp 125.000,00
+Biaya Admin Rp 2.500
+No. Referensi 123456789"""
+
+
+@pytest.mark.parametrize('text, amount, confident', [
+    (BCA_TEXT, 125000, True),
+    # Nominal tanpa "Rp" di baris berlabel; saldo diabaikan
+    ("m-Transfer\nBERHASIL\n12/05/2024 10:15\nKe 1234567890\nNominal 50.000,00\nSaldo Rp 1.250.000", 50000, True),
+    # Label di baris atas nominal
+    ("Total Bayar\nRp. 37.500\nQRIS Pembayaran Sukses", 37500, True),
+    # Nominal tanpa label & tanpa status: jangan dianggap yakin
+    ("Rp 15.000 Rp 20.000", 20000, False),
+])
+def test_extract_transfer(text, amount, confident):
+    result = extract_transfer(text)
+    assert result['amount'] == amount
+    assert (result['is_transfer'] and result['confidence'] >= 0.8) == confident
+
+
+def test_extract_transfer_without_amount():
+    result = extract_transfer("Foto kucing 2024")
+    assert not result['is_transfer'] and result['amount'] == 0
+
+
+def test_tesseract_backend_reads_image_locally(receipt):
+    backend = TesseractBackend(timeout=5)
+    calls = []
+
+    def image_to_string(image, lang, timeout):
+        calls.append((image.size, lang, timeout))
+        return BCA_TEXT
+
+    backend._pytesseract, backend._loaded = SimpleNamespace(image_to_string=image_to_string), True
+    result = asyncio.run(backend.analyze(receipt('125.000')))
+
+    assert result['amount'] == 125000 and result['backend'] == 'tesseract'
+    assert calls == [((360, 640), 'eng', 5)]
+
+
+def test_tesseract_backend_unavailable_is_error():
+    backend = TesseractBackend()
+    backend._loaded = True  # pytesseract/binary tidak ditemukan
+    result = asyncio.run(backend.analyze(b'jpeg'))
+    assert result['error'] and backend.stats == {'requests': 1, 'errors': 1}
+
+
+def test_tesseract_available_never_loads_and_analyze_loads_off_loop():
+    backend = TesseractBackend()
+    # Dicek di event loop (photo_handler): hanya membaca flag, tidak import/menunggu lock
+    assert backend.available and not backend._loaded
+    threads = []
+
+    def preload():
+        threads.append(threading.current_thread().name)
+        backend._loaded = True
+
+    backend.preload = preload
+    result = asyncio.run(backend.analyze(b'jpeg'))
+
+    assert result['error'] and threads[0].startswith('tesseract')
+    assert not backend.available
+
+
+def test_stub_backend_is_deterministic():
+    data = b'struk-1'
+    backend = StubBackend(results={hashlib.sha256(data).hexdigest(): {'is_transfer': True, 'amount': 9000}})
+
+    assert asyncio.run(backend.analyze(data))['amount'] == 9000
+    assert asyncio.run(backend.analyze(b'lain'))['amount'] == 0
+
+
+class RecordingBackend(StubBackend):
+    name = 'remote'
+
+    def __init__(self, result):
+        super().__init__(default=result)
+        self.images = []
+
+    async def _analyze(self, image_data, mime_type, timeout):
+        self.images.append(image_data)
+        return await super()._analyze(image_data, mime_type, timeout)
+
+
+def test_cascade_escalates_only_low_confidence():
+    confident = {'is_transfer': True, 'amount': 50000, 'confidence': 0.9}
+    unsure = {'is_transfer': True, 'amount': 50000, 'confidence': 0.5}
+    remote = RecordingBackend({'is_transfer': True, 'amount': 55000, 'confidence': 0.95})
+
+    cascade = CascadeBackend(StubBackend(default=confident), remote, threshold=0.8)
+    assert asyncio.run(cascade.analyze(b'a'))['backend'] == 'stub'
+    assert remote.images == []
+
+    cascade = CascadeBackend(StubBackend(default=unsure), remote, threshold=0.8)
+    result = asyncio.run(cascade.analyze(b'b'))
+    assert result['amount'] == 55000 and result['backend'] == 'remote'
+    assert cascade.stats == {'requests': 1, 'errors': 0, 'local': 0, 'escalated': 1}
+
+
+def test_cascade_keeps_local_result_when_remote_fails():
+    local = StubBackend(default={'is_transfer': True, 'amount': 50000, 'confidence': 0.6})
+    remote = RecordingBackend({'is_transfer': False, 'amount': 0, 'error': True})
+    result = asyncio.run(CascadeBackend(local, remote).analyze(b'a'))
+    assert result['amount'] == 50000 and result['degraded'] is True
+
+
+def test_cascade_shutdown_stops_both_thread_pools():
+    gemini = GeminiClient()
+    cascade = create_backend('cascade', gemini=gemini)
+    cascade.shutdown()
+    assert cascade.local._executor._shutdown and gemini._executor._shutdown
+    StubBackend().shutdown()  # default: tidak ada resource
+
+
+def test_create_backend():
+    gemini = GeminiClient()
+    assert isinstance(create_backend('gemini', gemini=gemini), GeminiBackend)
+    cascade = create_backend('cascade', gemini=gemini, threshold=0.7)
+    assert isinstance(cascade.local, TesseractBackend) and cascade.threshold == 0.7
+    with pytest.raises(ValueError):
+        create_backend('easyocr')
+
+
+def test_backend_interface_and_config_share_backend_list(monkeypatch):
+    with pytest.raises(TypeError):
+        OCRBackend()  # _analyze wajib diimplementasikan
+
+    monkeypatch.setattr(Config, 'TELEGRAM_BOT_TOKEN', '123456:TEST-TOKEN')
+    monkeypatch.setattr(Config, 'RUN_MODE', 'polling')
+    for name in BACKENDS:
+        monkeypatch.setattr(Config, 'OCR_BACKEND', name)
+        Config.validate()
+    monkeypatch.setattr(Config, 'OCR_BACKEND', 'easyocr')
+    with pytest.raises(ValueError, match='OCR_BACKEND'):
+        Config.validate()
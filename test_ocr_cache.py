@@ -0,0 +1,102 @@
+"""
+Unit test untuk cache hasil OCR (file_unique_id, sha256, dHash)
+Jalankan dengan: python -m pytest test_ocr_cache.py
+"""
+
+import io
+
+from PIL import Image, ImageDraw
+
+from ocr_cache import MATCH_DHASH, MATCH_FILE, MATCH_SHA256, OCRCache, dhash, hamming, image_fingerprint
+from storage import Storage
+
+
+def other_image() -> bytes:
+    image = Image.new('RGB', (360, 640), 'black')
+    draw = ImageDraw.Draw(image)
+    for x in range(0, 360, 30):
+        draw.rectangle((x, 0, x + 15, 640), fill=(255, 255, 255))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def test_dhash_tolerates_reencoding_but_not_other_images(receipt):
+    original = dhash(receipt('125.000'))
+    rescreenshot = dhash(receipt('125.000', quality=60, size=(720, 1280)))
+    assert hamming(original, rescreenshot) <= 10
+    assert hamming(original, dhash(other_image())) > 16
+    # Nominal beda pun tetap mirip: dHash saja tidak cukup untuk menyebut struk ganda
+    assert hamming(original, dhash(receipt('9.875.000'))) <= 10
+    assert dhash(b'bukan gambar') is None
+
+
+def test_lookup_order_and_transaction_link(tmp_path, receipt):
+    cache = OCRCache(Storage(str(tmp_path / 'test.db')))
+    data = receipt('125.000')
+    sha256, image_hash = image_fingerprint(data)
+    result = {'is_transfer': True, 'amount': 125000, 'confidence': 0.9}
+
+    assert cache.find_by_file('u1') is None
+    assert cache.find_by_content('u1', sha256, image_hash) is None
+    entry = cache.store('u1', sha256, image_hash, result)
+    cache.link_transaction(entry.id, 42)
+
+    # Forward ulang: cocok lewat file_unique_id
+    hit = cache.find_by_file('u1')
+    assert hit.match == MATCH_FILE and hit.result == result and hit.transaction_id == 42
+
+    # File sama dengan file_unique_id lain: cocok lewat sha256, lalu dikenali tanpa unduh
+    hit = cache.find_by_content('u2', sha256, image_hash)
+    assert hit.match == MATCH_SHA256 and hit.transaction_id == 42
+    assert cache.find_by_file('u2').transaction_id == 42
+
+    # Screenshot ulang: hanya mirip, transaksi sebelumnya dibawa untuk cek ganda tapi tidak disimpan
+    sha_other, hash_other = image_fingerprint(receipt('125.000', quality=60, size=(720, 1280)))
+    similar = cache.find_by_content('u3', sha_other, hash_other)
+    assert similar.match == MATCH_DHASH and not similar.exact
+    stored = cache.store('u3', sha_other, hash_other, result, similar=similar)
+    assert stored.transaction_id == 42 and cache.find_by_file('u3').transaction_id is None
+
+    sha_diff, hash_diff = image_fingerprint(other_image())
+    assert cache.find_by_content('u4', sha_diff, hash_diff) is None
+    assert cache.stats == {'hits_file': 3, 'hits_sha256': 1, 'similar': 1, 'misses': 2, 'duplicates': 0}
+
+
+def test_link_transaction_covers_all_copies_of_same_file(tmp_path, receipt):
+    cache = OCRCache(Storage(str(tmp_path / 'test.db')))
+    sha256, image_hash = image_fingerprint(receipt('50.000'))
+    entry = cache.store('u1', sha256, image_hash, {'is_transfer': True, 'amount': 50000})
+    cache.find_by_content('u2', sha256, image_hash)  # salinan tanpa transaksi
+
+    cache.link_transaction(entry.id, 7)
+
+    assert cache.find_by_file('u2').transaction_id == 7
+
+
+def test_similar_match_ignores_unrecorded_entries(tmp_path, receipt):
+    cache = OCRCache(Storage(str(tmp_path / 'test.db')))
+    sha256, image_hash = image_fingerprint(receipt('125.000'))
+    entry = cache.store('u1', sha256, image_hash, {'is_transfer': True, 'amount': 125000})
+
+    # Belum dicatat sebagai transaksi: screenshot ulang tidak dianggap mirip struk tercatat
+    sha_other, hash_other = image_fingerprint(receipt('125.000', quality=60, size=(720, 1280)))
+    assert cache.find_by_content('u2', sha_other, hash_other) is None
+
+    cache.discard(entry.id)
+    assert cache.find_by_file('u1') is None
+
+
+def test_prune_removes_entries_past_retention(tmp_path, receipt):
+    import sqlite3
+
+    storage = Storage(str(tmp_path / 'test.db'))
+    cache = OCRCache(storage, retention_days=90)
+    sha256, image_hash = image_fingerprint(receipt('50.000'))
+    old = cache.store('u1', sha256, image_hash, {'is_transfer': True, 'amount': 50000})
+    cache.store('u2', 'lain', None, {'is_transfer': False, 'amount': 0})
+    with sqlite3.connect(storage.db_path) as conn:
+        conn.execute("UPDATE ocr_cache SET created_at = datetime('now', '-91 days') WHERE id = ?", (old.id,))
+
+    assert cache.prune() == 1
+    assert cache.find_by_file('u1') is None and cache.find_by_file('u2') is not None
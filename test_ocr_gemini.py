@@ -0,0 +1,72 @@
+"""
+Unit test untuk GeminiClient versi async (thread pool, timeout) tanpa memanggil API
+Jalankan dengan: python -m pytest test_ocr_gemini.py
+"""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+from ocr_gemini import GeminiClient
+
+
+class FakeModel:
+    """Pengganti GenerativeModel: generate_content blocking selama `delay` detik"""
+
+    def __init__(self, result, delay=0.0):
+        self.text = json.dumps(result)
+        self.delay = delay
+        self.request_options = []
+        self.images = []
+
+    def generate_content(self, contents, request_options=None):
+        self.request_options.append(request_options)
+        self.images.append(contents[0]['data'])
+        time.sleep(self.delay)
+        return SimpleNamespace(text=self.text)
+
+
+def make_client(model, timeout=5.0):
+    client = GeminiClient(timeout=timeout, max_workers=2)
+    client.api_key = 'test-key'
+    client._model, client._loaded = model, True
+    return client
+
+
+def test_async_result_and_sdk_timeout():
+    model = FakeModel({'is_transfer': True, 'amount': 125000.0, 'confidence': 0.9})
+    client = make_client(model, timeout=7)
+
+    result = asyncio.run(client.analyze_transfer_image_async(b'jpeg'))
+
+    assert result['is_transfer'] and result['amount'] == 125000
+    assert model.request_options == [{'timeout': 7}]
+
+
+def test_event_loop_not_blocked_while_analyzing():
+    client = make_client(FakeModel({'is_transfer': False}, delay=0.3))
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        await asyncio.gather(client.analyze_transfer_image_async(b'jpeg'), ticker())
+
+    asyncio.run(main())
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.25
+
+
+def test_timeout_returns_failed_result():
+    client = make_client(FakeModel({'is_transfer': True, 'amount': 1}, delay=0.5))
+
+    started = time.monotonic()
+    result = asyncio.run(client.analyze_transfer_image_async(b'jpeg', timeout=0.05))
+
+    assert result['timed_out'] and not result['is_transfer']
+    assert time.monotonic() - started < 0.4  # tidak menunggu thread selesai
+    client.shutdown()
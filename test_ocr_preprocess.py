@@ -0,0 +1,108 @@
+"""
+Unit test untuk persiapan gambar OCR (pilih ukuran foto, crop/grayscale/kompres)
+Jalankan dengan: python -m pytest test_ocr_preprocess.py
+"""
+
+import hashlib
+import io
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image
+
+from config import Config
+from ocr_cache import dhash
+from ocr_preprocess import choose_photo_size, prepare_image
+from verify_ocr import image_mime_type, telegram_size
+
+# Struk sintetis (fixture receipt di conftest.py, 1080×1920) dalam JPEG/PNG/WEBP; nominal di awal nama file
+FIXTURES = Path(__file__).parent / 'fixtures' / 'struk'
+
+
+def sizes(*dims):
+    return [SimpleNamespace(width=w, height=h, file_id=f'{w}x{h}') for w, h in dims]
+
+
+def test_choose_smallest_readable_size():
+    photos = sizes((144, 320), (360, 800), (576, 1280), (1080, 2400))
+    assert choose_photo_size(photos, 1280).file_id == '576x1280'
+    assert choose_photo_size(photos, 800).file_id == '360x800'
+    # Foto kecil: tidak ada yang cukup besar → pakai yang terbesar
+    assert choose_photo_size(sizes((90, 160), (320, 568)), 1280).file_id == '320x568'
+    # Lanskap: sisi panjang = lebar
+    assert choose_photo_size(sizes((320, 180), (1280, 720), (2560, 1440)), 1280).file_id == '1280x720'
+
+
+def test_large_receipt_downscaled_grayscale_and_smaller(receipt):
+    data = receipt('125.000', quality=95, size=(1440, 2560))
+    prepared = prepare_image(io.BytesIO(data), max_side=1600, quality=85)
+
+    assert prepared.sha256 == hashlib.sha256(data).hexdigest()
+    assert prepared.original_size == len(data)
+    assert prepared.dhash == dhash(data)
+    assert prepared.mime_type == 'image/jpeg'
+    assert len(prepared.data) < len(data) / 2
+    with Image.open(io.BytesIO(prepared.data)) as image:
+        assert image.mode == 'L'
+        assert max(image.size) == 1600
+
+
+def test_plain_margin_is_trimmed(receipt):
+    image = Image.new('RGB', (1200, 1200), 'white')
+    image.paste(Image.open(io.BytesIO(receipt('50.000'))).convert('RGB').crop((0, 0, 360, 400)), (400, 300))
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=95)
+
+    prepared = prepare_image(buffer)
+
+    with Image.open(io.BytesIO(prepared.data)) as result:
+        assert result.size[0] < 400 and result.size[1] < 440
+
+
+def test_original_kept_when_unreadable_or_already_small():
+    prepared = prepare_image(io.BytesIO(b'bukan gambar'))
+    assert prepared.data == b'bukan gambar' and prepared.dhash is None
+
+    tiny = io.BytesIO()
+    Image.effect_noise((64, 64), 64).save(tiny, 'JPEG', quality=30)
+    prepared = prepare_image(io.BytesIO(tiny.getvalue()), quality=95)
+    assert prepared.data == tiny.getvalue()
+
+
+def text_box(data: bytes):
+    """Kotak piksel gelap (teks nominal hitam) dalam gambar, atau None jika teks hilang"""
+    with Image.open(io.BytesIO(data)) as image:
+        return image.convert('L').point(lambda v: 255 if v < 60 else 0).getbbox()
+
+
+def test_fixture_payload_shrinks_and_stays_readable():
+    paths = sorted(FIXTURES.iterdir())
+    assert {path.suffix for path in paths} == {'.jpg', '.png', '.webp'}
+
+    original_total = prepared_total = 0
+    for path in paths:
+        original = path.read_bytes()
+        prepared = prepare_image(io.BytesIO(telegram_size(original, Config.OCR_PHOTO_MIN_SIDE)),
+                                 Config.OCR_MAX_SIDE, Config.OCR_JPEG_QUALITY)
+        original_total += len(original)
+        prepared_total += len(prepared.data)
+
+        # Teks nominal tetap utuh (lebar sebanding skala) & cukup tinggi untuk OCR
+        before, after = text_box(original), text_box(prepared.data)
+        with Image.open(io.BytesIO(original)) as image:
+            scale = min(Config.OCR_PHOTO_MIN_SIDE, Config.OCR_MAX_SIDE) / max(image.size)
+        assert after is not None, path.name
+        assert after[3] - after[1] >= 16, path.name
+        assert abs((after[2] - after[0]) - (before[2] - before[0]) * scale) <= 4, path.name
+
+    assert prepared_total < original_total * 0.4
+
+    # Ukuran yang terlalu kecil memang membuat teks hilang (pembanding untuk ukuran yang dipilih)
+    thumbnail = prepare_image(io.BytesIO(telegram_size((FIXTURES / '125000_bca.jpg').read_bytes(), 320)))
+    assert text_box(thumbnail.data) is None
+
+
+def test_fixture_mime_type_follows_content():
+    assert image_mime_type((FIXTURES / '50000_dana.png').read_bytes()) == 'image/png'
+    assert image_mime_type((FIXTURES / '1250000_mandiri.webp').read_bytes()) == 'image/webp'
+    assert image_mime_type((FIXTURES / '125000_bca.jpg').read_bytes()) == 'image/jpeg'
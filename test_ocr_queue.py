@@ -0,0 +1,113 @@
+"""
+Unit test untuk OCRQueue (giliran per chat, batas antrean, posisi, pembatalan)
+Jalankan dengan: python -m pytest test_ocr_queue.py
+"""
+
+import asyncio
+
+import pytest
+
+from ocr_queue import OCRQueue, OCRQueueFull
+
+
+def job_func(order, name, delay=0.01):
+    async def run():
+        order.append(name)
+        await asyncio.sleep(delay)
+        return name
+    return run
+
+
+def test_round_robin_between_chats():
+    queue = OCRQueue(workers=1, max_depth=10)
+    order = []
+
+    async def main():
+        jobs = [queue.submit('A', job_func(order, f'A{i}')) for i in range(3)]
+        jobs += [queue.submit('B', job_func(order, f'B{i}')) for i in range(2)]
+        results = await asyncio.gather(*(job.future for job in jobs))
+        await queue.stop()
+        return results
+
+    assert asyncio.run(main()) == ['A0', 'A1', 'A2', 'B0', 'B1']
+    assert order == ['A0', 'B0', 'A1', 'B1', 'A2']
+    snapshot = queue.snapshot()
+    assert snapshot['completed'] == 5 and snapshot['wait_time']['count'] == 5
+
+
+def test_position_follows_service_order():
+    queue = OCRQueue(workers=1, max_depth=10)
+
+    async def main():
+        a = [queue.submit('A', job_func([], 'a')) for _ in range(3)]
+        b = [queue.submit('B', job_func([], 'b')) for _ in range(1)]
+        # Belum ada worker yang sempat jalan: urutan layanan A0 B0 A1 A2
+        positions = [queue.position(job) for job in (a[0], b[0], a[1], a[2])]
+        await asyncio.gather(*(job.future for job in a + b))
+        done = queue.position(a[0])
+        await queue.stop()
+        return positions, done
+
+    assert asyncio.run(main()) == ([1, 2, 3, 4], 0)
+
+
+def test_full_queue_rejects_and_cancelled_job_frees_slot():
+    queue = OCRQueue(workers=1, max_depth=2)
+    order = []
+
+    async def main():
+        running = queue.submit('A', job_func(order, 'running', delay=0.05))
+        await asyncio.sleep(0)  # worker mengambil job pertama
+        waiting = [queue.submit('B', job_func(order, 'b1')), queue.submit('C', job_func(order, 'c1'))]
+        with pytest.raises(OCRQueueFull):
+            queue.submit('D', job_func(order, 'd1'))
+
+        waiting[0].future.cancel()  # pengirim batal (misal handler dibatalkan)
+        await asyncio.sleep(0)
+        queue.submit('D', job_func(order, 'd1'))
+        await asyncio.gather(running.future, waiting[1].future)
+        await asyncio.sleep(0.05)
+        await queue.stop()
+
+    asyncio.run(main())
+    assert order == ['running', 'c1', 'd1']
+    assert queue.stats['rejected'] == 1
+
+
+def test_job_exception_reaches_caller():
+    queue = OCRQueue(workers=2)
+
+    async def boom():
+        raise RuntimeError("gagal")
+
+    async def main():
+        job = queue.submit('A', boom)
+        with pytest.raises(RuntimeError):
+            await job.future
+        await queue.stop()
+
+    asyncio.run(main())
+    assert queue.stats['failed'] == 1
+
+
+def test_cancelled_caller_stops_running_job():
+    queue = OCRQueue(workers=1)
+    order = []
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        order.append('selesai')
+
+    async def main():
+        job = queue.submit('A', slow)
+        await asyncio.sleep(0.01)  # job sudah diambil worker
+        assert job.running
+        job.future.cancel()
+        await asyncio.sleep(0.08)
+        # Worker bebas lagi untuk job berikutnya
+        await queue.submit('B', job_func(order, 'b1')).future
+        await queue.stop()
+
+    asyncio.run(main())
+    assert order == ['b1']
+    assert queue.stats['cancelled'] == 1 and queue.running == 0
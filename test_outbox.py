@@ -0,0 +1,103 @@
+"""
+Unit test untuk OutboxRateLimiter (token bucket, prioritas, RetryAfter, gabung edit)
+Jalankan dengan: python -m pytest test_outbox.py
+"""
+
+import asyncio
+import time
+
+from telegram.error import RetryAfter
+
+from outbox import OutboxRateLimiter, TokenBucket, BULK
+
+
+class FakeApi:
+    """Callback pengganti Bot._do_post: catat (endpoint, text) dan waktu kirim"""
+
+    def __init__(self, fail_first=0):
+        self.calls = []
+        self.fail_first = fail_first
+
+    async def __call__(self, endpoint, data, **kwargs):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise RetryAfter(0)
+        self.calls.append((endpoint, data.get('text'), time.monotonic()))
+        return {'ok': data.get('text')}
+
+
+def request(limiter, api, endpoint='sendMessage', chat_id=1, text='x', rate_limit_args=None, **extra):
+    data = {'chat_id': chat_id, 'text': text, **extra}
+    return limiter.process_request(api, (endpoint, data), {}, endpoint, data, rate_limit_args)
+
+
+def test_token_bucket_delay():
+    bucket = TokenBucket(rate=2, capacity=1)
+    now = time.monotonic()
+    assert bucket.delay(now) == 0
+    bucket.consume()
+    assert abs(bucket.delay(now) - 0.5) < 1e-6
+    assert bucket.delay(now + 0.5) == 0
+
+
+def test_private_chat_is_spaced_after_burst():
+    limiter = OutboxRateLimiter(global_rate=1000, private_rate=20)
+    api = FakeApi()
+
+    async def main():
+        await asyncio.gather(*(request(limiter, api, text=str(i)) for i in range(6)))
+
+    asyncio.run(main())
+    times = [t for _, _, t in api.calls]
+    assert [text for _, text, _ in api.calls] == [str(i) for i in range(6)]
+    # 3 token burst, sisanya ~1/20 detik per pesan
+    assert times[-1] - times[0] >= 0.1
+
+
+def test_interactive_before_bulk():
+    limiter = OutboxRateLimiter(global_rate=20, private_rate=1000)
+    api = FakeApi()
+
+    async def main():
+        await limiter.initialize()
+        limiter._global.bucket.tokens = 0   # antrean penuh: semua harus menunggu
+        bulk = [request(limiter, api, chat_id=i, text=f'bulk{i}', rate_limit_args=BULK) for i in range(3)]
+        tasks = [asyncio.ensure_future(coro) for coro in bulk]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.ensure_future(request(limiter, api, chat_id=99, text='reply')))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert api.calls[0][1] == 'reply'
+
+
+def test_retry_after_pauses_and_retries():
+    limiter = OutboxRateLimiter()
+    api = FakeApi(fail_first=1)
+
+    async def main():
+        return await request(limiter, api, text='halo')
+
+    assert asyncio.run(main()) == {'ok': 'halo'}
+    assert limiter.stats['retry_after'] == 1
+    assert limiter.stats['sent'] == 1
+
+
+def test_consecutive_edits_coalesce_to_latest():
+    limiter = OutboxRateLimiter(global_rate=1000, private_rate=10)
+    api = FakeApi()
+
+    async def main():
+        await limiter.initialize()
+        limiter._chat_lane(1).bucket.tokens = 0   # edit pertama harus antre
+        results = await asyncio.gather(*(
+            request(limiter, api, endpoint='editMessageText', message_id=5, text=f'v{i}')
+            for i in range(4)
+        ))
+        return results
+
+    results = asyncio.run(main())
+    assert [text for _, text, _ in api.calls] == ['v3']
+    assert results == [{'ok': 'v3'}] * 4
+    assert limiter.stats['coalesced'] == 3
+    assert limiter._edits == {}
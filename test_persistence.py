@@ -0,0 +1,75 @@
+"""
+Unit test untuk SQLitePersistence (restart, TTL per key, batch flush, prune)
+Jalankan dengan: python -m pytest test_persistence.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from persistence import SQLitePersistence
+from storage import Storage
+
+
+def make(tmp_path, **kwargs):
+    return SQLitePersistence(Storage(str(tmp_path / 'state.db')), **kwargs)
+
+
+def test_state_survives_restart(tmp_path):
+    persistence = make(tmp_path)
+
+    async def main():
+        await persistence.get_user_data()
+        await persistence.update_user_data(1, {'pending_input': 'tf'})
+        await persistence.update_user_data(2, {'pending_input': 'cash'})
+        await persistence.update_user_data(2, {})
+
+    asyncio.run(main())
+
+    restarted = SQLitePersistence(persistence.storage)
+    assert asyncio.run(restarted.get_user_data()) == {1: {'pending_input': 'tf'}}
+
+
+def test_concurrent_updates_flush_in_one_batch(tmp_path):
+    persistence = make(tmp_path)
+
+    async def main():
+        await persistence.get_user_data()
+        # Seperti Application.update_persistence: semua user sekaligus via gather
+        await asyncio.gather(*(
+            persistence.update_user_data(user_id, {'pending_input': 'tf'}) for user_id in range(50)
+        ))
+        # Data tidak berubah → tidak ada tulisan baru
+        await persistence.update_user_data(0, {'pending_input': 'tf'})
+
+    asyncio.run(main())
+    assert persistence.stats == {'flushes': 1, 'rows': 50, 'expired': 0}
+
+
+def test_expired_key_hidden_before_handler(tmp_path):
+    persistence = make(tmp_path, default_ttl=60, ttls={'pending_input': 0})
+    user_data = {'pending_input': 'tf', 'catatan': 'x'}
+
+    async def main():
+        await persistence.get_user_data()
+        await persistence.update_user_data(1, user_data)
+        await persistence.refresh_user_data(1, user_data)
+
+    asyncio.run(main())
+    assert user_data == {'catatan': 'x'}
+    assert asyncio.run(SQLitePersistence(persistence.storage).get_user_data()) == {1: {'catatan': 'x'}}
+
+
+def test_prune_releases_idle_users(tmp_path):
+    persistence = make(tmp_path, ttls={'pending_input': 0})
+    dropped = []
+    user_data = {1: {'pending_input': 'tf'}, 2: {}, 3: {'menu': 'rekap'}}
+    application = SimpleNamespace(user_data=user_data, drop_user_data=dropped.append)
+
+    async def main():
+        await persistence.get_user_data()
+        for user_id, data in user_data.items():
+            await persistence.update_user_data(user_id, data)
+        return await persistence.prune(application)
+
+    assert asyncio.run(main()) == 2
+    assert sorted(dropped) == [1, 2]
@@ -0,0 +1,120 @@
+"""
+Unit test untuk CallbackRouter (exact/prefix dispatch, payload bertipe, answer sekali)
+Jalankan dengan: python -m pytest test_router.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from router import CallbackRouter, STALE_TEXT, ERROR_TEXT
+
+
+class FakeQuery:
+    def __init__(self, data):
+        self.data = data
+        self.answers = []
+        self.edits = []
+
+    async def answer(self, text=None):
+        self.answers.append(text)
+
+    async def edit_message_text(self, text, **kwargs):
+        self.edits.append(text)
+
+
+def dispatch(router, data):
+    query = FakeQuery(data)
+    update = SimpleNamespace(callback_query=query)
+    asyncio.run(router.dispatch(update, SimpleNamespace()))
+    return query
+
+
+@pytest.fixture
+def router_calls():
+    router = CallbackRouter()
+    calls = []
+
+    def recorder(name):
+        async def handler(update, context, *args):
+            calls.append((name, args))
+        return handler
+
+    router.exact('menu_main', recorder('menu_main'))
+    router.prefix('ledger_', recorder('ledger'), fields=(str, str, int))
+    router.prefix('reset_and_modal_', recorder('reset_and_modal'), fields=(int,))
+    router.prefix('reset_', recorder('reset'), fields=(str,))
+    router.prefix('ocr_save_', recorder('ocr_save'), fields=(int, int))
+    return router, calls
+
+
+def test_exact_and_typed_prefix_dispatch(router_calls):
+    router, calls = router_calls
+    dispatch(router, 'menu_main')
+    dispatch(router, 'ledger_2025-12-01_2025-12-07_2')
+    dispatch(router, 'ocr_save_150000_42')
+    assert calls == [
+        ('menu_main', ()),
+        ('ledger', ('2025-12-01', '2025-12-07', 2)),
+        ('ocr_save', (150000, 42)),
+    ]
+
+
+def test_longest_prefix_wins(router_calls):
+    router, calls = router_calls
+    dispatch(router, 'reset_and_modal_500000')
+    dispatch(router, 'reset_2025-12-10')
+    assert calls == [('reset_and_modal', (500000,)), ('reset', ('2025-12-10',))]
+
+
+@pytest.mark.parametrize("data", ['ocr_save_abc_1', 'ocr_save_100', 'unknown_button', ''])
+def test_invalid_or_unknown_data_is_answered_not_dispatched(router_calls, data):
+    router, calls = router_calls
+    query = dispatch(router, data)
+    assert calls == []
+    assert query.answers == [STALE_TEXT]
+
+
+def test_answers_once_and_times_route():
+    router = CallbackRouter()
+
+    async def handler(update, context):
+        await update.callback_query.edit_message_text("ok")
+
+    router.exact('rekap_today', handler, answer="📊 Status hari ini")
+    query = dispatch(router, 'rekap_today')
+    assert query.answers == ["📊 Status hari ini"]
+    assert router.stats()['rekap_today']['count'] == 1
+
+
+def test_handler_error_is_reported():
+    router = CallbackRouter()
+
+    async def broken(update, context):
+        raise RuntimeError("db down")
+
+    router.exact('action_edit', broken)
+    query = dispatch(router, 'action_edit')
+    assert query.answers == [None]
+    assert query.edits == [ERROR_TEXT]
+
+    # Teks sukses route tidak muncul jika handler gagal
+    router.exact('action_fix_daily', broken, answer="✅ Rekap difinalisasi")
+    query = dispatch(router, 'action_fix_daily')
+    assert query.answers == [ERROR_TEXT]
+    assert query.edits == [ERROR_TEXT]
+
+
+def test_duplicate_registration_rejected():
+    router = CallbackRouter()
+
+    async def handler(update, context):
+        pass
+
+    router.exact('menu_main', handler)
+    with pytest.raises(ValueError):
+        router.exact('menu_main', handler)
+    router.prefix('ledger_', handler)
+    with pytest.raises(ValueError):
+        router.prefix('ledger_', handler)
@@ -0,0 +1,41 @@
+"""
+Unit test untuk profil startup & lazy import
+Jalankan dengan: python -m pytest test_startup_profile.py
+"""
+
+import os
+import subprocess
+import sys
+
+from startup_profile import direct_imports, parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _io
+import time:       200 |        300 | site
+import time:        50 |         50 |     telegram._utils
+import time:       400 |        450 |   telegram
+import time:        30 |         30 |   config
+import time:        20 |        500 | bot
+"""
+
+
+def test_parse_importtime():
+    rows = parse_importtime(SAMPLE)
+    assert [(row.module, row.depth) for row in rows] == [
+        ('_io', 1), ('site', 0), ('telegram._utils', 2), ('telegram', 1), ('config', 1), ('bot', 0),
+    ]
+    assert rows[3].self_us == 400 and rows[3].cumulative_us == 450
+
+
+def test_direct_imports_only_children_of_last_module():
+    assert [row.module for row in direct_imports(parse_importtime(SAMPLE))] == ['config', 'telegram']
+
+
+def test_import_bot_is_light():
+    # Tanpa token pun import tidak boleh gagal, dan Gemini tidak ikut di-import
+    code = "import sys, bot; print('google.generativeai' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            env={**os.environ, 'TELEGRAM_BOT_TOKEN': ''})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'False'
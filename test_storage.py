@@ -0,0 +1,216 @@
+"""
+Unit test untuk query laporan di storage (rollup, rekap range, ledger, batch)
+Jalankan dengan: python -m pytest test_storage.py
+"""
+
+import random
+import sqlite3
+from datetime import date, timedelta
+
+from storage import Storage, _TIME_BUCKETS_SQL
+from logic import FinancialLogic
+from scheduler import RekapScheduler
+from utils import parse_batch_entries
+
+
+def make_summary(omzet: float, tf: float, keluar: float, pos: float) -> dict:
+    return {
+        'omzet_manual': omzet,
+        'total_tf': tf,
+        'count_tf': 2,
+        'total_pengeluaran': keluar,
+        'count_pengeluaran': 1,
+        'pos_total': pos,
+        'selisih': omzet - pos,
+    }
+
+
+def naive_totals(storage: Storage, start: str, end: str) -> dict:
+    rows = storage.get_summaries_range(start, end)
+    return {
+        'days': len(rows),
+        'total_omzet': sum(r[13] for r in rows),
+        'total_tf': sum(r[6] for r in rows),
+        'total_pengeluaran': sum(r[8] for r in rows),
+        'total_pos': sum(r[10] for r in rows),
+    }
+
+
+def test_range_summary_matches_daily_rows(tmp_path):
+    storage = Storage(str(tmp_path / 'test.db'))
+    logic = FinancialLogic(storage)
+    scheduler = RekapScheduler(storage, logic)
+
+    rng = random.Random(42)
+    first = date(2025, 1, 1)
+    for i in range(200):
+        if rng.random() < 0.15:
+            continue  # hari libur, tidak ada rekap
+        day = (first + timedelta(days=i)).isoformat()
+        scheduler.save_summary(day, 'DRAFT', make_summary(1000 * i, 300 * i, 50 * i, 990 * i))
+        if rng.random() < 0.3:
+            # Revisi: versi terbaru yang harus dihitung
+            scheduler.save_summary(day, 'REVISED', make_summary(2000 * i, 600 * i, 70 * i, 1990 * i))
+
+    for _ in range(100):
+        start = first + timedelta(days=rng.randint(0, 199))
+        end = start + timedelta(days=rng.randint(0, 120))
+        rekap = logic.calculate_range_summary(start.isoformat(), end.isoformat())
+        expected = naive_totals(storage, start.isoformat(), end.isoformat())
+        for key, value in expected.items():
+            assert rekap[key] == value, (start, end, key)
+
+
+def test_long_range_uses_few_segments():
+    segments = FinancialLogic.plan_range_segments(date(2024, 1, 10), date(2025, 12, 20))
+    kinds = [kind for kind, _, _ in segments]
+    assert kinds.count('month') == 22
+    assert len(segments) <= 30
+
+    # Segmen harus menutup range tanpa celah atau tumpang tindih
+    cursor = date(2024, 1, 10)
+    for _, seg_start, seg_end in segments:
+        assert seg_start == cursor
+        cursor = seg_end + timedelta(days=1)
+    assert cursor == date(2025, 12, 21)
+
+
+def test_monthly_summary_reads_rollup(tmp_path):
+    storage = Storage(str(tmp_path / 'test.db'))
+    logic = FinancialLogic(storage)
+    scheduler = RekapScheduler(storage, logic)
+
+    scheduler.save_summary('2025-12-01', 'DRAFT', make_summary(100, 40, 10, 100))
+    scheduler.save_summary('2025-12-02', 'FINAL', make_summary(200, 60, 20, 195))
+    scheduler.save_summary('2025-12-01', 'REVISED', make_summary(150, 40, 10, 150))
+
+    rekap = logic.calculate_monthly_summary(2025, 12)
+    assert rekap['days'] == 2
+    assert rekap['total_omzet'] == 350
+    assert rekap['total_selisih'] == 5
+
+
+def test_ledger_running_balance_matches_summary(tmp_path):
+    storage = Storage(str(tmp_path / 'test.db'))
+    logic = FinancialLogic(storage)
+
+    for day in ('2025-12-01', '2025-12-02'):
+        storage.add_transaction(day, '08:00:00', 'modal', 500000, 'manual')
+        storage.add_transaction(day, '10:00:00', 'tf', 100000, 'manual')
+        storage.add_transaction(day, '11:00:00', 'keluar', 50000, 'manual')
+        storage.add_transaction(day, '12:00:00', 'cash', 900000, 'manual')
+        storage.add_transaction(day, '13:00:00', 'modal', 600000, 'manual')  # modal terakhir berlaku
+        storage.add_transaction(day, '18:00:00', 'pos', 1400000, 'manual')
+        storage.add_transaction(day, '20:00:00', 'tf', 700000, 'manual')
+        storage.add_transaction(day, '21:00:00', 'cash', 1200000, 'manual')
+
+    rows = storage.get_ledger('2025-12-01', '2025-12-02', limit=100)
+    assert len(rows) == 14  # pos tidak masuk buku kas
+    assert all(row[10] == 14 for row in rows)
+
+    last_per_day = {}
+    for row in rows:
+        last_per_day[row[1]] = row
+
+    for day, row in last_per_day.items():
+        summary = logic.calculate_daily_summary(day)
+        assert row[6] == summary['cash_akhir']        # saldo laci akhir
+        assert row[8] == summary['omzet_manual']      # omzet berjalan akhir hari
+
+    assert rows[-1][9] == 2 * logic.calculate_daily_summary('2025-12-01')['omzet_manual']
+
+    # Paging tidak mengubah saldo berjalan
+    page = storage.get_ledger('2025-12-01', '2025-12-02', limit=5, offset=5)
+    assert page == rows[5:10]
+
+
+def test_time_buckets_use_covering_index(tmp_path):
+    storage = Storage(str(tmp_path / 'test.db'))
+    storage.add_transaction('2025-12-01', '08:05:00', 'tf', 10000, 'manual')
+    storage.add_transaction('2025-12-01', '08:55:00', 'tf', 20000, 'manual')
+    storage.add_transaction('2025-12-01', '09:10:00', 'keluar', 5000, 'manual')
+    storage.add_transaction('2025-12-02', '08:30:00', 'tf', 30000, 'manual')
+    storage.add_transaction('2025-12-02', '08:30:00', 'cash', 99000, 'manual')
+
+    assert storage.get_time_buckets('2025-12-01', '2025-12-02', 60) == [
+        (480, 'tf', 3, 60000.0),
+        (540, 'keluar', 1, 5000.0),
+    ]
+    assert storage.get_time_buckets('2025-12-01', '2025-12-01', 30)[0] == (480, 'tf', 1, 10000.0)
+    assert storage.count_active_days('2025-12-01', '2025-12-31') == 2
+
+    # Query yang benar-benar dipakai get_time_buckets
+    conn = sqlite3.connect(storage.db_path)
+    plan = ' '.join(row[3] for row in conn.execute(
+        'EXPLAIN QUERY PLAN ' + _TIME_BUCKETS_SQL, (60, 60, '2025-12-01', '2025-12-02')
+    ))
+    conn.close()
+    assert 'COVERING INDEX idx_tanggal_waktu_tipe_jumlah' in plan
+
+
+def test_batch_insert_is_atomic(tmp_path):
+    storage = Storage(str(tmp_path / 'test.db'))
+    logic = FinancialLogic(storage)
+
+    entries, errors = parse_batch_entries(
+        "modal 500k\ntf 50k\nkeluar 20rb es batu\nkeluar 3x5rb plastik\ncash 1.2jt\npos 1.7jt"
+    )
+    assert errors == []
+
+    ids = storage.add_transactions_batch([
+        {'tanggal': '2025-12-01', 'waktu': '21:00:00', 'tipe': e['tipe'],
+         'jumlah': e['jumlah'], 'sumber': 'batch', 'keterangan': e['keterangan']}
+        for e in entries
+    ])
+    assert len(ids) == 6
+
+    summary = logic.calculate_daily_summary('2025-12-01')
+    assert summary['total_pengeluaran'] == 35000
+    assert summary['omzet_manual'] == 1200000 + 50000 + 35000 - 500000
+
+    # Baris rusak di tengah batch → tidak ada yang tersimpan
+    try:
+        storage.add_transactions_batch([
+            {'tanggal': '2025-12-02', 'waktu': '21:00:00', 'tipe': 'tf', 'jumlah': 1000, 'sumber': 'batch'},
+            {'tanggal': '2025-12-02', 'waktu': '21:00:00', 'tipe': 'tf', 'jumlah': None, 'sumber': 'batch'},
+        ])
+    except sqlite3.IntegrityError:
+        pass
+    assert storage.get_transactions_by_date('2025-12-02') == []
+
+    _, errors = parse_batch_entries("tf 50k\nbonus 5k\nkeluar -5rb")
+    assert [e.split(':')[0] for e in errors] == ['Baris 2', 'Baris 3']
+
+
+def test_ocr_pending_claimed_once(tmp_path):
+    storage = Storage(str(tmp_path / 'ocr.db'))
+    pending_id = storage.add_ocr_pending(chat_id=10, message_id=77, amount=150000, confidence=0.9)
+
+    # Chat lain tidak bisa mengklaim
+    assert storage.claim_ocr_pending(pending_id, 11, 'saved') is None
+    assert storage.claim_ocr_pending(pending_id, 10, 'saved') == (77, 150000, None, None)
+    # Tombol ditekan dua kali / dibatalkan setelah disimpan → tidak berlaku
+    assert storage.claim_ocr_pending(pending_id, 10, 'saved') is None
+    assert storage.claim_ocr_pending(pending_id, 10, 'cancelled') is None
+
+
+def test_delete_ocr_pending_removes_processed_and_abandoned_rows(tmp_path):
+    import sqlite3
+
+    storage = Storage(str(tmp_path / 'ocr.db'))
+    saved, cancelled, waiting, abandoned = [
+        storage.add_ocr_pending(chat_id=10, message_id=70 + i, amount=1000) for i in range(4)
+    ]
+    storage.claim_ocr_pending(saved, 10, 'saved')
+    storage.claim_ocr_pending(cancelled, 10, 'cancelled')
+    with sqlite3.connect(storage.db_path) as conn:
+        conn.execute("UPDATE ocr_pending SET created_at = datetime('now', '-2 days')")
+        conn.execute("UPDATE ocr_pending SET created_at = datetime('now', '-8 days') WHERE id = ?", (abandoned,))
+        one_day, seven_days = conn.execute("SELECT datetime('now', '-1 day'), datetime('now', '-7 days')").fetchone()
+
+    # Tanpa pending_before: hanya yang sudah diproses
+    assert storage.delete_ocr_pending(before=one_day) == 2
+    assert storage.delete_ocr_pending(before=one_day, pending_before=seven_days) == 1
+    # Pending 2 hari masih bisa disimpan dari tombolnya
+    assert storage.claim_ocr_pending(waiting, 10, 'saved') == (72, 1000, None, None)
+    assert storage.claim_ocr_pending(abandoned, 10, 'saved') is None
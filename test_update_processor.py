@@ -0,0 +1,93 @@
+"""
+Unit test untuk PerChatUpdateProcessor (urutan per chat, batas global, metrik)
+Jalankan dengan: python -m pytest test_update_processor.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from update_processor import PerChatUpdateProcessor
+
+
+def make_update(chat_id):
+    chat = SimpleNamespace(id=chat_id) if chat_id is not None else None
+    return SimpleNamespace(effective_chat=chat)
+
+
+def run_updates(processor, updates, handler):
+    """Jalankan semua update bersamaan seperti Application (satu task per update)"""
+    async def main():
+        tasks = [
+            asyncio.create_task(processor.process_update(update, handler(i, update)))
+            for i, update in enumerate(updates)
+        ]
+        await asyncio.gather(*tasks)
+    asyncio.run(main())
+
+
+def test_same_chat_stays_ordered():
+    processor = PerChatUpdateProcessor(8)
+    finished = []
+
+    async def handler(i, update):
+        # Update awal paling lambat; tanpa lock per-chat urutannya akan terbalik
+        await asyncio.sleep(0.01 * (5 - i))
+        finished.append(i)
+
+    run_updates(processor, [make_update(1) for _ in range(5)], handler)
+    assert finished == [0, 1, 2, 3, 4]
+    assert processor._chats == {}
+
+
+def test_chats_run_in_parallel_under_global_cap():
+    processor = PerChatUpdateProcessor(3)
+    active = {'now': 0, 'peak': 0}
+    per_chat_active = {}
+
+    async def handler(i, update):
+        chat_id = update.effective_chat.id
+        per_chat_active[chat_id] = per_chat_active.get(chat_id, 0) + 1
+        assert per_chat_active[chat_id] == 1
+        active['now'] += 1
+        active['peak'] = max(active['peak'], active['now'])
+        await asyncio.sleep(0.01)
+        active['now'] -= 1
+        per_chat_active[chat_id] -= 1
+
+    updates = [make_update(chat_id) for chat_id in range(6) for _ in range(2)]
+    run_updates(processor, updates, handler)
+    assert active['peak'] == 3
+    assert processor.metrics.peak_in_flight == 3
+
+
+def test_metrics_record_queue_delay():
+    processor = PerChatUpdateProcessor(1)
+
+    async def handler(i, update):
+        await asyncio.sleep(0.02)
+
+    run_updates(processor, [make_update(1), make_update(2), make_update(None)], handler)
+    snap = processor.metrics.snapshot()
+    assert snap['queue_delay']['count'] == 3
+    assert snap['handle_time']['count'] == 3
+    assert snap['queue_delay']['max'] >= 0.03     # update ke-3 menunggu 2 update sebelumnya
+    assert snap['in_flight'] == 0 and snap['waiting'] == 0
+
+
+def test_cancelled_while_waiting_releases_slot():
+    processor = PerChatUpdateProcessor(1)
+
+    async def main():
+        gate = asyncio.Event()
+        first = asyncio.create_task(processor.process_update(make_update(1), gate.wait()))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(processor.process_update(make_update(1), asyncio.sleep(0)))
+        await asyncio.sleep(0)
+        second.cancel()
+        gate.set()
+        await first
+        await asyncio.gather(second, return_exceptions=True)
+
+    asyncio.run(main())
+    assert processor.metrics.waiting == 0
+    assert processor._chats == {}
@@ -1,219 +1,186 @@
 """
-Unit test untuk utils.parse_amount()
-Jalankan dengan: python test_utils.py
+Unit test untuk utils (parse_amount, format_rupiah, parse_date, sanitize_text)
+Jalankan dengan: python -m pytest test_utils.py
+
+Property-based test ada di test_utils_properties.py,
+benchmark dengan baseline ada di test_utils_benchmark.py.
 """
 
-from utils import parse_amount, format_rupiah
-
-
-def test_parse_amount():
-    """Test cases untuk parse_amount"""
-
-    print("🧪 Testing parse_amount()...\n")
-
-    test_cases = [
-        # Format dasar
-        ("4000", 4000, "Angka biasa"),
-        ("4k", 4000, "Format K"),
-        ("4K", 4000, "Format K uppercase"),
-        ("4rb", 4000, "Format rb"),
-        ("4 ribu", 4000, "Format ribu dengan spasi"),
-        ("4.000", 4000, "Format dengan titik"),
-        ("4,000", 4000, "Format dengan koma"),
-        ("4jt", 4000000, "Format juta (jt)"),
-        ("4 juta", 4000000, "Format juta dengan spasi"),
-        ("4m", 4000000, "Format million"),
-        ("4M", 4000000, "Format million uppercase"),
-
-        # Format penjumlahan dengan +
-        ("2000 + 7000 + 8000", 17000, "Penjumlahan dengan +"),
-        ("2k + 7k + 8k", 17000, "Penjumlahan K dengan +"),
-        ("1jt + 500rb", 1500000, "Penjumlahan juta + ribu"),
-        ("100000 + 50000 + 25000", 175000, "Penjumlahan 3 angka"),
-
-        # Format penjumlahan dengan koma
-        ("2000, 7000, 8000", 17000, "Penjumlahan dengan koma"),
-        ("2k, 7k, 8k", 17000, "Penjumlahan K dengan koma"),
-        ("100k, 50k, 25k", 175000, "Penjumlahan K dengan koma"),
-
-        # Format campuran
-        ("1.000.000 + 500.000", 1500000, "Penjumlahan dengan separator"),
-        ("1jt + 500k + 250rb", 1750000, "Penjumlahan campuran format"),
-
-        # Edge cases
-        ("0", 0, "Angka nol"),
-        ("1", 1, "Angka satu"),
-        ("1k+2k+3k", 6000, "Penjumlahan tanpa spasi"),
-    ]
-
-    passed = 0
-    failed = 0
-
-    for input_str, expected, description in test_cases:
-        try:
-            result = parse_amount(input_str)
-            if result == expected:
-                print(f"✅ {description}")
-                print(f"   Input: '{input_str}' → Output: {format_rupiah(result)}")
-                passed += 1
-            else:
-                print(f"❌ {description}")
-                print(f"   Input: '{input_str}'")
-                print(f"   Expected: {format_rupiah(expected)}, Got: {format_rupiah(result)}")
-                failed += 1
-        except Exception as e:
-            print(f"❌ {description}")
-            print(f"   Input: '{input_str}'")
-            print(f"   Error: {e}")
-            failed += 1
-        print()
-
-    # Test error cases
-    print("\n🧪 Testing error cases...\n")
-
-    error_cases = [
-        ("", "Input kosong"),
-        ("abc", "Non-numeric input"),
-        ("-1000", "Angka negatif"),
-        ("+++", "Hanya operator"),
-    ]
-
-    for input_str, description in error_cases:
-        try:
-            result = parse_amount(input_str)
-            print(f"❌ {description} - Should have raised error!")
-            print(f"   Input: '{input_str}' → Unexpectedly got: {result}")
-            failed += 1
-        except ValueError as e:
-            print(f"✅ {description} - Correctly raised error")
-            print(f"   Input: '{input_str}' → Error: {str(e)}")
-            passed += 1
-        print()
-
-    # Summary
-    print(f"\n{'='*50}")
-    print(f"📊 Test Summary:")
-    print(f"   ✅ Passed: {passed}")
-    print(f"   ❌ Failed: {failed}")
-    print(f"   📈 Total: {passed + failed}")
-    print(f"{'='*50}\n")
-
-    if failed == 0:
-        print("🎉 All tests passed!")
-    else:
-        print(f"⚠️  {failed} test(s) failed!")
-
-    return failed == 0
-
-
-def test_format_rupiah():
-    """Test cases untuk format_rupiah"""
-
-    print("\n🧪 Testing format_rupiah()...\n")
-
-    test_cases = [
-        (1000, "Rp1.000"),
-        (1234567, "Rp1.234.567"),
-        (0, "Rp0"),
-        (-5000, "-Rp5.000"),
-        (1000000, "Rp1.000.000"),
-    ]
-
-    passed = 0
-    failed = 0
-
-    for amount, expected in test_cases:
-        result = format_rupiah(amount)
-        if result == expected:
-            print(f"✅ {amount} → {result}")
-            passed += 1
-        else:
-            print(f"❌ {amount} → Expected: {expected}, Got: {result}")
-            failed += 1
-
-    print(f"\n✅ Passed: {passed}/{passed + failed}\n")
-
-    return failed == 0
-
-
-def test_real_world_scenarios():
-    """Test dengan skenario dunia nyata"""
-
-    print("\n🧪 Testing real-world scenarios...\n")
-
-    scenarios = [
-        # Scenario: User input untuk /tf
-        {
-            "command": "/tf 2000 + 7000 + 8rb",
-            "input": "2000 + 7000 + 8rb",
-            "expected": 17000,
-            "description": "Transfer dengan penjumlahan"
-        },
-        # Scenario: User input untuk /keluar
-        {
-            "command": "/keluar 2000 beli permen, 4000 plastik",
-            "input": "2000",  # Ini yang akan di-parse sebagai amount
-            "expected": 2000,
-            "description": "Pengeluaran dengan keterangan (parsing pertama)"
-        },
-        # Scenario: User input modal
-        {
-            "command": "/modal 500k + 200k",
-            "input": "500k + 200k",
-            "expected": 700000,
-            "description": "Modal dengan penjumlahan"
-        },
-        # Scenario: Cash akhir
-        {
-            "command": "/cash 1jt + 200rb + 50000",
-            "input": "1jt + 200rb + 50000",
-            "expected": 1250000,
-            "description": "Cash dengan berbagai format"
-        },
-    ]
-
-    passed = 0
-    failed = 0
-
-    for scenario in scenarios:
-        print(f"📝 Scenario: {scenario['description']}")
-        print(f"   Command: {scenario['command']}")
-
-        try:
-            result = parse_amount(scenario['input'])
-            if result == scenario['expected']:
-                print(f"   ✅ Result: {format_rupiah(result)}")
-                passed += 1
-            else:
-                print(f"   ❌ Expected: {format_rupiah(scenario['expected'])}, Got: {format_rupiah(result)}")
-                failed += 1
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
-            failed += 1
-
-        print()
-
-    print(f"✅ Passed: {passed}/{passed + failed}\n")
-
-    return failed == 0
-
-
-if __name__ == "__main__":
-    print("="*60)
-    print("🧪 UNIT TESTS - Utils Module")
-    print("="*60 + "\n")
-
-    all_passed = True
-
-    # Run all tests
-    all_passed &= test_parse_amount()
-    all_passed &= test_format_rupiah()
-    all_passed &= test_real_world_scenarios()
-
-    # Final summary
-    print("\n" + "="*60)
-    if all_passed:
-        print("🎉 ALL TESTS PASSED!")
-    else:
-        print("⚠️  SOME TESTS FAILED - Please check above")
-    print("="*60)
+from datetime import datetime
+
+import pytest
+
+from formatting import format_tanggal, format_tanggal_singkat, format_bulan
+from utils import (
+    parse_amount, parse_amount_detail, format_rupiah, split_amount_text,
+    parse_date, parse_date_range, sanitize_text
+)
+
+
+# ===== parse_amount =====
+
+@pytest.mark.parametrize("text, expected", [
+    # Format dasar
+    ("4000", 4000),                         # Angka biasa
+    ("4k", 4000),                           # Format K
+    ("4K", 4000),                           # Format K uppercase
+    ("4rb", 4000),                          # Format rb
+    ("4 ribu", 4000),                       # Format ribu dengan spasi
+    ("4.000", 4000),                        # Format dengan titik
+    ("4,000", 4000),                        # Format dengan koma
+    ("4jt", 4000000),                       # Format juta (jt)
+    ("4 juta", 4000000),                    # Format juta dengan spasi
+    ("4m", 4000000),                        # Format million
+    ("4M", 4000000),                        # Format million uppercase
+    ("10 000", 10000),                      # Separator ribuan spasi
+    ("4 000", 4000),
+    ("1, 234", 1234),                       # Koma + spasi sebelum grup 3 digit = separator
+    ("1, 234, 567", 1234567),
+
+    # Format penjumlahan dengan +
+    ("2000 + 7000 + 8000", 17000),
+    ("2k + 7k + 8k", 17000),
+    ("1jt + 500rb", 1500000),
+    ("100000 + 50000 + 25000", 175000),
+
+    # Format penjumlahan dengan koma
+    ("2000, 7000, 8000", 17000),
+    ("2k, 7k, 8k", 17000),
+    ("100k, 50k, 25k", 175000),
+
+    # Format campuran
+    ("1.000.000 + 500.000", 1500000),
+    ("1jt + 500k + 250rb", 1750000),
+
+    # Edge cases
+    ("0", 0),
+    ("1", 1),
+    ("1k+2k+3k", 6000),                     # Penjumlahan tanpa spasi
+
+    # Ekspresi (kurang, kali, kurung)
+    ("50k - 5rb", 45000),
+    ("3x25rb", 75000),
+    ("3x25rb + 2 x 10k - 5rb", 90000),
+    ("2 × 10k", 20000),
+    ("4*5000", 20000),
+    ("(2 + 3) x 10k", 50000),
+    ("1.5 x 10k", 15000),                   # Jumlah desimal
+    ("2.5jt", 2500000),                     # Desimal dengan suffix
+])
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "",                                     # Input kosong
+    "abc",                                  # Non-numeric input
+    "-1000",                                # Angka negatif
+    "+++",                                  # Hanya operator
+    "5rb - 10rb",                           # Total negatif
+    "(2 + 3 x 10k",                         # Kurung tidak ditutup
+    "10k x",                                # Operator menggantung
+    "2k - - 1k",                            # Operator beruntun
+    "2k + - 1k",
+    "2k ++ 1k",
+    "--5k + 10k",
+])
+def test_parse_amount_rejects(text):
+    with pytest.raises(ValueError):
+        parse_amount(text)
+
+
+def test_parse_amount_detail_terms():
+    detail = parse_amount_detail("3x25rb + 2 x 10k - 5rb")
+    assert detail['total'] == 90000
+    assert detail['terms'] == [('3x25rb', 75000), ('2 x 10k', 20000), ('5rb', -5000)]
+    assert detail['is_expression'] is True
+    assert parse_amount_detail("850k")['is_expression'] is False
+
+
+# ===== Skenario dunia nyata =====
+
+@pytest.mark.parametrize("command, expected_amount, expected_ket", [
+    ("2000 + 7000 + 8rb", 17000, ""),                                       # /tf
+    ("2000 beli permen, 4000 plastik", 2000, "beli permen, 4000 plastik"),  # /keluar
+    ("3x25rb + 2 x 10k - 5rb beli plastik", 90000, "beli plastik"),         # /keluar ekspresi
+    ("500k + 200k", 700000, ""),                                            # /modal
+    ("1jt + 200rb + 50000", 1250000, ""),                                   # /cash
+    ("50k - bensin", 50000, "bensin"),                                      # operator menggantung
+    ("5k k3 kantor", 5000, "k3 kantor"),                                    # keterangan diawali unit
+    ("5k kopi susu", 5000, "kopi susu"),
+    ("10rb rb2 cadangan", 10000, "rb2 cadangan"),
+    ("25rb rbt", 25000, "rbt"),
+])
+def test_real_world_scenarios(command, expected_amount, expected_ket):
+    amount_str, keterangan = split_amount_text(command)
+    assert parse_amount(amount_str) == expected_amount
+    assert keterangan == expected_ket
+
+
+# ===== format_rupiah & format tanggal =====
+
+@pytest.mark.parametrize("amount, expected", [
+    (1000, "Rp1.000"),
+    (1234567, "Rp1.234.567"),
+    (0, "Rp0"),
+    (-5000, "-Rp5.000"),
+    (1000000, "Rp1.000.000"),
+    (2500000.75, "Rp2.500.000"),
+])
+def test_format_rupiah(amount, expected):
+    assert format_rupiah(amount) == expected
+
+
+def test_format_tanggal_without_locale():
+    assert format_tanggal("2025-12-10") == "Rabu, 10 Desember 2025"
+    assert format_tanggal(datetime(2025, 12, 14, 23, 59)) == "Minggu, 14 Desember 2025"
+    assert format_tanggal_singkat("2025-08-01") == "01 Agu 2025"
+    assert format_tanggal_singkat("2025-08-01", with_year=False) == "01 Agu"
+    assert format_bulan("2025-05-31") == "Mei 2025"
+
+
+# ===== parse_date =====
+
+NOW = datetime(2025, 12, 10, 9, 0)  # Rabu, 10 Des 2025
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2025-12-05", ("2025-12-05", "2025-12-05")),
+    ("hari ini", ("2025-12-10", "2025-12-10")),
+    ("Kemarin", ("2025-12-09", "2025-12-09")),
+    ("lusa", ("2025-12-12", "2025-12-12")),
+    ("senin", ("2025-12-08", "2025-12-08")),
+    ("senin lalu", ("2025-12-01", "2025-12-01")),
+    ("1 des", ("2025-12-01", "2025-12-01")),
+    ("28 des", ("2024-12-28", "2024-12-28")),        # belum lewat → tahun lalu
+    ("minggu lalu", ("2025-12-01", "2025-12-07")),
+    ("bulan ini", ("2025-12-01", "2025-12-10")),
+    ("bulan lalu", ("2025-11-01", "2025-11-30")),
+    ("1 des s/d 5 des", ("2025-12-01", "2025-12-05")),
+])
+def test_parse_date_range(text, expected):
+    assert parse_date_range(text, now=NOW) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "minggu lalu",                          # range ditolak parse_date
+    "2025-02-30",                           # tanggal tidak valid
+    "besok pagi",                           # format tidak dikenal
+])
+def test_parse_date_rejects(text):
+    with pytest.raises(ValueError):
+        parse_date(text, now=NOW)
+
+
+def test_parse_date_cache_follows_reference_day():
+    assert parse_date("kemarin", now=NOW) == "2025-12-09"
+    assert parse_date("kemarin", now=datetime(2025, 12, 11, 0, 1)) == "2025-12-10"
+
+
+# ===== sanitize_text =====
+
+def test_sanitize_text():
+    assert sanitize_text("  beli\x00 gas\x07  ") == "beli gas"
+    assert sanitize_text("a\nb\tc") == "a\nb\tc"
+    assert sanitize_text("x" * 300) == "x" * 200
+    assert sanitize_text("") == ""
@@ -0,0 +1,105 @@
+"""
+Benchmark parse_amount, format_rupiah & sanitize_text dengan baseline tersimpan
+Jalankan dengan: python -m pytest test_utils_benchmark.py
+Butuh: pip install -r requirements-dev.txt (pytest-benchmark)
+
+Baseline disimpan di benchmarks/utils_baseline.json sebagai rasio terhadap
+loop kalibrasi (bukan detik absolut) supaya bisa dipakai di mesin berbeda.
+Test gagal jika rasio sekarang > baseline x BENCHMARK_TOLERANCE.
+
+Update baseline setelah perubahan yang disengaja:
+    BENCHMARK_UPDATE=1 python -m pytest test_utils_benchmark.py
+"""
+
+import json
+import os
+import timeit
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from formatting import format_rupiah  # noqa: E402
+from utils import _parse_amount_cached, _parse_amount_uncached, sanitize_text  # noqa: E402
+
+
+BASELINE_PATH = Path(__file__).parent / 'benchmarks' / 'utils_baseline.json'
+TOLERANCE = float(os.getenv('BENCHMARK_TOLERANCE', '2.0'))
+UPDATE_BASELINE = os.getenv('BENCHMARK_UPDATE') == '1'
+
+AMOUNT_CORPUS = [
+    "4000", "4k", "4 ribu", "4.000", "2.5jt", "Rp 50.000", "850k",
+    "2000 + 7000 + 8000", "2k, 7k, 8k", "1jt + 500k + 250rb",
+    "3x25rb + 2 x 10k - 5rb", "(2 + 3) x 10k",
+]
+RUPIAH_CORPUS = [0, 1000, 50000, 1234567, -5000, 2500000.75, 987654321]
+TEXT_CORPUS = [
+    "beli gas", "  es batu 2 plastik  ", "bayar listrik\x00 bulan ini",
+    "x" * 250, "catatan\npanjang\tdengan tab",
+]
+
+
+def _calibrate() -> float:
+    """Waktu (detik) loop Python murni sebagai satuan pembanding antar mesin"""
+    def work():
+        total = 0
+        for i in range(2000):
+            total += i * i
+        return total
+    return min(timeit.repeat(work, number=50, repeat=7)) / 50
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    data = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    yield data
+    if UPDATE_BASELINE:
+        BASELINE_PATH.parent.mkdir(exist_ok=True)
+        BASELINE_PATH.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def _check_baseline(name: str, benchmark, baseline: dict):
+    """
+    Bandingkan hasil benchmark dengan baseline (atau simpan baseline baru).
+    Kalibrasi diukur tepat setelah benchmark supaya fluktuasi beban mesin
+    mengenai keduanya.
+    """
+    if benchmark.disabled:
+        return
+    ratio = benchmark.stats.stats.min / _calibrate()
+    if UPDATE_BASELINE or name not in baseline:
+        baseline[name] = round(ratio, 4)
+        return
+    limit = baseline[name] * TOLERANCE
+    assert ratio <= limit, (
+        f"{name} regresi: rasio {ratio:.3f} > baseline {baseline[name]:.3f} x {TOLERANCE}"
+    )
+
+
+def _run_all(func, corpus):
+    def run():
+        for item in corpus:
+            func(item)
+    return run
+
+
+def test_bench_parse_amount_uncached(benchmark, baseline):
+    benchmark(_run_all(_parse_amount_uncached, AMOUNT_CORPUS))
+    _check_baseline('parse_amount_uncached', benchmark, baseline)
+
+
+def test_bench_parse_amount_cached(benchmark, baseline):
+    _parse_amount_cached.cache_clear()
+    benchmark(_run_all(_parse_amount_cached, AMOUNT_CORPUS))
+    _check_baseline('parse_amount_cached', benchmark, baseline)
+
+
+def test_bench_format_rupiah(benchmark, baseline):
+    benchmark(_run_all(format_rupiah.__wrapped__, RUPIAH_CORPUS))
+    _check_baseline('format_rupiah', benchmark, baseline)
+
+
+def test_bench_sanitize_text(benchmark, baseline):
+    benchmark(_run_all(sanitize_text, TEXT_CORPUS))
+    _check_baseline('sanitize_text', benchmark, baseline)
@@ -0,0 +1,121 @@
+"""
+Property-based test (fuzzing) untuk parser & formatter di utils
+Jalankan dengan: python -m pytest test_utils_properties.py
+Butuh: pip install -r requirements-dev.txt (hypothesis)
+"""
+
+import pytest
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings, strategies as st  # noqa: E402
+
+from utils import parse_amount, format_rupiah, sanitize_text  # noqa: E402
+
+
+UNITS = {
+    '': 1, 'k': 1_000, 'rb': 1_000, ' ribu': 1_000,
+    'jt': 1_000_000, ' juta': 1_000_000, 'm': 1_000_000,
+}
+SEPARATORS = [' + ', '+', ', ', ' ,']
+
+amounts = st.integers(min_value=0, max_value=10 ** 12)
+positive = st.integers(min_value=1, max_value=10 ** 9)
+
+
+@given(amounts)
+def test_format_rupiah_round_trip(amount):
+    assert parse_amount(format_rupiah(amount)) == amount
+
+
+@given(amounts)
+def test_thousand_separators_round_trip(amount):
+    grouped = f"{amount:,}"
+    assert parse_amount(grouped) == amount                      # 1,234,567
+    assert parse_amount(grouped.replace(',', '.')) == amount    # 1.234.567
+
+
+@given(positive, st.integers(min_value=0, max_value=999))
+def test_comma_before_three_digits_is_separator(head, tail):
+    assert parse_amount(f"{head},{tail:03d}") == head * 1000 + tail
+
+
+@given(amounts)
+def test_space_separators_round_trip(amount):
+    assert parse_amount(f"{amount:,}".replace(',', ' ')) == amount             # 1 234 567
+    assert parse_amount(f"{amount:,}".replace(',', ', ')) == amount            # 1, 234, 567
+
+
+@given(st.integers(min_value=1, max_value=999), st.integers(min_value=0, max_value=999))
+def test_comma_space_before_three_digits_is_separator(head, tail):
+    # "1, 234" = 1234 (baseline), bukan 1 + 234
+    assert parse_amount(f"{head}, {tail:03d}") == head * 1000 + tail
+
+
+@given(positive, positive)
+def test_comma_before_space_is_operator(left, right):
+    # Koma + spasi hanya penjumlahan jika tidak membentuk grup ribuan (1-3 digit, lalu tepat 3 digit)
+    hypothesis.assume(not (left < 1000 and 100 <= right < 1000))
+    assert parse_amount(f"{left}, {right}") == left + right
+
+
+@given(st.integers(min_value=0, max_value=999), st.integers(min_value=0, max_value=9),
+       st.sampled_from(['k', 'rb', 'jt']))
+def test_decimal_with_suffix(whole, decimal, unit):
+    multiplier = UNITS[unit]
+    expected = whole * multiplier + decimal * multiplier // 10
+    assert parse_amount(f"{whole}.{decimal}{unit}") == expected
+    assert parse_amount(f"{whole},{decimal}{unit}") == expected
+
+
+@given(st.lists(st.tuples(st.integers(min_value=0, max_value=99_999), st.sampled_from(sorted(UNITS)),
+                          st.sampled_from(SEPARATORS)),
+                min_size=1, max_size=6))
+def test_random_suffix_mixes_sum(parts):
+    text = ''
+    for i, (value, unit, separator) in enumerate(parts):
+        if i:
+            previous, previous_unit, _ = parts[i - 1]
+            # "12, 345" adalah satu angka berpemisah ribuan, bukan penjumlahan
+            hypothesis.assume(not (separator == ', ' and previous_unit == '' and previous < 1000
+                                   and 100 <= value < 1000))
+            text += separator
+        text += f"{value}{unit}"
+    expected = sum(value * UNITS[unit] for value, unit, _ in parts)
+    if expected == 0 and len(parts) > 1:
+        with pytest.raises(ValueError):
+            parse_amount(text)
+    else:
+        assert parse_amount(text) == expected
+
+
+@given(positive, st.integers(min_value=1, max_value=99), st.sampled_from(['x', ' x ', '×', '*']))
+def test_quantity_multiplication(price, qty, op):
+    assert parse_amount(f"{qty}{op}{price}") == qty * price
+    assert parse_amount(f"({qty}{op}{price}) + {price}") == (qty + 1) * price
+
+
+@given(positive, positive)
+def test_subtraction_never_negative(left, right):
+    text = f"{left} - {right}"
+    if left > right:
+        assert parse_amount(text) == left - right
+    else:
+        with pytest.raises(ValueError):
+            parse_amount(text)
+
+
+@settings(max_examples=300)
+@given(st.text(alphabet='0123456789.,+-x×*() krbjtmRp', max_size=30))
+def test_parse_amount_only_raises_value_error(text):
+    try:
+        result = parse_amount(text)
+    except ValueError:
+        return
+    assert isinstance(result, int) and result >= 0
+
+
+@given(st.text(max_size=400), st.integers(min_value=1, max_value=300))
+def test_sanitize_text_bounds(text, max_length):
+    result = sanitize_text(text, max_length)
+    assert len(result) <= max_length
+    assert not any(ord(ch) < 32 and ch not in '\n\r\t' or ord(ch) == 127 for ch in result)
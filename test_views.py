@@ -0,0 +1,68 @@
+"""
+Unit test untuk views (template pesan, keyboard bersama, memoization render)
+Jalankan dengan: python -m pytest test_views.py
+"""
+
+from views import (
+    MAIN_MENU_KEYBOARD, STATUS_ACTIONS_KEYBOARD, reset_confirm_keyboard, ledger_nav_keyboard,
+    modal_reset_keyboard, render_status, render_status_singkat, render_lihat_ringkasan,
+    render_transaksi_line, render_rekap_bulanan_singkat, _render_summary
+)
+
+SUMMARY = {
+    'tanggal': '2025-12-10', 'modal': 500000, 'cash_akhir': 1200000, 'total_tf': 800000,
+    'count_tf': 3, 'total_pengeluaran': 50000, 'count_pengeluaran': 1, 'pos_total': 1545000,
+    'count_pos': 1, 'penjualan_cash': 750000, 'omzet_manual': 1550000, 'selisih': 5000,
+    'selisih_abs': 5000, 'selisih_persen': 0.3236, 'status_text': 'Selisih kecil', 'status_icon': '🟡',
+}
+
+
+def callback_rows(markup):
+    return [[button.callback_data for button in row] for row in markup.inline_keyboard]
+
+
+def test_status_template_fields():
+    message = render_status('2025-12-10', SUMMARY)
+    assert "📅 Rabu, 10 Desember 2025" in message
+    assert "Modal Awal       : Rp500.000" in message
+    assert "Total TF/QRIS    : Rp800.000 (3x)" in message
+    assert "Manual - POS     : Rp5.000 (0.32%)" in message
+    assert message.rstrip().endswith("🟡 Selisih kecil")
+
+
+def test_short_views():
+    assert "💳 TF: Rp800.000 (3x)" in render_status_singkat('2025-12-10', SUMMARY)
+    assert "📊 Selisih       : Rp5.000 (0.32%)" in render_lihat_ringkasan(SUMMARY)
+    rekap = {'total_omzet': 9_000_000, 'total_tf': 4_000_000, 'total_pengeluaran': 300_000, 'days': 9}
+    message = render_rekap_bulanan_singkat('2025-05-31', rekap)
+    assert "Mei 2025" in message and "📊 Hari Tercatat: 9 hari" in message
+
+
+def test_transaksi_line():
+    assert render_transaksi_line(1, 42, '09:15:30', 'tf', 150000, '') == "1. [09:15] 💳 TF: Rp150.000\n   🔑 ID: 42\n"
+    assert "💬 beli gas" in render_transaksi_line(2, 43, '10:00:00', 'keluar', 20000, 'beli gas')
+
+
+def test_render_memoized_by_summary_content():
+    _render_summary.cache_clear()
+    render_status('2025-12-10', SUMMARY)
+    render_status('2025-12-10', dict(SUMMARY))          # dict baru, isi sama → cache hit
+    assert _render_summary.cache_info().hits == 1
+    changed = render_status('2025-12-10', {**SUMMARY, 'modal': 600000})
+    assert "Rp600.000" in changed
+    assert _render_summary.cache_info().misses == 2
+
+
+def test_keyboards_are_shared():
+    assert callback_rows(MAIN_MENU_KEYBOARD)[-1] == ['menu_close']
+    assert callback_rows(STATUS_ACTIONS_KEYBOARD) == [['menu_input', 'action_edit'], ['menu_rekap', 'action_reset_today']]
+    assert reset_confirm_keyboard('2025-12-10') is reset_confirm_keyboard('2025-12-10')
+    assert callback_rows(reset_confirm_keyboard('2025-12-10', 'menu_koreksi')) == [['confirm_reset_2025-12-10', 'menu_koreksi']]
+    assert callback_rows(modal_reset_keyboard(500000)) == [['reset_and_modal_500000', 'cancel_modal']]
+
+
+def test_ledger_nav_keyboard():
+    assert ledger_nav_keyboard('2025-12-01', '2025-12-07', 0, 1) is None
+    assert callback_rows(ledger_nav_keyboard('2025-12-01', '2025-12-07', 1, 3)) == [
+        ['ledger_2025-12-01_2025-12-07_0', 'ledger_2025-12-01_2025-12-07_2']
+    ]
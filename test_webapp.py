@@ -0,0 +1,120 @@
+"""
+Test aplikasi ASGI mode webhook (webapp.py) dengan Bot API palsu
+Butuh fastapi (opsional); dilewati jika tidak terpasang.
+Jalankan dengan: python -m pytest test_webapp.py
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+httpx = pytest.importorskip("httpx")
+
+from config import Config  # noqa: E402
+from fake_telegram import FakeTelegram, text_update  # noqa: E402
+from webapp import METRICS_TOKEN_HEADER, SECRET_HEADER, create_app, run_webhook  # noqa: E402
+
+SECRET = 's3cret'
+
+
+@pytest.fixture
+def toko_bot(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'TELEGRAM_BOT_TOKEN', '123456:TEST-TOKEN')
+    monkeypatch.setattr(Config, 'DB_PATH', str(tmp_path / 'bot.db'))
+    monkeypatch.setattr(Config, 'RUN_MODE', 'webhook')
+    monkeypatch.setattr(Config, 'WEBHOOK_URL', 'https://bot.example.com')
+    monkeypatch.setattr(Config, 'WEBHOOK_SECRET', SECRET)
+    from bot import TokoBot
+    return TokoBot()
+
+
+def call(toko_bot, method, path, client=('127.0.0.1', 123), **kwargs):
+    """Jalankan satu request ke webapp; kembalikan (response, fake, application)"""
+    fake = FakeTelegram()
+    application = toko_bot.build_application(request=fake)
+    app = create_app(toko_bot, application)
+
+    async def main():
+        async with application:
+            transport = httpx.ASGITransport(app=app, client=client)
+            async with httpx.AsyncClient(transport=transport, base_url='http://test') as http:
+                return await http.request(method, path, **kwargs)
+
+    return asyncio.run(main()), fake, application
+
+
+def test_webhook_update_is_queued(toko_bot):
+    response, _, application = call(
+        toko_bot, 'POST', Config.WEBHOOK_PATH,
+        json=text_update('/status'), headers={SECRET_HEADER: SECRET},
+    )
+    assert response.status_code == 200
+    assert application.update_queue.qsize() == 1
+    assert application.update_queue.get_nowait().message.text == '/status'
+
+
+def test_webhook_rejects_wrong_secret(toko_bot):
+    response, _, application = call(
+        toko_bot, 'POST', Config.WEBHOOK_PATH,
+        json=text_update('/status'), headers={SECRET_HEADER: 'salah'},
+    )
+    assert response.status_code == 403
+    assert application.update_queue.qsize() == 0
+
+
+def test_ocr_callback_sends_confirmation(toko_bot):
+    payload = {'chat_id': 1001, 'message_id': 77, 'is_tf_receipt': True, 'amount': 150000}
+    response, fake, _ = call(toko_bot, 'POST', Config.OCR_CALLBACK_PATH, json=payload)
+
+    assert response.status_code == 200
+    (_, params), = [call for call in fake.calls if call[0] == 'sendMessage']
+    assert 'Rp150,000' in params['text']
+    assert 'ocr_save_1' in str(params['reply_markup'])
+    assert toko_bot.storage.claim_ocr_pending(1, 1001, 'saved') == (77, 150000, None, 'n8n')
+
+
+def test_health_and_metrics(toko_bot):
+    response, _, _ = call(toko_bot, 'GET', '/health')
+    assert response.json()['status'] == 'healthy'
+
+    response, _, _ = call(toko_bot, 'GET', '/metrics')
+    assert {'updates', 'outbox', 'live_status', 'callbacks', 'ocr'} <= set(response.json())
+
+
+def test_metrics_needs_token_or_localhost(toko_bot, monkeypatch):
+    remote = ('203.0.113.5', 4000)
+    response, _, _ = call(toko_bot, 'GET', '/metrics', client=remote)
+    assert response.status_code == 403
+
+    monkeypatch.setattr(Config, 'METRICS_TOKEN', 'm3trics')
+    response, _, _ = call(toko_bot, 'GET', '/metrics')
+    assert response.status_code == 403
+    response, _, _ = call(toko_bot, 'GET', '/metrics', client=remote, headers={METRICS_TOKEN_HEADER: 'm3trics'})
+    assert response.status_code == 200
+
+
+def test_run_webhook_follows_ptb_shutdown_sequence(toko_bot, monkeypatch):
+    uvicorn = pytest.importorskip("uvicorn")
+
+    async def serve(self):
+        return None
+
+    monkeypatch.setattr(uvicorn.Server, 'serve', serve)
+    fake = FakeTelegram()
+    application = toko_bot.build_application(request=fake)
+    hooks = []
+    for name in ('post_init', 'post_stop', 'post_shutdown'):
+        original = getattr(application, name)
+
+        async def hook(app, name=name, original=original):
+            hooks.append(name)
+            if original:
+                await original(app)
+        setattr(application, name, hook)
+
+    asyncio.run(run_webhook(toko_bot, application))
+
+    assert hooks == ['post_init', 'post_stop', 'post_shutdown']
+    assert 'setWebhook' in fake.endpoints()
+    assert not application.running
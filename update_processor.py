@@ -0,0 +1,107 @@
+"""
+Update processor untuk python-telegram-bot: paralel antar chat, berurutan per chat
+- Update dari chat yang sama diproses satu per satu sesuai urutan masuk
+- Chat berbeda diproses paralel, dibatasi jumlah maksimum global
+- Waktu antre & lama proses dicatat di metrics.UpdateMetrics
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram.ext import BaseUpdateProcessor
+
+from metrics import UpdateMetrics
+
+logger = logging.getLogger(__name__)
+
+# Semaphore bawaan BaseUpdateProcessor di-acquire SEBELUM do_process_update,
+# jadi dibuat longgar. Batas sebenarnya diterapkan setelah lock per-chat supaya
+# update yang antre di satu chat tidak memakan slot global.
+_OUTER_LIMIT = 4096
+
+
+class _ChatSlot:
+    """Lock satu chat + jumlah update yang memakainya (untuk cleanup)"""
+
+    __slots__ = ('lock', 'users')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Proses update secara konkuren dengan jaminan urutan per chat.
+
+    Urutan: lock per-chat (FIFO, asyncio.Lock adil) → slot global (semaphore
+    sebesar max_concurrent) → handler. Update tanpa chat (misal poll) hanya
+    dibatasi slot global.
+    """
+
+    def __init__(self, max_concurrent: int, metrics: Optional[UpdateMetrics] = None):
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent harus >= 1")
+        super().__init__(max(_OUTER_LIMIT, max_concurrent))
+        self.max_concurrent = max_concurrent
+        self.metrics = metrics or UpdateMetrics()
+        self._global = asyncio.BoundedSemaphore(max_concurrent)
+        self._chats: Dict[int, _ChatSlot] = {}
+
+    @staticmethod
+    def _chat_id(update: object) -> Optional[int]:
+        chat = getattr(update, 'effective_chat', None)
+        return chat.id if chat is not None else None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        received = time.monotonic()
+        chat_id = self._chat_id(update)
+
+        slot = None
+        if chat_id is not None:
+            slot = self._chats.get(chat_id)
+            if slot is None:
+                slot = self._chats[chat_id] = _ChatSlot()
+            slot.users += 1
+
+        metrics = self.metrics
+        metrics.waiting += 1
+        waiting = True
+        try:
+            if slot is not None:
+                await slot.lock.acquire()
+            try:
+                async with self._global:
+                    waiting = False
+                    metrics.waiting -= 1
+                    metrics.in_flight += 1
+                    if metrics.in_flight > metrics.peak_in_flight:
+                        metrics.peak_in_flight = metrics.in_flight
+                    started = time.monotonic()
+                    metrics.queue_delay.record(started - received)
+                    try:
+                        await coroutine
+                    finally:
+                        metrics.in_flight -= 1
+                        metrics.handle_time.record(time.monotonic() - started)
+            finally:
+                if slot is not None:
+                    slot.lock.release()
+        finally:
+            if waiting:
+                # Dibatalkan (misal saat shutdown) sebelum sempat diproses
+                metrics.waiting -= 1
+                if asyncio.iscoroutine(coroutine):
+                    coroutine.close()
+            if slot is not None:
+                slot.users -= 1
+                if slot.users == 0:
+                    self._chats.pop(chat_id, None)
+
+    async def initialize(self) -> None:
+        logger.info(f"PerChatUpdateProcessor ready: max {self.max_concurrent} concurrent update(s)")
+
+    async def shutdown(self) -> None:
+        self._chats.clear()
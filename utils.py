@@ -3,7 +3,60 @@ Helper functions untuk parsing dan formatting
 """
 
 import re
-from typing import Union
+from datetime import date as date_cls, datetime, timedelta, tzinfo
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo
+
+from formatting import format_rupiah  # re-export: dipakai luas lewat utils
+
+
+# Token untuk parser nominal (satu kali scan, pattern di-compile sekali)
+# - int/frac : angka dengan separator ribuan (titik/koma + tepat 3 digit, atau
+#              spasi / koma+spasi setelah grup awal 1-3 digit: "10 000", "1, 234")
+#              dan desimal opsional (titik/koma + 1-2 digit), misal 1.250.000 / 2,5
+# - unit     : suffix pengali (ribu / juta); tidak boleh langsung diikuti huruf/angka,
+#              jadi kata seperti "k3" / "kopi" adalah keterangan, bukan nominal
+# - add      : penjumlahan (+ atau koma yang bukan separator ribuan)
+# - sub      : pengurangan / minus
+# - mul      : perkalian / jumlah barang (3x25rb, 2 × 10k, 4*5000)
+# - open/close : tanda kurung
+# - rp       : prefix "Rp" / "Rp."
+_AMOUNT_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<int>\d{1,3}(?:(?:[ ]|,[ ]*)\d{3}(?!\d))+|\d+(?:[.,]\d{3}(?!\d))*)
+        (?:[.,](?P<frac>\d{1,2})(?!\d))?
+      | (?P<unit>juta|jt|million|m|ribu|rb|thousand|k)(?![a-z\d])
+      | (?P<add>[+,])
+      | (?P<sub>[-−])
+      | (?P<mul>[x×*])
+      | (?P<open>\()
+      | (?P<close>\))
+      | (?P<rp>rp\.?)
+    )
+""", re.VERBOSE)
+
+_UNIT_MULTIPLIER = {
+    'k': 1_000, 'rb': 1_000, 'ribu': 1_000, 'thousand': 1_000,
+    'm': 1_000_000, 'jt': 1_000_000, 'juta': 1_000_000, 'million': 1_000_000,
+}
+
+# Jalur cepat: satu nominal tanpa operator ("850k", "Rp 50.000", "2.5jt")
+_SIMPLE_AMOUNT_RE = re.compile(
+    r'(?:rp\.?\s*)?(\d{1,3}(?:(?: |, *)\d{3}(?!\d))+|\d+(?:[.,]\d{3}(?!\d))*)(?:[.,](\d{1,2}))?\s*'
+    r'(juta|jt|million|m|ribu|rb|thousand|k)?'
+)
+
+# Nomor group token di _AMOUNT_TOKEN_RE (dibandingkan lewat m.lastindex)
+_TOK_INT, _TOK_FRAC, _TOK_UNIT, _TOK_ADD, _TOK_SUB, _TOK_MUL, _TOK_OPEN, _TOK_CLOSE, _TOK_RP = range(1, 10)
+_TOK_END = 0
+_END_OF_INPUT = (None,)
+
+# State parser ekspresi
+_EXPECT_OPERAND = 0   # awal term / setelah operator
+_IN_NUMBER = 1        # baru baca angka (boleh diikuti suffix)
+_AFTER_OPERAND = 2    # setelah suffix atau ')'
 
 
 def parse_amount(text: str) -> int:
@@ -14,189 +67,579 @@ def parse_amount(text: str) -> int:
     - 4000
     - 4k, 4K (ribuan)
     - 4rb, 4 ribu
-    - 4.000, 4,000 (dengan separator)
+    - 4.000, 4,000, 4 000 (dengan separator)
     - 4jt, 4 juta, 4.000.000
     - 4m, 4M (juta - million)
+    - Desimal dengan suffix: 2.5jt, 1,5rb
     - Penjumlahan: 2000 + 7000 + 8rb
     - Dengan koma: 2000, 7000, 8rb
+    - Pengurangan: 50k - 5rb
+    - Perkalian / jumlah barang: 3x25rb, 2 × 10k, 4*5000
+    - Tanda kurung: (2 + 3) x 10k
+
+    Hasil parsing di-cache (LRU) karena input yang sama sering berulang.
 
     Returns: integer (rupiah)
-    Raises: ValueError jika format tidak valid
+    Raises: ValueError jika format tidak valid atau total negatif
     """
     if not text:
         raise ValueError("Input kosong")
 
-    # Clean whitespace
-    text = text.strip().lower()
+    return _parse_amount_cached(text)[0]
+
 
-    # Hilangkan prefix "rp" atau "Rp" jika ada
-    text = re.sub(r'^rp\.?\s*', '', text, flags=re.IGNORECASE)
-
-    # Deteksi jika ada operator penjumlahan
-    # PENTING: Bedakan antara koma sebagai separator (4,000) vs operator (2k, 3k)
-    # Koma adalah operator jika ada spasi atau huruf sebelum/sesudahnya
-    # Contoh: "2k, 3k" atau "2000, 3000" = operator
-    # Contoh: "4,000" atau "1,234,567" = separator
-
-    has_plus = '+' in text
-
-    # Deteksi koma sebagai operator (bukan separator)
-    # Koma adalah operator jika:
-    # 1. Ada spasi sebelum atau sesudah koma, ATAU
-    # 2. Ada huruf (k, rb, jt) sebelum koma
-    has_comma_operator = False
-    if ',' in text:
-        # Check pattern: angka+suffix, angka atau angka , angka
-        # Operator: "2k, 3k" atau "2000, 3000" (ada spasi)
-        # Separator: "4,000" atau "1,234,567" (tidak ada spasi, pure digit)
-        if re.search(r'\s*,\s*', text):  # Ada spasi sekitar koma
-            # Cek apakah ini pattern separator (misal: 1, 234, 567) atau operator
-            # Jika semua part adalah pure digits dengan pola ribuan, maka separator
-            parts = text.split(',')
-            is_separator = True
-
-            # Cek pattern separator ribuan: X,XXX atau X,XXX,XXX
-            if len(parts) >= 2:
-                # Part pertama bisa 1-3 digit
-                first_part = parts[0].strip()
-                if not first_part.isdigit() or len(first_part) > 4:
-                    is_separator = False
-
-                # Part sisanya harus tepat 3 digit
-                for part in parts[1:]:
-                    part_clean = part.strip()
-                    if not part_clean.isdigit() or len(part_clean) != 3:
-                        is_separator = False
-                        break
-
-            has_comma_operator = not is_separator
-        elif re.search(r'[a-z]+,', text):  # Ada huruf sebelum koma (misal: 2k,)
-            has_comma_operator = True
-
-    if has_plus or has_comma_operator:
-        return parse_amount_with_sum(text)
-
-    # Parse single amount (existing logic)
-    return parse_single_amount(text)
-
-
-def parse_single_amount(text: str) -> int:
-    """
-    Parse single amount (tanpa penjumlahan)
-    Helper function untuk parse_amount
+def parse_amount_detail(text: str) -> Dict:
+    """
+    Sama seperti parse_amount(), tapi juga mengembalikan rincian term
+    (bagian yang dijumlahkan/dikurangkan di level teratas) untuk
+    ditampilkan di pesan konfirmasi.
+
+    Example:
+        "3x25rb + 2 x 10k - 5rb" ->
+        {'total': 90000,
+         'terms': [('3x25rb', 75000), ('2 x 10k', 20000), ('5rb', -5000)],
+         'is_expression': True}
+
+    Returns: Dict {total, terms, is_expression}
+    Raises: ValueError jika format tidak valid atau total negatif
+    """
+    if not text:
+        raise ValueError("Input kosong")
+
+    total, terms, is_expression = _parse_amount_cached(text)
+    return {'total': total, 'terms': list(terms), 'is_expression': is_expression}
+
+
+def _parse_amount_uncached(text: str) -> Tuple[int, Tuple[Tuple[str, int], ...], bool]:
+    """
+    Evaluator ekspresi nominal satu kali scan (state machine di atas
+    _AMOUNT_TOKEN_RE). Koma dianggap separator ribuan hanya jika diikuti
+    tepat 3 digit, selain itu koma adalah operator penjumlahan.
+
+    Nilai dihitung dalam satuan sen (x100) dengan integer supaya desimal
+    seperti 1.5 x 10k tetap eksak. Kurung memakai stack frame, jadi waktu
+    tetap linear terhadap panjang input.
+
+    Returns: (total, rincian term level teratas, ada operator atau tidak)
     """
     text = text.strip().lower()
+    if not text:
+        raise ValueError("Input kosong")
+    if text.isdigit():
+        value = int(text)  # jalur cepat: angka polos
+        return value, ((text, value),), False
+
+    m = _SIMPLE_AMOUNT_RE.fullmatch(text)
+    if m:
+        # Jalur cepat: satu nominal, tanpa evaluasi ekspresi
+        number, frac, unit = m.groups()
+        value = int(_strip_separators(number)) * 100
+        if frac:
+            value += int(frac) * 10 if len(frac) == 1 else int(frac)
+        if unit:
+            value *= _UNIT_MULTIPLIER[unit]
+        value //= 100
+        return value, ((text[m.start(1):].strip() if m.start(1) else text, value),), False
+
+    pos = 0
+    state = _EXPECT_OPERAND
+    total = 0           # jumlah term yang sudah selesai (sen)
+    sign = 1            # tanda term yang sedang dibaca
+    product = None      # hasil kali faktor term yang sedang dibaca (sen)
+    operand = 0         # faktor yang sedang dibaca (sen)
+    has_operator = False
+    has_number = False
+    stack = []          # frame (total, sign, product) untuk kurung
+    terms = []
+    term_start = -1     # posisi awal term level teratas (untuk rincian)
+    term_end = 0
+
+    kind = None
+
+    # Token berurutan tanpa celah: m.start() harus sama dengan akhir token sebelumnya
+    for m in chain(_AMOUNT_TOKEN_RE.finditer(text), _END_OF_INPUT):
+        prev_kind = kind
+        if m is None:
+            # Akhir input
+            if pos != len(text):
+                raise ValueError(f"Format angka tidak valid: '{text[pos:].strip()}'")
+            if state == _EXPECT_OPERAND:
+                if product is not None or sign < 0 or stack:
+                    raise ValueError(f"Format angka tidak valid: '{text}'")
+                break
+            kind = _TOK_END
+        else:
+            if m.start() != pos:
+                raise ValueError(f"Format angka tidak valid: '{text[pos:].strip()}'")
+            pos = m.end()
+            kind = m.lastindex
+
+        if kind == _TOK_INT or kind == _TOK_FRAC:
+            if state != _EXPECT_OPERAND:
+                raise ValueError(f"Format angka tidak valid: '{text}'")
+            operand = int(_strip_separators(m.group(_TOK_INT))) * 100
+            if kind == _TOK_FRAC:
+                frac = m.group(_TOK_FRAC)
+                operand += int(frac) * 10 if len(frac) == 1 else int(frac)
+            if term_start < 0 and not stack:
+                term_start = m.start(_TOK_INT)
+            term_end = pos
+            has_number = True
+            state = _IN_NUMBER
+            continue
 
-    # Deteksi suffix multiplier
-    multiplier = 1
+        if kind == _TOK_UNIT:
+            if state != _IN_NUMBER:
+                raise ValueError(f"Format angka tidak valid: '{text}'")
+            operand *= _UNIT_MULTIPLIER[m.group(_TOK_UNIT)]
+            term_end = pos
+            state = _AFTER_OPERAND
+            continue
 
-    # Juta (jt, juta, m, million)
-    if re.search(r'(jt|juta|m|million)$', text):
-        multiplier = 1_000_000
-        text = re.sub(r'(jt|juta|m|million)$', '', text).strip()
-    # Ribu (k, rb, ribu, thousand)
-    elif re.search(r'(k|rb|ribu|thousand)$', text):
-        multiplier = 1_000
-        text = re.sub(r'(k|rb|ribu|thousand)$', '', text).strip()
+        if kind == _TOK_RP:
+            if state != _EXPECT_OPERAND:
+                raise ValueError(f"Format angka tidak valid: '{text}'")
+            continue
 
-    # Hilangkan separator (titik, koma, spasi)
-    text = text.replace('.', '').replace(',', '').replace(' ', '')
+        if kind == _TOK_OPEN:
+            if state != _EXPECT_OPERAND:
+                raise ValueError(f"Format angka tidak valid: '{text}'")
+            if term_start < 0 and not stack:
+                term_start = m.start(_TOK_OPEN)
+            stack.append((total, sign, product))
+            total, sign, product = 0, 1, None
+            continue
 
-    # Parse angka
-    try:
-        amount = float(text) * multiplier
+        if state == _EXPECT_OPERAND:
+            # Operator tanpa operand di depannya: hanya tanda di awal input / setelah "(",
+            # operator beruntun ("2k - - 1k", "2k + + 1k") ditolak
+            if prev_kind not in (None, _TOK_OPEN, _TOK_RP) or kind not in (_TOK_ADD, _TOK_SUB):
+                raise ValueError(f"Format angka tidak valid: '{text}'")
+            if kind == _TOK_SUB:
+                if term_start < 0 and not stack:
+                    term_start = m.start(_TOK_SUB)
+                sign = -1           # minus unary
+            has_operator = True
+            continue
 
-        # Validasi
-        if amount < 0:
-            raise ValueError("Jumlah tidak boleh negatif")
+        # Operand selesai → masukkan ke hasil kali term
+        product = operand if product is None else product * operand // 100
 
-        # Convert ke integer (rupiah tidak ada desimal)
-        return int(amount)
+        if kind == _TOK_MUL:
+            has_operator = True
+            state = _EXPECT_OPERAND
+            continue
 
-    except ValueError as e:
-        if "could not convert" in str(e):
+        # Term selesai (add / sub / close / akhir input)
+        value = product if sign > 0 else -product
+        if not stack:
+            terms.append((text[term_start:term_end].strip(), value // 100 if value >= 0 else -(-value // 100)))
+            term_start = -1
+        total += value
+        sign, product = 1, None
+
+        if kind == _TOK_ADD or kind == _TOK_SUB:
+            has_operator = True
+            if kind == _TOK_SUB:
+                sign = -1
+            state = _EXPECT_OPERAND
+        elif kind == _TOK_CLOSE:
+            if not stack:
+                raise ValueError(f"Format angka tidak valid: '{text}'")
+            operand = total
+            total, sign, product = stack.pop()
+            term_end = pos
+            state = _AFTER_OPERAND
+        elif stack:
             raise ValueError(f"Format angka tidak valid: '{text}'")
-        raise
+
+    if not has_number:
+        raise ValueError("Tidak ada angka valid yang ditemukan")
+    if total < 0:
+        raise ValueError("Jumlah tidak boleh negatif")
+
+    total //= 100
+    if has_operator and total == 0:
+        raise ValueError("Total tidak boleh 0")
+
+    return total, tuple(terms), has_operator
+
+
+_parse_amount_cached = lru_cache(maxsize=1024)(_parse_amount_uncached)
+
+
+def _strip_separators(number: str) -> str:
+    return number.replace('.', '').replace(',', '').replace(' ', '')
+
+
+def _is_amount_word(word: str, after_amount: bool) -> bool:
+    """
+    Cek apakah satu kata (dipisah spasi) bagian dari ekspresi nominal.
+    Suffix yang berdiri sendiri ("4 ribu") hanya valid setelah angka.
+    """
+    match = _AMOUNT_TOKEN_RE.match
+    pos = 0
+    has_number = False
+    has_unit = False
+    while pos < len(word):
+        m = match(word, pos)
+        if m is None or m.end() == pos:
+            return False
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == 'int' or kind == 'frac':
+            has_number = True
+        elif kind == 'unit':
+            has_unit = True
+    if has_unit and not has_number:
+        return after_amount
+    return True
+
+
+def _is_operator_word(word: str) -> bool:
+    """Kata yang hanya berisi operator (tanpa angka/kurung)"""
+    return all(ch in '+-−,x×*' for ch in word)
+
+
+def split_amount_text(text: str) -> Tuple[str, str]:
+    """
+    Pisahkan ekspresi nominal di awal teks dari keterangannya.
+
+    Examples:
+    - "3x25rb + 2 x 10k beli plastik" -> ("3x25rb + 2 x 10k", "beli plastik")
+    - "50k - bensin"                   -> ("50k", "bensin")
+
+    Operator yang menggantung di antara nominal dan keterangan dibuang.
+
+    Returns: (amount_str, keterangan)
+    """
+    words = text.split()
+    count = 0
+    after_amount = False
+    for word in words:
+        lowered = word.lower()
+        if not _is_amount_word(lowered, after_amount):
+            break
+        after_amount = not _is_operator_word(lowered)
+        count += 1
+
+    amount_end = count
+    while amount_end > 0 and _is_operator_word(words[amount_end - 1].lower()):
+        amount_end -= 1
+
+    return ' '.join(words[:amount_end]), ' '.join(words[count:])
+
+
+# Kata kunci awal baris untuk input batch → tipe transaksi
+BATCH_KEYWORDS = {
+    'modal': 'modal',
+    'cash': 'cash', 'kas': 'cash',
+    'tf': 'tf', 'transfer': 'tf', 'qris': 'tf',
+    'keluar': 'keluar', 'pengeluaran': 'keluar',
+    'pos': 'pos', 'totalpos': 'pos',
+}
+
+# Tipe yang jumlahnya boleh 0 (cash kosong / POS belum ada penjualan)
+_BATCH_ALLOW_ZERO = ('cash', 'pos')
+
+
+def _batch_keyword(line: str) -> str:
+    return line.split(None, 1)[0].lstrip('/').lower()
+
+
+def is_batch_text(text: str) -> bool:
+    """
+    Cek apakah pesan berupa input batch: minimal 2 baris dan baris
+    pertama diawali kata kunci tipe transaksi (tf, keluar, pos, ...)
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    return len(lines) >= 2 and _batch_keyword(lines[0]) in BATCH_KEYWORDS
 
 
-def parse_amount_with_sum(text: str) -> int:
+def parse_batch_entries(text: str) -> Tuple[List[Dict], List[str]]:
     """
-    Parse amount dengan penjumlahan
-    Contoh: "2000 + 7000 + 8rb" atau "2000, 7000, 8rb"
+    Parse pesan multi-baris menjadi daftar transaksi, satu per baris.
 
-    Returns: total jumlah (integer)
+    Example:
+        tf 50k
+        keluar 20rb es batu
+        pos 2.3jt
+
+    Semua baris divalidasi dulu; pemanggil hanya menyimpan jika tidak ada error.
+
+    Returns: (entries, errors)
+             entries: List dict {line, tipe, jumlah, keterangan}
+             errors : List pesan error per baris
     """
-    # Replace koma dengan + untuk uniform processing
-    text = text.replace(',', '+')
+    entries = []
+    errors = []
+    has_modal = False
 
-    # Split by +
-    parts = text.split('+')
+    for line_no, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
 
-    total = 0
-    parsed_amounts = []
+        keyword = _batch_keyword(line)
+        tipe = BATCH_KEYWORDS.get(keyword)
+        if tipe is None:
+            errors.append(f"Baris {line_no}: tipe '{keyword}' tidak dikenal")
+            continue
 
-    for part in parts:
-        part = part.strip()
-        if not part:
+        parts = line.split(None, 1)
+        amount_str, keterangan = split_amount_text(parts[1] if len(parts) > 1 else '')
+        if not amount_str:
+            errors.append(f"Baris {line_no}: jumlah kosong")
             continue
 
         try:
-            amount = parse_single_amount(part)
-            total += amount
-            parsed_amounts.append(amount)
+            amount = parse_amount(amount_str)
         except ValueError as e:
-            raise ValueError(f"Error parsing '{part}': {str(e)}")
+            errors.append(f"Baris {line_no}: {str(e)}")
+            continue
 
-    if total == 0:
-        raise ValueError("Tidak ada angka valid yang ditemukan")
+        if amount <= 0 and not (amount == 0 and tipe in _BATCH_ALLOW_ZERO):
+            errors.append(f"Baris {line_no}: jumlah harus > 0")
+            continue
 
-    return total
+        if tipe == 'modal':
+            if has_modal:
+                errors.append(f"Baris {line_no}: modal hanya boleh satu kali")
+                continue
+            has_modal = True
 
+        entries.append({
+            'line': line_no,
+            'tipe': tipe,
+            'jumlah': amount,
+            'keterangan': sanitize_text(keterangan),
+        })
 
-def format_rupiah(amount: Union[int, float]) -> str:
-    """
-    Format angka menjadi format Rupiah dengan separator titik
+    return entries, errors
 
-    Examples:
-    - 1000 -> "Rp1.000"
-    - 1234567 -> "Rp1.234.567"
-    - -5000 -> "-Rp5.000"
 
-    Returns: string formatted rupiah
+def format_amount_terms(terms: List[Tuple[str, int]]) -> str:
     """
-    # Handle negative
-    is_negative = amount < 0
-    amount = abs(amount)
+    Format rincian term dari parse_amount_detail() untuk pesan konfirmasi
 
-    # Convert to int (rupiah tidak ada desimal)
-    amount = int(amount)
-
-    # Format dengan separator titik
-    formatted = f"{amount:,}".replace(',', '.')
+    Example:
+        🧮 3x25rb = Rp75.000
+           + 2 x 10k = Rp20.000
+           - 5rb = Rp5.000
+    """
+    lines = []
+    for i, (label, value) in enumerate(terms):
+        if i == 0:
+            prefix = '🧮 ' if value >= 0 else '🧮 - '
+        else:
+            prefix = '   + ' if value >= 0 else '   - '
+        lines.append(f"{prefix}{label} = {format_rupiah(abs(value))}")
+    return '\n'.join(lines)
+
+
+# ===== PARSING TANGGAL =====
+
+_NAMA_HARI = {
+    'senin': 0, 'selasa': 1, 'rabu': 2, 'kamis': 3,
+    'jumat': 4, "jum'at": 4, 'sabtu': 5, 'minggu': 6, 'ahad': 6,
+}
+
+_NAMA_BULAN = {
+    'jan': 1, 'januari': 1, 'feb': 2, 'februari': 2, 'mar': 3, 'maret': 3,
+    'apr': 4, 'april': 4, 'mei': 5, 'jun': 6, 'juni': 6, 'jul': 7, 'juli': 7,
+    'agu': 8, 'agt': 8, 'agus': 8, 'agustus': 8, 'sep': 9, 'sept': 9, 'september': 9,
+    'okt': 10, 'oktober': 10, 'nov': 11, 'november': 11, 'des': 12, 'desember': 12,
+}
+
+_HARI_RELATIF = {
+    'hari ini': 0, 'sekarang': 0, 'kemarin': -1, 'kemarin lusa': -2,
+    'besok': 1, 'lusa': 2,
+}
+
+_ISO_DATE_RE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})$')
+_SLASH_DATE_RE = re.compile(r'^(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2}|\d{4}))?$')
+_NAMED_DATE_RE = re.compile(r'^(\d{1,2}) ([a-z]+)(?: (\d{4}))?$')
+_MONTH_RE = re.compile(r'^([a-z]+)(?: (\d{4}))?$')
+_DAYS_AGO_RE = re.compile(r'^(\d{1,3}) hari (?:yang )?lalu$')
+_LAST_DAYS_RE = re.compile(r'^(\d{1,3}) hari terakhir$')
+_RANGE_SEP_RE = re.compile(r' (?:sampai|sd|s/d|-) ')
+
+_DATE_HELP = (
+    "Format tanggal tidak dikenali.\n"
+    "Contoh: 2025-12-05, hari ini, kemarin, senin lalu, 1 des, "
+    "minggu lalu, bulan ini"
+)
+
+
+@lru_cache(maxsize=8)
+def _get_timezone(name: str) -> tzinfo:
+    """ZoneInfo di-cache per nama"""
+    return ZoneInfo(name)
+
+
+def today_date(now: Optional[datetime] = None,
+               tz: Optional[Union[str, tzinfo]] = None) -> date_cls:
+    """
+    Tanggal "hari ini" menurut jam referensi.
 
-    # Add prefix
-    if is_negative:
-        return f"-Rp{formatted}"
-    return f"Rp{formatted}"
+    Args:
+        now: Jam referensi (default: datetime.now()), bisa di-inject untuk test
+        tz: Timezone (nama IANA atau tzinfo). None = waktu lokal server
+    """
+    if isinstance(tz, str):
+        tz = _get_timezone(tz)
+    if now is None:
+        now = datetime.now(tz)
+    elif tz is not None and now.tzinfo is not None:
+        now = now.astimezone(tz)
+    return now.date()
 
 
-def parse_date(text: str) -> str:
+def parse_date_range(text: str, now: Optional[datetime] = None,
+                     tz: Optional[Union[str, tzinfo]] = None) -> Tuple[str, str]:
     """
-    STUB: Parse natural date string menjadi YYYY-MM-DD
-    Untuk future enhancement (misal: "kemarin", "minggu lalu", dll)
+    Parse teks tanggal bahasa Indonesia menjadi range (start, end) YYYY-MM-DD
+
+    Tanggal tunggal menghasilkan start == end. Mendukung:
+    - 2025-12-05, 5/12, 5/12/2025
+    - hari ini, kemarin, kemarin lusa, besok, lusa
+    - 3 hari lalu, 7 hari terakhir
+    - senin, senin lalu (senin minggu sebelumnya)
+    - 1 des, 1 desember 2025
+    - minggu ini, minggu lalu, bulan ini, bulan lalu
+    - des, november 2025 (satu bulan penuh)
+    - <tanggal> sampai <tanggal>, <tanggal> s/d <tanggal>
+
+    Range "ini" (minggu ini / bulan ini) dipotong sampai hari ini.
+    Hasil di-cache per (teks, hari) sehingga teks relatif seperti "kemarin"
+    tetap benar setelah ganti hari.
+
+    Raises: ValueError jika format tidak dikenali
+    """
+    key = ' '.join(text.lower().split())
+    if not key:
+        raise ValueError("Tanggal kosong")
+    return _parse_date_range_cached(key, today_date(now, tz))
+
 
-    Untuk sekarang, return format YYYY-MM-DD atau raise error
+def parse_date(text: str, now: Optional[datetime] = None,
+               tz: Optional[Union[str, tzinfo]] = None) -> str:
     """
-    # TODO: Implementasi natural date parsing
-    # Contoh: "kemarin" -> "2025-12-04"
-    #         "minggu lalu" -> range
-    #         "1 des" -> "2025-12-01"
+    Parse teks tanggal bahasa Indonesia menjadi satu tanggal YYYY-MM-DD
 
-    # Sementara, hanya support format YYYY-MM-DD
-    if re.match(r'\d{4}-\d{2}-\d{2}', text):
-        return text
+    Format sama seperti parse_date_range(), tapi ekspresi range
+    (misal "minggu lalu") ditolak.
 
-    raise ValueError("Format tanggal harus YYYY-MM-DD (misal: 2025-12-05)")
+    Raises: ValueError jika format tidak dikenali atau berupa range
+    """
+    start, end = parse_date_range(text, now, tz)
+    if start != end:
+        raise ValueError(f"'{text}' adalah rentang tanggal ({start} s/d {end}), masukkan satu tanggal")
+    return start
+
+
+@lru_cache(maxsize=256)
+def _parse_date_range_cached(key: str, today: date_cls) -> Tuple[str, str]:
+    """Parser range tanggal (teks sudah dinormalisasi, hari referensi eksplisit)"""
+    parts = _RANGE_SEP_RE.split(key)
+    if len(parts) == 2:
+        start = _resolve_range(parts[0], today)[0]
+        end = _resolve_range(parts[1], today)[1]
+        if start > end:
+            start, end = end, start
+    else:
+        start, end = _resolve_range(key, today)
+    return start.isoformat(), end.isoformat()
+
+
+def _resolve_range(key: str, today: date_cls) -> Tuple[date_cls, date_cls]:
+    """Satu ekspresi tanggal → (start, end) sebagai date"""
+    if key in _HARI_RELATIF:
+        day = today + timedelta(days=_HARI_RELATIF[key])
+        return day, day
+
+    if key == 'minggu ini':
+        return today - timedelta(days=today.weekday()), today
+    if key == 'minggu lalu':
+        start = today - timedelta(days=today.weekday() + 7)
+        return start, start + timedelta(days=6)
+    if key == 'bulan ini':
+        return today.replace(day=1), today
+    if key == 'bulan lalu':
+        end = today.replace(day=1) - timedelta(days=1)
+        return end.replace(day=1), end
+
+    m = _ISO_DATE_RE.match(key)
+    if m:
+        day = _make_date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        return day, day
+
+    m = _DAYS_AGO_RE.match(key)
+    if m:
+        day = today - timedelta(days=int(m.group(1)))
+        return day, day
+
+    m = _LAST_DAYS_RE.match(key)
+    if m:
+        days = max(int(m.group(1)), 1)
+        return today - timedelta(days=days - 1), today
+
+    words = key.split(' ')
+    if words[0] in _NAMA_HARI and len(words) <= 2:
+        offset = (today.weekday() - _NAMA_HARI[words[0]]) % 7
+        if len(words) == 1:
+            # Hari tersebut yang paling baru (hari ini jika sama)
+            day = today - timedelta(days=offset)
+            return day, day
+        if words[1] == 'lalu':
+            # Hari tersebut di minggu sebelumnya (minggu mulai Senin)
+            monday = today - timedelta(days=today.weekday() + 7)
+            day = monday + timedelta(days=_NAMA_HARI[words[0]])
+            return day, day
+
+    m = _SLASH_DATE_RE.match(key)
+    if m:
+        year = m.group(3)
+        if year and len(year) == 2:
+            year = '20' + year
+        day = _make_day_month(int(m.group(1)), int(m.group(2)), year, today)
+        return day, day
+
+    m = _NAMED_DATE_RE.match(key)
+    if m and m.group(2) in _NAMA_BULAN:
+        day = _make_day_month(int(m.group(1)), _NAMA_BULAN[m.group(2)], m.group(3), today)
+        return day, day
+
+    m = _MONTH_RE.match(key)
+    if m and m.group(1) in _NAMA_BULAN:
+        month = _NAMA_BULAN[m.group(1)]
+        if m.group(2):
+            year = int(m.group(2))
+        else:
+            # Tanpa tahun: bulan terdekat yang sudah berjalan
+            year = today.year if month <= today.month else today.year - 1
+        start = _make_date(year, month, 1)
+        end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        return start, end
+
+    raise ValueError(_DATE_HELP)
+
+
+def _make_day_month(day: int, month: int, year: Optional[str], today: date_cls) -> date_cls:
+    """Tanggal dari hari+bulan; tanpa tahun → kemunculan terakhir yang tidak di masa depan"""
+    if year:
+        return _make_date(int(year), month, day)
+    result = _make_date(today.year, month, day)
+    if result > today:
+        result = _make_date(today.year - 1, month, day)
+    return result
+
+
+def _make_date(year: int, month: int, day: int) -> date_cls:
+    try:
+        return date_cls(year, month, day)
+    except ValueError:
+        raise ValueError(f"Tanggal tidak valid: {day:02d}-{month:02d}-{year}")
 
 
 def validate_transaction_type(tipe: str) -> bool:
@@ -1,19 +1,40 @@
 """
-Script verification untuk Gemini OCR Integration
+Script verification untuk integrasi OCR (Gemini & backend lokal)
+
+    python verify_ocr.py                # cek inisialisasi GeminiClient
+    python verify_ocr.py struk/         # bandingkan OCR foto asli vs hasil preprocess
+    python verify_ocr.py fixtures/struk # contoh struk sintetis (dibuat dengan receipt di conftest.py)
+
+Mode folder: setiap gambar di folder dianalisa dua kali oleh backend
+OCR_BACKEND — file asli (seperti dulu, foto terbesar) dan versi yang dikirim
+bot sekarang (ukuran Telegram OCR_PHOTO_MIN_SIDE lalu ocr_preprocess.prepare_image).
+Nominal yang benar diambil dari awal nama file, misal `125000_bca.jpg`.
+Contoh cek OCR lokal: OCR_BACKEND=tesseract python verify_ocr.py struk/
+Jika backend tidak tersedia, hanya ukuran payload yang dibandingkan.
 """
+import asyncio
+import io
 import os
 import sys
+import time
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load env variables
 load_dotenv()
 
 try:
+    from config import Config
+    from ocr_backend import create_backend
     from ocr_gemini import GeminiClient
+    from ocr_preprocess import prepare_image
 except ImportError as e:
-    print(f"❌ Failed to import ocr_gemini: {e}")
+    print(f"❌ Failed to import OCR modules: {e}")
     sys.exit(1)
 
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
 def test_initialization():
     print("Testing GeminiClient initialization...")
     api_key = os.getenv('GEMINI_API_KEY')
@@ -25,9 +46,90 @@ def test_initialization():
 
     client = GeminiClient()
     if client.model:
-        print("✅ GeminiClient initialized successfully with model gemini-1.5-flash")
+        print(f"✅ GeminiClient initialized successfully with model {client.MODEL_NAME}")
     else:
         print("❌ GeminiClient failed to initialize (check API key)")
 
+
+def telegram_size(data: bytes, min_side: int) -> bytes:
+    """Tiru ukuran foto Telegram yang dipilih bot: sisi panjang = min_side, JPEG"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGB')
+        if max(image.size) > min_side:
+            image.thumbnail((min_side, min_side), Image.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=87)
+    return output.getvalue()
+
+
+def image_mime_type(data: bytes) -> str:
+    """MIME file asli (JPEG/PNG/WEBP) sesuai isinya, bukan ekstensi"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return Image.MIME.get(image.format, 'image/jpeg')
+
+
+def expected_amount(path: Path):
+    digits = path.stem.split('_', 1)[0]
+    return int(digits) if digits.isdigit() else None
+
+
+def analyze(backend, data: bytes, mime_type: str):
+    started = time.perf_counter()
+    result = asyncio.run(backend.analyze(data, mime_type))
+    return result.get('amount', 0), time.perf_counter() - started
+
+
+def verify_fixtures(folder: str) -> bool:
+    paths = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not paths:
+        print(f"❌ Tidak ada gambar di {folder}")
+        return False
+
+    backend = create_backend(Config.OCR_BACKEND, gemini=GeminiClient(),
+                             tesseract_lang=Config.OCR_TESSERACT_LANG,
+                             timeout=Config.OCR_LOCAL_TIMEOUT, threshold=Config.OCR_CASCADE_THRESHOLD)
+    use_model = backend.available
+    if not use_model:
+        print(f"⚠️ Backend {backend.name} tidak tersedia, hanya membandingkan ukuran payload\n")
+
+    totals = {'original': [0, 0.0, 0], 'prepared': [0, 0.0, 0]}  # byte, detik, benar
+    scored = 0
+    for path in paths:
+        original = path.read_bytes()
+        started = time.perf_counter()
+        prepared = prepare_image(io.BytesIO(telegram_size(original, Config.OCR_PHOTO_MIN_SIDE)),
+                                 Config.OCR_MAX_SIDE, Config.OCR_JPEG_QUALITY)
+        prep_ms = (time.perf_counter() - started) * 1000
+        totals['original'][0] += len(original)
+        totals['prepared'][0] += len(prepared.data)
+        line = f"{path.name:30} {len(original) / 1024:7.1f} KB → {len(prepared.data) / 1024:6.1f} KB ({prep_ms:.0f} ms)"
+
+        if use_model:
+            expected = expected_amount(path)
+            scored += expected is not None
+            for name, data, mime_type in (('original', original, image_mime_type(original)),
+                                          ('prepared', prepared.data, prepared.mime_type)):
+                amount, seconds = analyze(backend, data, mime_type)
+                totals[name][1] += seconds
+                totals[name][2] += expected is not None and amount == expected
+                mark = '' if expected is None else (' ✅' if amount == expected else ' ❌')
+                line += f" | {name}: {amount} {seconds:.1f}s{mark}"
+        print(line)
+
+    print(f"\nPayload: {totals['original'][0] / 1024:.0f} KB → {totals['prepared'][0] / 1024:.0f} KB")
+    if not use_model:
+        return True
+    print(f"Latensi: {totals['original'][1]:.1f}s → {totals['prepared'][1]:.1f}s")
+    if scored:
+        print(f"Nominal benar: {totals['original'][2]}/{scored} → {totals['prepared'][2]}/{scored}")
+    return totals['prepared'][2] >= totals['original'][2]
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(0 if verify_fixtures(sys.argv[1]) else 1)
     test_initialization()
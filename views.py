@@ -0,0 +1,322 @@
+"""
+Layer tampilan: template pesan & keyboard inline yang dipakai ulang
+- Template per view didefinisikan sekali di level modul
+- Keyboard statis dibuat sekali saat import (objek PTB immutable, aman dibagi)
+- Render di-memoize berdasarkan isi ringkasan (tuple field → lru_cache)
+"""
+
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from formatting import format_rupiah, format_tanggal, format_bulan
+
+GARIS = "━━━━━━━━━━━━━━━━━━━━━━━━"
+
+
+def _keyboard(*rows: Sequence[Tuple[str, str]]) -> InlineKeyboardMarkup:
+    """Bangun InlineKeyboardMarkup dari baris (label, callback_data)"""
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton(label, callback_data=data) for label, data in row]
+        for row in rows
+    ])
+
+
+# ===== KEYBOARD STATIS =====
+
+MAIN_MENU_KEYBOARD = _keyboard(
+    [("➕ Input Transaksi", "menu_input")],
+    [("📊 Rekap & Laporan", "menu_rekap")],
+    [("✏️ Koreksi & Reset", "menu_koreksi")],
+    [("❓ Bantuan", "menu_bantuan")],
+    [("❌ Tutup Menu", "menu_close")],
+)
+
+INPUT_MENU_KEYBOARD = _keyboard(
+    [("💵 Cash", "input_cash"), ("💳 Transfer", "input_tf")],
+    [("📤 Pengeluaran", "input_keluar"), ("💰 Modal", "input_modal")],
+    [("🖥️ Total POS", "input_pos"), ("🏠 Menu Utama", "menu_main")],
+)
+
+REKAP_MENU_KEYBOARD = _keyboard(
+    [("📊 Status Hari Ini", "rekap_today")],
+    [("✅ Finalisasi Rekap Hari Ini", "action_fix_daily")],
+    [("📅 Rekap Mingguan", "rekap_weekly")],
+    [("📆 Rekap Bulanan", "rekap_monthly")],
+    [("🏠 Menu Utama", "menu_main")],
+)
+
+KOREKSI_MENU_KEYBOARD = _keyboard(
+    [("✏️ Edit Transaksi", "action_edit")],
+    [("🧹 Reset Hari Ini", "action_reset_today")],
+    [("📅 Reset Tanggal Lain", "action_reset_date")],
+    [("🏠 Menu Utama", "menu_main")],
+)
+
+STATUS_ACTIONS_KEYBOARD = _keyboard(
+    [("➕ Tambah", "menu_input"), ("✏️ Koreksi", "action_edit")],
+    [("📊 Rekap", "menu_rekap"), ("🧹 Reset", "action_reset_today")],
+)
+
+BACK_TO_MAIN_KEYBOARD = _keyboard([("🏠 Menu Utama", "menu_main")])
+BACK_TO_INPUT_KEYBOARD = _keyboard([("🔙 Kembali", "menu_input")])
+BACK_TO_REKAP_KEYBOARD = _keyboard([("🔙 Kembali", "menu_rekap")])
+BACK_TO_KOREKSI_KEYBOARD = _keyboard([("🔙 Kembali", "menu_koreksi")])
+
+
+@lru_cache(maxsize=64)
+def modal_reset_keyboard(amount: int) -> InlineKeyboardMarkup:
+    """Konfirmasi modal kedua (reset hari ini lalu simpan modal baru)"""
+    return _keyboard([("✅ Ya, Reset Hari Ini", f"reset_and_modal_{amount}"), ("❌ Batal", "cancel_modal")])
+
+
+@lru_cache(maxsize=64)
+def reset_confirm_keyboard(tanggal: str, cancel_data: str = 'cancel_reset') -> InlineKeyboardMarkup:
+    """Konfirmasi reset transaksi satu tanggal"""
+    return _keyboard([("✅ Ya, Reset", f"confirm_reset_{tanggal}"), ("❌ Batal", cancel_data)])
+
+
+@lru_cache(maxsize=256)
+def ledger_nav_keyboard(start_date: str, end_date: str, page: int,
+                        total_pages: int) -> Optional[InlineKeyboardMarkup]:
+    """Tombol halaman sebelumnya/berikutnya untuk /ledger (None jika satu halaman)"""
+    buttons = []
+    if page > 0:
+        buttons.append(("⬅️ Sebelumnya", f"ledger_{start_date}_{end_date}_{page - 1}"))
+    if page + 1 < total_pages:
+        buttons.append(("Berikutnya ➡️", f"ledger_{start_date}_{end_date}_{page + 1}"))
+    return _keyboard(buttons) if buttons else None
+
+
+def ocr_confirm_keyboard(pending_id: int) -> InlineKeyboardMarkup:
+    """Konfirmasi simpan hasil OCR dari callback n8n (ID tabel ocr_pending)"""
+    return _keyboard([("✅ Simpan", f"ocr_save_{pending_id}"), ("❌ Batal", f"ocr_cancel_{pending_id}")])
+
+
+# ===== TEMPLATE =====
+
+MAIN_MENU_TEXT = (
+    "🏪 *Asisten Keuangan Anisa Store v2*\n\n"
+    "Selamat datang! Silakan pilih menu di bawah ini.\n\n"
+    "💡 _Tip: Ketik /help untuk daftar lengkap perintah_"
+)
+
+BANTUAN_SINGKAT_TEXT = """
+❓ *Bantuan Singkat*
+
+• `/modal 500k` - Modal awal
+• `/cash 1jt` - Cash akhir
+• `/tf 200k` - Transfer masuk
+• `/keluar 50k beli bensin` - Pengeluaran
+
+_Ketik /help untuk panduan lengkap._
+"""
+
+STATUS_TEMPLATE = f"""
+╔══════════════════════════╗
+║  📊 STATUS HARI INI  ║
+╚══════════════════════════╝
+📅 {{tanggal_display}}
+
+{GARIS}
+💰 MODAL & CASH
+{GARIS}
+Modal Awal       : {{modal}}
+Cash Akhir (laci): {{cash_akhir}}
+
+{GARIS}
+💳 TRANSAKSI
+{GARIS}
+Total TF/QRIS    : {{total_tf}} ({{count_tf}}x)
+Total Pengeluaran: {{total_pengeluaran}} ({{count_pengeluaran}}x)
+
+{GARIS}
+📈 PERHITUNGAN
+{GARIS}
+Penjualan Cash   : {{penjualan_cash}}
+Omzet Manual     : {{omzet_manual}}
+
+{GARIS}
+🖥️ OMZET POS
+{GARIS}
+Omzet POS        : {{pos_total}} ({{count_pos}}x)
+
+{GARIS}
+📊 SELISIH
+{GARIS}
+Manual - POS     : {{selisih}} ({{selisih_persen:.2f}}%)
+
+{{status_icon}} {{status_text}}
+"""
+
+STATUS_SINGKAT_TEMPLATE = """
+📊 *Status Hari Ini*
+📅 {tanggal}
+
+💰 Modal: {modal}
+💵 Cash: {cash_akhir}
+💳 TF: {total_tf} ({count_tf}x)
+📤 Keluar: {total_pengeluaran} ({count_pengeluaran}x)
+📈 Omzet: {omzet_manual}
+🖥️ POS: {pos_total}
+📊 Selisih: {selisih}
+
+{status_icon} {status_text}
+"""
+
+LIHAT_HEADER_TEMPLATE = """
+╔══════════════════════════╗
+║  {title}  ║
+╚══════════════════════════╝
+📅 {tanggal_display}
+
+"""
+
+LIHAT_RINGKASAN_TEMPLATE = f"""
+{GARIS}
+📊 RINGKASAN
+{GARIS}
+💰 Modal         : {{modal}}
+💵 Cash Akhir    : {{cash_akhir}}
+💳 TF/QRIS       : {{total_tf}} ({{count_tf}}x)
+📤 Pengeluaran   : {{total_pengeluaran}} ({{count_pengeluaran}}x)
+📈 Omzet Manual  : {{omzet_manual}}
+🖥️ Omzet POS     : {{pos_total}}
+📊 Selisih       : {{selisih}} ({{selisih_persen:.2f}}%)
+
+💡 Gunakan /edit <ID> untuk edit transaksi
+"""
+
+REKAP_MINGGUAN_SINGKAT_TEMPLATE = """
+📅 *Rekap Mingguan*
+{periode}
+
+📈 Total Omzet: {total_omzet}
+💳 Total TF: {total_tf}
+📤 Total Keluar: {total_pengeluaran}
+📊 Hari Tercatat: {days} hari
+{forecast}
+_Gunakan /mingguan untuk detail_
+"""
+
+REKAP_BULANAN_SINGKAT_TEMPLATE = """
+📆 *Rekap Bulanan*
+{bulan}
+
+📈 Total Omzet: {total_omzet}
+💳 Total TF: {total_tf}
+📤 Total Keluar: {total_pengeluaran}
+📊 Hari Tercatat: {days} hari
+
+_Gunakan /bulanan untuk detail_
+"""
+
+OCR_QUEUE_FULL_TEXT = (
+    "⏳ Antrian OCR sedang penuh.\n"
+    "Kirim ulang foto sebentar lagi, atau input manual dengan `/tf <jumlah>`"
+)
+
+
+def render_ocr_progress(position: int, running: int, elapsed: int) -> str:
+    """Pesan proses OCR: posisi antrean selagi menunggu, lama proses setelah mulai"""
+    text = "⏳ Sedang menganalisa gambar..."
+    if position:
+        return f"{text}\n📋 Antrian ke-{position} ({running} sedang diproses)"
+    return f"{text} ({elapsed} dtk)" if elapsed else text
+
+
+def render_ocr_duplicate(tx_id: int, tanggal: str, waktu: str, jumlah, similar: bool = False) -> str:
+    """Peringatan struk yang sudah tercatat (foto sama persis, atau mirip dengan nominal sama)"""
+    if similar:
+        header = "⚠️ *STRUK MIRIP SUDAH TERCATAT*"
+        footer = "Jika ini transfer yang berbeda, tekan Simpan."
+    else:
+        header = "⚠️ *STRUK SUDAH TERCATAT*"
+        footer = "Transaksi tidak ditambahkan lagi."
+    return (
+        f"{header}\n\n"
+        f"💰 Nominal: {format_rupiah(jumlah)}\n"
+        f"🆔 ID: {tx_id} ({tanggal} {waktu[:5]})\n\n"
+        f"{footer}"
+    )
+
+
+# Field ringkasan harian yang ditampilkan; nominal diformat rupiah, sisanya apa adanya
+_SUMMARY_MONEY = (
+    'modal', 'cash_akhir', 'total_tf', 'total_pengeluaran', 'penjualan_cash',
+    'omzet_manual', 'pos_total', 'selisih',
+)
+_SUMMARY_PLAIN = (
+    'count_tf', 'count_pengeluaran', 'count_pos', 'selisih_persen', 'status_icon', 'status_text',
+)
+_REKAP_MONEY = ('total_omzet', 'total_tf', 'total_pengeluaran')
+
+TIPE_EMOJI = {'modal': '💰', 'cash': '💵', 'tf': '💳', 'keluar': '📤', 'pos': '🖥️'}
+TIPE_LABEL = {'modal': 'MODAL', 'cash': 'CASH', 'tf': 'TF', 'keluar': 'KELUAR', 'pos': 'POS'}
+
+
+def _summary_key(summary: Dict) -> Tuple:
+    """Kunci isi ringkasan (hashable) untuk memoization render"""
+    return tuple(summary[field] for field in _SUMMARY_MONEY + _SUMMARY_PLAIN)
+
+
+@lru_cache(maxsize=256)
+def _render_summary(template: str, key: Tuple, **extra) -> str:
+    fields = dict(zip(_SUMMARY_MONEY + _SUMMARY_PLAIN, key))
+    for field in _SUMMARY_MONEY:
+        fields[field] = format_rupiah(fields[field])
+    return template.format_map({**fields, **extra})
+
+
+def render_status(tanggal: str, summary: Dict) -> str:
+    """Pesan /status (tanpa blok proyeksi)"""
+    return _render_summary(STATUS_TEMPLATE, _summary_key(summary), tanggal_display=format_tanggal(tanggal))
+
+
+LIVE_STATUS_FOOTER = "\n📌 Status live — diperbarui otomatis setiap ada transaksi\n"
+
+
+def render_live_status(tanggal: str, summary: Dict) -> str:
+    """Pesan status live yang di-pin (/live)"""
+    return render_status(tanggal, summary) + LIVE_STATUS_FOOTER
+
+
+def render_status_singkat(tanggal: str, summary: Dict) -> str:
+    """Status ringkas untuk tombol Rekap → Status Hari Ini"""
+    return _render_summary(STATUS_SINGKAT_TEMPLATE, _summary_key(summary), tanggal=tanggal)
+
+
+def render_lihat_ringkasan(summary: Dict) -> str:
+    """Blok ringkasan di bawah daftar transaksi /lihat"""
+    return _render_summary(LIHAT_RINGKASAN_TEMPLATE, _summary_key(summary))
+
+
+def render_lihat_header(tanggal: str, is_today: bool) -> str:
+    title = "📒 TRANSAKSI HARI INI" if is_today else "📒 RIWAYAT TRANSAKSI"
+    return LIHAT_HEADER_TEMPLATE.format(title=title, tanggal_display=format_tanggal(tanggal))
+
+
+@lru_cache(maxsize=1024)
+def render_transaksi_line(nomor: int, tx_id: int, waktu: str, tipe: str, jumlah, keterangan: str) -> str:
+    """Satu baris transaksi di /lihat"""
+    emoji = TIPE_EMOJI.get(tipe, '📝')
+    label = TIPE_LABEL.get(tipe, tipe.upper())
+    line = f"{nomor}. [{waktu[:5]}] {emoji} {label}: {format_rupiah(jumlah)}"
+    if keterangan:
+        line += f"\n   💬 {keterangan}"
+    return line + f"\n   🔑 ID: {tx_id}\n"
+
+
+def _rekap_fields(rekap: Dict) -> Dict:
+    fields = {field: format_rupiah(rekap[field]) for field in _REKAP_MONEY}
+    fields['days'] = rekap['days']
+    return fields
+
+
+def render_rekap_mingguan_singkat(periode: str, rekap: Dict, forecast: str = '') -> str:
+    return REKAP_MINGGUAN_SINGKAT_TEMPLATE.format_map({**_rekap_fields(rekap), 'periode': periode, 'forecast': forecast})
+
+
+def render_rekap_bulanan_singkat(bulan_date, rekap: Dict) -> str:
+    return REKAP_BULANAN_SINGKAT_TEMPLATE.format_map({**_rekap_fields(rekap), 'bulan': format_bulan(bulan_date)})
@@ -0,0 +1,148 @@
+"""
+Mode webhook: satu aplikasi ASGI (FastAPI) di dalam proses bot
+- POST WEBHOOK_PATH      → update dari Telegram masuk ke update_queue PTB
+- POST OCR_CALLBACK_PATH → hasil OCR dari n8n (pengganti ocr_endpoint.py terpisah)
+- GET /health, /metrics  → cek hidup & metrik dalam JSON (/metrics butuh METRICS_TOKEN,
+                           atau hanya dari localhost jika token kosong)
+
+Butuh fastapi + uvicorn (lihat requirements.txt); hanya di-import saat RUN_MODE=webhook.
+"""
+
+import hmac
+import logging
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel
+from telegram import Update
+
+from ocr_callback import send_ocr_result
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+METRICS_TOKEN_HEADER = 'X-Metrics-Token'
+_LOCAL_HOSTS = ('127.0.0.1', '::1')
+
+
+class OCRResult(BaseModel):
+    """Model untuk hasil OCR dari n8n"""
+    chat_id: int
+    message_id: int
+    is_tf_receipt: bool
+    amount: Optional[int] = None
+    raw_text: Optional[str] = None
+    confidence: Optional[float] = None
+
+
+def create_app(toko_bot, application) -> FastAPI:
+    """
+    Bangun aplikasi ASGI untuk TokoBot.
+
+    Args:
+        toko_bot: Instance TokoBot (config & metrik)
+        application: Application PTB yang sudah dibangun (belum tentu sudah start)
+    """
+    config = toko_bot.config
+    app = FastAPI(title="Toko Bot")
+
+    @app.post(config.WEBHOOK_PATH)
+    async def telegram_webhook(request: Request):
+        """Terima update dari Telegram lalu antrekan ke PTB (diproses di latar belakang)"""
+        if config.WEBHOOK_SECRET:
+            token = request.headers.get(SECRET_HEADER, '')
+            if not hmac.compare_digest(token, config.WEBHOOK_SECRET):
+                raise HTTPException(status_code=403, detail="invalid secret token")
+
+        try:
+            update = Update.de_json(await request.json(), application.bot)
+        except Exception as e:
+            logger.warning(f"Invalid webhook payload: {e}")
+            raise HTTPException(status_code=400, detail="invalid update")
+
+        # Balas 200 secepatnya; Telegram mengirim ulang jika respons lambat/gagal
+        await application.update_queue.put(update)
+        return Response(status_code=200)
+
+    @app.post(config.OCR_CALLBACK_PATH)
+    async def ocr_transfer_result(result: OCRResult):
+        """Endpoint untuk menerima callback hasil OCR dari n8n"""
+        try:
+            logger.info(f"OCR result received: chat={result.chat_id}, message={result.message_id}")
+            # Bot & pool koneksi milik aplikasi dipakai ulang, pending di storage bot
+            await send_ocr_result(
+                application.bot,
+                toko_bot.storage,
+                chat_id=result.chat_id,
+                message_id=result.message_id,
+                is_tf_receipt=result.is_tf_receipt,
+                amount=result.amount,
+                raw_text=result.raw_text,
+                confidence=result.confidence,
+            )
+            return {"status": "success", "message": "OCR result processed"}
+        except Exception as e:
+            logger.error(f"Error processing OCR result: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint"""
+        return {"status": "healthy", "service": "toko-bot", "mode": "webhook"}
+
+    @app.get("/metrics")
+    async def metrics(request: Request):
+        """Metrik update, outbox, status live, tombol & OCR (sama dengan /metrik)"""
+        if config.METRICS_TOKEN:
+            token = request.headers.get(METRICS_TOKEN_HEADER, '')
+            if not hmac.compare_digest(token, config.METRICS_TOKEN):
+                raise HTTPException(status_code=403, detail="invalid metrics token")
+        elif request.client is None or request.client.host not in _LOCAL_HOSTS:
+            raise HTTPException(status_code=403, detail="metrics only available from localhost")
+        return toko_bot.metrics_snapshot()
+
+    return app
+
+
+def webhook_url(config) -> str:
+    """URL publik lengkap yang didaftarkan ke Telegram lewat setWebhook"""
+    return config.WEBHOOK_URL.rstrip('/') + config.WEBHOOK_PATH
+
+
+async def run_webhook(toko_bot, application):
+    """
+    Jalankan bot dalam mode webhook dengan server uvicorn tertanam.
+    Berhenti saat server berhenti (Ctrl+C / SIGTERM), dengan urutan shutdown
+    yang sama seperti run_polling PTB: stop → post_stop → shutdown → post_shutdown.
+    """
+    import uvicorn
+
+    config = toko_bot.config
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(toko_bot, application),
+        host=config.WEBHOOK_HOST,
+        port=config.WEBHOOK_PORT,
+        log_level='info',
+    ))
+
+    # Hook post_* hanya dipanggil otomatis oleh run_polling/run_webhook bawaan PTB
+    try:
+        await application.initialize()
+        if application.post_init:
+            await application.post_init(application)
+        await application.bot.set_webhook(
+            url=webhook_url(config),
+            allowed_updates=Update.ALL_TYPES,
+            secret_token=config.WEBHOOK_SECRET or None,
+        )
+        await application.start()
+        logger.info(f"Webhook server listening on {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}")
+        await server.serve()
+    finally:
+        if application.running:
+            await application.stop()
+        if application.post_stop:
+            await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)